@@ -0,0 +1,16 @@
+// src/api/download.js
+import API from "./api";
+
+// Fetch an export (e.g. "admin/bills/export/") with the auth header and
+// hand it to the browser as a file download.
+export async function downloadFile(path, filename, params = {}) {
+  const res = await API.get(path, { params, responseType: "blob" });
+  const url = URL.createObjectURL(res.data);
+  const link = document.createElement("a");
+  link.href = url;
+  link.download = filename;
+  document.body.appendChild(link);
+  link.click();
+  link.remove();
+  URL.revokeObjectURL(url);
+}
@@ -5,6 +5,7 @@ import {
   FaCheckCircle,
   FaClock,
 } from "react-icons/fa";
+import API from "../api/api";
 import "./Sidebar.css";
 
 export default function LabSidebar() {
@@ -30,8 +31,12 @@ export default function LabSidebar() {
           <li className="logout-btn">
             <a
               onClick={() => {
-                localStorage.clear();
-                window.location.href = "/login";
+                API.post("logout/")
+                  .catch(() => {})
+                  .finally(() => {
+                    localStorage.clear();
+                    window.location.href = "/login";
+                  });
               }}
             >
               Logout
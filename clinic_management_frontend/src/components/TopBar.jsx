@@ -1,6 +1,7 @@
 import "./TopBar.css";
 import logo from "../assets/hillcrest.jpg";
 import { Link } from "react-router-dom";
+import API from "../api/api";
 
 export default function TopBar() {
   const user = JSON.parse(localStorage.getItem("user") || "{}");
@@ -17,7 +18,8 @@ export default function TopBar() {
 
       <div className="topbar-right">
         {roleLabel && <span className="role-label">{roleLabel} Portal</span>}
-        <Link to="/login">
+        {/* revoke the access token server-side; navigation does not wait */}
+        <Link to="/login" onClick={() => API.post("logout/").catch(() => {})}>
           <button className="logout-btn">Logout</button>
         </Link>
       </div>
@@ -0,0 +1,23 @@
+// src/hooks/useEvents.js
+import { useEffect, useRef } from "react";
+import API from "../api/api";
+
+// Subscribe to server events (see /api/events/stream/) and call
+// onEvent(type, data) for each of the given types. EventSource resends
+// the last event id when it reconnects, so nothing is missed.
+export default function useEvents(types, onEvent) {
+  const handler = useRef(onEvent);
+  handler.current = onEvent;
+  const key = types.join(",");
+
+  useEffect(() => {
+    const token = localStorage.getItem("access");
+    const stream = new EventSource(
+      `${API.defaults.baseURL}/events/stream/?token=${encodeURIComponent(token || "")}`
+    );
+    key.split(",").forEach((type) =>
+      stream.addEventListener(type, (e) => handler.current(type, JSON.parse(e.data)))
+    );
+    return () => stream.close();
+  }, [key]);
+}
@@ -2,14 +2,29 @@ import { useEffect, useState } from "react";
 import Sidebar from "../../components/Sidebar";
 import TopBar from "../../components/TopBar";
 import API from "../../api/api";
+import { downloadFile } from "../../api/download";
 import "./Admin.css";
 
 export default function Accounts() {
   const [bills, setBills] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
 
+  // cursor-paginated: first page here, "Load more" follows `next`
   const loadBills = () => {
-    API.get("admin/bills/")
-      .then(res => setBills(res.data))
+    API.get("admin/bills/", { params: { paginate: "cursor" } })
+      .then(res => {
+        setBills(res.data.results);
+        setNextPage(res.data.next);
+      })
+      .catch(() => console.error("Failed to load bills"));
+  };
+
+  const loadMore = () => {
+    API.get(nextPage)
+      .then(res => {
+        setBills(prev => [...prev, ...res.data.results]);
+        setNextPage(res.data.next);
+      })
       .catch(() => console.error("Failed to load bills"));
   };
 
@@ -37,6 +52,17 @@ export default function Accounts() {
         <div className="page-content">
           <h2 className="page-title">Accounts & Billing</h2>
 
+          <button
+            className="btn-edit"
+            onClick={() =>
+              downloadFile("admin/bills/export/", "bills.csv").catch(() =>
+                alert("Export failed!")
+              )
+            }
+          >
+            Export CSV
+          </button>
+
           <table className="employees-table">
             <thead>
               <tr>
@@ -73,6 +99,12 @@ export default function Accounts() {
             </tbody>
 
           </table>
+
+          {nextPage && (
+            <button className="btn-submit" onClick={loadMore}>
+              Load more
+            </button>
+          )}
         </div>
       </div>
     </div>
@@ -1,8 +1,31 @@
+import { useEffect, useState } from "react";
 import Sidebar from "../../components/Sidebar";
 import TopBar from "../../components/TopBar";
+import API from "../../api/api";
 import "./Admin.css";
 
+const KPIS = [
+  ["appointments", "Appointments"],
+  ["consultations", "Consultations"],
+  ["medicines_dispensed", "Medicines Dispensed"],
+];
+
+// sums the metrics that share a prefix, e.g. every "revenue:<SOURCE>"
+const sumPrefix = (values, prefix) =>
+  Object.entries(values)
+    .filter(([metric]) => metric.startsWith(prefix))
+    .reduce((total, [, value]) => total + Number(value), 0);
+
 export default function AdminDashboard() {
+  const [stats, setStats] = useState(null);
+
+  // last 30 days from the daily rollups
+  useEffect(() => {
+    API.get("admin/dashboard/")
+      .then(res => setStats(res.data))
+      .catch(() => console.error("Failed to load dashboard"));
+  }, []);
+
   return (
     <div className="main-container">
       <Sidebar role="admin" />
@@ -10,12 +33,60 @@ export default function AdminDashboard() {
       <div className="content">
         <TopBar title="ADMIN PORTAL" />
 
-        {/* Centered Welcome Block */}
-        <div className="welcome-container">
+        <div className="dashboard-summary">
           <div className="welcome-card">
             <h2>Welcome to Admin Panel</h2>
             <p>Manage departments, employees, billing reports & patient tracking</p>
           </div>
+
+          {stats && (
+            <>
+              <div className="kpi-grid">
+                {KPIS.map(([metric, label]) => (
+                  <div className="kpi-card" key={metric}>
+                    <span>{label}</span>
+                    <strong>{Number(stats.totals[metric] || 0)}</strong>
+                  </div>
+                ))}
+                <div className="kpi-card">
+                  <span>Lab Tests</span>
+                  <strong>{sumPrefix(stats.totals, "lab_tests:")}</strong>
+                </div>
+                <div className="kpi-card">
+                  <span>Revenue</span>
+                  <strong>₹{sumPrefix(stats.totals, "revenue:").toFixed(2)}</strong>
+                </div>
+              </div>
+
+              <div className="table-wrapper">
+                <table className="employees-table">
+                  <thead>
+                    <tr>
+                      <th>Department</th>
+                      <th>Appointments</th>
+                      <th>Lab Tests</th>
+                      <th>Revenue</th>
+                    </tr>
+                  </thead>
+                  <tbody>
+                    {stats.departments.map(d => (
+                      <tr key={d.department_id ?? "none"}>
+                        <td>{d.department_name || "Walk-in"}</td>
+                        <td>{Number(d.appointments || 0)}</td>
+                        <td>{sumPrefix(d, "lab_tests:")}</td>
+                        <td>₹{sumPrefix(d, "revenue:").toFixed(2)}</td>
+                      </tr>
+                    ))}
+                  </tbody>
+                </table>
+              </div>
+
+              <p className="kpi-note">
+                {stats.from} to {stats.to}
+                {stats.as_of && ` · updated ${new Date(stats.as_of).toLocaleString()}`}
+              </p>
+            </>
+          )}
         </div>
 
       </div>
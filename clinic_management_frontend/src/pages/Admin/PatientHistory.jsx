@@ -2,6 +2,7 @@ import { useEffect, useState } from "react";
 import Sidebar from "../../components/Sidebar";
 import TopBar from "../../components/TopBar";
 import API from "../../api/api";
+import { downloadFile } from "../../api/download";
 import "./Admin.css";
 
 export default function PatientHistory() {
@@ -27,6 +28,17 @@ export default function PatientHistory() {
         <div className="page-content">
           <h2 className="page-title">Patient History</h2>
 
+          <button
+            className="btn-edit"
+            onClick={() =>
+              downloadFile("admin/patient-history/export/", "patient-history.csv").catch(() =>
+                alert("Export failed!")
+              )
+            }
+          >
+            Export CSV
+          </button>
+
           <table className="employees-table">
             <thead>
               <tr>
@@ -16,13 +16,24 @@ export default function DoctorDashboard() {
       .then((res) => setDoctor(res.data))
       .catch(() => {});
 
-    API.get("/doctor/appointments/current/")
-      .then((res) => setCurrent(res.data || null))
+    const showQueue = (queue) => {
+      setCurrent(queue.current || null);
+      setUpcoming(queue.upcoming || []);
+    };
+
+    API.get("/doctor/appointments/queue/", { params: { next: 10 } })
+      .then((res) => showQueue(res.data))
       .catch(() => setCurrent(null));
 
-    API.get("/doctor/appointments/upcoming/")
-      .then((res) => setUpcoming(res.data || []))
-      .catch(() => {});
+    // The server pushes the queue whenever it changes; EventSource
+    // reconnects on its own if the connection drops.
+    const token = localStorage.getItem("access");
+    const stream = new EventSource(
+      `${API.defaults.baseURL}/doctor/queue/stream/?next=10&token=${encodeURIComponent(token || "")}`
+    );
+    stream.addEventListener("queue", (e) => showQueue(JSON.parse(e.data)));
+
+    return () => stream.close();
   }, []);
 
   return (
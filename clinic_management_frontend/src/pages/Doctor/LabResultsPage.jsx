@@ -2,20 +2,26 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
 import API from "../../api/api";
+import useEvents from "../../hooks/useEvents";
 import Sidebar from "../../components/Sidebar";
 import TopBar from "../../components/TopBar";
 
 export default function LabResultsPage() {
   const [results, setResults] = useState([]);
 
-  useEffect(() => {
+  const loadResults = () => {
     API.get("/doctor/lab-results/")
       .then((res) => setResults(res.data))
       .catch((err) => {
         console.error("Error fetching lab results:", err);
         setResults([]);
       });
-  }, []);
+  };
+
+  useEffect(loadResults, []);
+
+  // refetch only when a result for this doctor is ready
+  useEvents(["lab_result.ready"], loadResults);
 
   return (
     <div className="main-container">
@@ -3,19 +3,36 @@ import { useEffect, useState } from "react";
 import API from "../../api/api";
 import Sidebar from "../../components/Sidebar";
 import TopBar from "../../components/TopBar";
-import { Link } from "react-router-dom";
+import { useNavigate } from "react-router-dom";
+import useEvents from "../../hooks/useEvents";
+
+const PRIORITY = { 1: "Urgent", 2: "STAT" };
 
 export default function PendingTestsPage() {
   const [requests, setRequests] = useState([]);
+  const navigate = useNavigate();
 
-  useEffect(() => {
+  const loadRequests = () => {
     API.get("/lab/pending/")
       .then((res) => setRequests(res.data))
       .catch((err) => {
         console.error("Error fetching pending lab tests:", err);
         setRequests([]);
       });
-  }, []);
+  };
+
+  useEffect(loadRequests, []);
+  useEvents(["lab_request.created"], loadRequests);
+
+  // Claim the sample first so no other technician processes it too.
+  const startProcessing = (req) => {
+    API.post(`/lab/pending/${req.id}/claim/`)
+      .then(() => navigate(`/lab/pending-tests/${req.id}`))
+      .catch((err) => {
+        alert(err.response?.data?.detail || "Could not claim this test");
+        loadRequests();
+      });
+  };
 
   return (
     <div className="main-container">
@@ -45,16 +62,22 @@ export default function PendingTestsPage() {
               requests.map((req) => (
                 <tr key={req.id}>
                   <td>{req.patient_name}</td>
-                  <td>{req.test_type}</td>
+                  <td>
+                    {req.test_type}
+                    {PRIORITY[req.priority] && <strong> ({PRIORITY[req.priority]})</strong>}
+                  </td>
                   <td>Dr. {req.doctor_name}</td>
                   <td>{req.requested_at}</td>
                   <td>
-                    <Link
+                    {req.status === "PROCESSING" && req.claimed_by_name && (
+                      <span>In progress ({req.claimed_by_name}) </span>
+                    )}
+                    <button
                       className="btn-primary"
-                      to={`/lab/pending-tests/${req.id}`}
+                      onClick={() => startProcessing(req)}
                     >
                       Process
-                    </Link>
+                    </button>
                   </td>
                 </tr>
               ))
@@ -3,21 +3,23 @@ import { useNavigate, useParams } from "react-router-dom";
 import API from "../../api/api";
 import Sidebar from "../../components/Sidebar";
 import TopBar from "../../components/TopBar";
-import { TEST_PARAMETERS } from "../../constants/LabTestParameters";
 import "./status.css";
 
 export default function ProcessLabTestPage() {
   const { requestId } = useParams();
   const [labRequest, setLabRequest] = useState(null);
+  const [catalog, setCatalog] = useState(null);
   const [values, setValues] = useState({});
   const navigate = useNavigate();
 
   useEffect(() => {
-    API.get(`/lab/pending/${requestId}/`)
-      .then((res) => {
+    // parameters, units and ranges come from the backend catalogue
+    Promise.all([API.get(`/lab/pending/${requestId}/`), API.get("/lab/parameters/")])
+      .then(([res, parametersRes]) => {
         setLabRequest(res.data);
+        setCatalog(parametersRes.data);
 
-        const template = TEST_PARAMETERS[res.data.test_type] || [];
+        const template = parametersRes.data[res.data.test_type] || [];
         const initialValues = {};
         template.forEach((p) => {
           initialValues[p.name] = "";
@@ -46,7 +48,7 @@ export default function ProcessLabTestPage() {
   const handleSubmit = () => {
     if (!labRequest) return;
 
-    const template = TEST_PARAMETERS[labRequest.test_type] || [];
+    const template = catalog[labRequest.test_type] || [];
 
     // Validation
     for (let p of template) {
@@ -56,15 +58,10 @@ export default function ProcessLabTestPage() {
       }
     }
 
+    // the backend fills in unit, range and status from its catalogue
     const resultArray = template.map((p) => ({
       parameter: p.name,
       value: values[p.name],
-      unit: p.unit || "",
-      low: p.low ?? null,
-      high: p.high ?? null,
-      status: p.low != null && p.high != null
-        ? getStatus(values[p.name], p.low, p.high)
-        : ""
     }));
 
     const payload = {
@@ -82,9 +79,9 @@ export default function ProcessLabTestPage() {
       });
   };
 
-  if (!labRequest) return <p>Loading...</p>;
+  if (!labRequest || !catalog) return <p>Loading...</p>;
 
-  const template = TEST_PARAMETERS[labRequest.test_type] || [];
+  const template = catalog[labRequest.test_type] || [];
 
   return (
     <div className="main-container">
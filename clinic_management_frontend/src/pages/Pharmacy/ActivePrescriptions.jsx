@@ -2,6 +2,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import API from "../../api/api";
+import useEvents from "../../hooks/useEvents";
 import Sidebar from "../../components/Sidebar";
 import TopBar from "../../components/TopBar";
 
@@ -9,14 +10,19 @@ export default function ActivePrescriptions() {
   const [prescriptions, setPrescriptions] = useState([]);
   const navigate = useNavigate();
 
-  useEffect(() => {
+  const loadPrescriptions = () => {
     API.get("/pharmacy/active-prescriptions/")
       .then((res) => setPrescriptions(res.data || []))
       .catch((err) => {
         console.error(err);
         alert("Failed to load active prescriptions");
       });
-  }, []);
+  };
+
+  useEffect(loadPrescriptions, []);
+
+  // new prescriptions appear, dispensed ones (by any pharmacist) drop off
+  useEvents(["prescription.created", "prescription.dispensed"], loadPrescriptions);
 
   return (
     <div className="main-container">
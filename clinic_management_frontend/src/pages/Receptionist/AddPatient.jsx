@@ -89,13 +89,11 @@ export default function AddPatient() {
     try {
       setSearchLoading(true);
 
-      // GET /api/receptionist/patients/
-      const res = await API.get("receptionist/patients/");
-      const allPatients = Array.isArray(res.data) ? res.data : [];
-
-      const matches = allPatients.filter(
-        (p) => String(p.contact_number) === String(searchPhone)
-      );
+      // GET /api/receptionist/patients/search/?q=<phone> (indexed lookup)
+      const res = await API.get("receptionist/patients/search/", {
+        params: { q: searchPhone, limit: 5 },
+      });
+      const matches = Array.isArray(res.data) ? res.data : [];
 
       if (matches.length > 0) {
         const p = matches[0];
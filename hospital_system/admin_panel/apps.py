@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class AdminPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_panel'
+
+    def ready(self):
+        from django.core import checks
+        from .authentication import check_revocation_cache
+        checks.register(check_revocation_cache, checks.Tags.security)
+
+        from hillcrest.refcache import connect_signals
+        connect_signals()
+
+        from . import signals  # noqa: F401
@@ -0,0 +1,148 @@
+# admin_panel/authentication.py
+"""
+JWT authentication without a database query per request.
+
+simplejwt's JWTAuthentication loads the User row on every request, yet
+permissions only read ``role`` and most views only need the user's id.
+The access token already carries both (MyTokenObtainPairSerializer),
+plus ``department``. ClaimsJWTAuthentication builds request.user from
+those claims:
+
+    User(id=<user_id>, role=<role>, department_id=<department>)
+
+It is a real User instance, so ``doctor=request.user`` and
+``filter(claimed_by=request.user)`` work unchanged. Only the claimed
+fields are set: views that show the user's own name or profile load
+the row with full_user(). save() refuses, so a claims user can never
+overwrite the row with blanks.
+
+Because the row is not read, a token stays valid when the user changes.
+The revocation list covers that:
+
+    revoke_token(token)   one token (logout)
+    revoke_user(user_id)  every token issued to the user up to now
+
+admin_panel/signals.py revokes a user's tokens when their role,
+department, password or active flag changes, or when they are deleted.
+Entries expire with ACCESS_TOKEN_LIFETIME, when the tokens they block
+would have expired anyway.
+
+The list lives in CACHES["revocations"]. The default there is locmem,
+so each request checks it without leaving the process. locmem is per
+process, though: a token revoked in one worker would still be accepted
+by the others. With WEB_CONCURRENCY above 1, point the alias at a shared
+backend, as for "refdata"; check_revocation_cache() makes manage.py
+check (and so migrate and runserver) fail until then.
+
+Tokens without a ``role`` claim fall back to loading the row.
+"""
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+CACHE_ALIAS = "revocations"
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _lifetime():
+    return int(settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds())
+
+
+def revoke_token(token):
+    """
+    Reject this access token from now on.
+    """
+    remaining = int(token["exp"] - time.time())
+    if remaining > 0:
+        _cache().set(f"revoked:jti:{token[api_settings.JTI_CLAIM]}", True, timeout=remaining)
+
+
+def revoke_user(user_id):
+    """
+    Reject every token issued to ``user_id`` up to now.
+    """
+    _cache().set(f"revoked:user:{user_id}", int(time.time()), timeout=_lifetime())
+
+
+def revoke_user_on_commit(user_id):
+    transaction.on_commit(lambda: revoke_user(user_id))
+
+
+def is_revoked(token):
+    user_key = f"revoked:user:{token.get(api_settings.USER_ID_CLAIM)}"
+    jti_key = f"revoked:jti:{token.get(api_settings.JTI_CLAIM)}"
+    found = _cache().get_many([user_key, jti_key])
+    # iat has whole seconds, so a token from the same second counts as older
+    return jti_key in found or found.get(user_key, -1) >= token.get("iat", 0)
+
+
+def check_revocation_cache(app_configs=None, **kwargs):
+    """
+    System check: several workers need a revocation list they all share.
+    """
+    if getattr(settings, "WEB_CONCURRENCY", 1) <= 1:
+        return []
+    if not isinstance(_cache(), (LocMemCache, DummyCache)):
+        return []
+    return [checks.Error(
+        f'CACHES["{CACHE_ALIAS}"] is per process, but WEB_CONCURRENCY is '
+        f"{settings.WEB_CONCURRENCY}: a revoked token would still be accepted by the other workers.",
+        hint=f'Point CACHES["{CACHE_ALIAS}"] at a shared backend such as RedisCache or FileBasedCache.',
+        id="admin_panel.E001",
+    )]
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError("This user was built from token claims; load it with full_user() to save it.")
+
+
+def claims_user(token):
+    """
+    An unsaved-looking User carrying only the id, role and department
+    from ``token``.
+    """
+    # simplejwt stores the id as a string
+    user = User(
+        id=User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM]),
+        role=token["role"],
+        department_id=token.get("department"),
+    )
+    user._state.adding = False
+    user._state.db = "default"
+    user.from_token = True
+    user.save = _read_only
+    return user
+
+
+def full_user(user):
+    """
+    The User row for ``user``; claims users are loaded from the database.
+    """
+    if getattr(user, "from_token", False):
+        return User.objects.select_related("department").get(pk=user.pk)
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if is_revoked(validated_token):
+            raise InvalidToken("Token has been revoked")
+        if "role" not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            return claims_user(validated_token)
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
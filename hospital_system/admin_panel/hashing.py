@@ -0,0 +1,34 @@
+# admin_panel/hashing.py
+"""
+Password hashing in worker processes.
+
+make_password() is deliberately slow (PBKDF2), so hashing a few hundred
+new passwords one after another takes minutes. hash_passwords() spreads
+them over a process pool. The pool uses the "spawn" start method:
+forking a threaded web worker can deadlock, and spawned children only
+need DJANGO_SETTINGS_MODULE, which they inherit. This module imports no
+models, so the children never need the app registry.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+
+# below this many passwords, starting the pool costs more than it saves
+MIN_POOL_BATCH = 16
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    make_password() for each of ``passwords``, in order.
+    """
+    workers = min(workers or default_workers(), len(passwords))
+    if workers <= 1 or len(passwords) < MIN_POOL_BATCH:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from admin_panel.authentication import ClaimsJWTAuthentication
+from admin_panel.models import Department, User
+from admin_panel.serializers import MyTokenObtainPairSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request JWT authentication: loading the user row "
+        "(simplejwt) against building it from the token's claims. Runs in "
+        "one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        department = Department.objects.create(name="Benchmark Dept")
+        user = User.objects.create(username="benchmark-doctor", role="DOCTOR", department=department)
+        token = MyTokenObtainPairSerializer.get_token(user).access_token
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.stdout.write(f"{'mode':<10} {'queries':>8} {'p50 us':>8} {'p95 us':>8} {'mean us':>8}")
+        for name, auth in [("database", JWTAuthentication()), ("claims", ClaimsJWTAuthentication())]:
+            timings = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options["requests"]):
+                    start = time.perf_counter()
+                    auth.authenticate(request)
+                    timings.append((time.perf_counter() - start) * 1_000_000)
+
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f"{name:<10} {len(queries) / len(timings):>8.2f} {statistics.median(timings):>8.1f} "
+                f"{p95:>8.1f} {statistics.fmean(timings):>8.1f}"
+            )
@@ -0,0 +1,51 @@
+import timeit
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from admin_panel import policy
+from admin_panel.models import User
+from receptionist.models import Patient
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark permission evaluation: policy lookups, the Policy "
+        "permission class and queryset scoping. Touches no data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        doctor = User(id=1, role="DOCTOR")
+        receptionist = User(id=2, role="RECEPTIONIST")
+        check = policy.Policy()
+
+        def request(user, method):
+            return SimpleNamespace(user=user, method=method)
+
+        def view(resource, action=None):
+            return SimpleNamespace(policy_resource=resource, action=action)
+
+        cases = [
+            ("allowed() hit", lambda: policy.allowed("DOCTOR", "consultations", "read")),
+            ("allowed() miss", lambda: policy.allowed("PHARMACIST", "consultations", "write")),
+            ("Policy: GET APIView", lambda r=request(doctor, "GET"), v=view("doctor_patients"):
+                check.has_permission(r, v)),
+            ("Policy: POST viewset", lambda r=request(receptionist, "POST"), v=view("patients", "create"):
+                check.has_permission(r, v)),
+            ("Policy: per-action", lambda r=request(doctor, "PATCH"), v=view("doctor_appointments", "partial_update"):
+                check.has_permission(r, v)),
+            ("Policy: denied", lambda r=request(doctor, "DELETE"), v=view("bills", "destroy"):
+                check.has_permission(r, v)),
+            ("scope() doctor", lambda: policy.scope(doctor, "doctor_patients", Patient.objects, id=1)),
+            ("scope() unscoped", lambda: policy.scope(receptionist, "patients", Patient.objects, id=1)),
+        ]
+
+        self.stdout.write(f"{'case':<24} {'ns/op':>10}")
+        for name, func in cases:
+            number = options["number"] if not name.startswith("scope") else options["number"] // 20
+            best = min(timeit.repeat(func, number=number, repeat=options["repeat"]))
+            self.stdout.write(f"{name:<24} {best / number * 1e9:>10.0f}")
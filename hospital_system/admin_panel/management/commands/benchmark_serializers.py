@@ -0,0 +1,101 @@
+import cProfile
+import io
+import pstats
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from hillcrest.synthetic import ClinicGenerator
+from pharmacist.serializers import PharmacySaleSerializer, sale_list_reader
+from pharmacist.views import PharmacySaleViewSet
+from receptionist.serializers import AppointmentSerializer, appointment_list_reader
+from receptionist.views import AppointmentViewSet
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the DRF serializers with the values() fast path "
+        "(hillcrest/fastread.py) on the appointment and pharmacy sale lists, "
+        "and check the rendered JSON is byte-identical. --generate N "
+        "bulk-inserts a clinic with N patients first (about 2N appointments); "
+        "it is rolled back at the end. --profile prints where the time goes "
+        "on the smallest size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--generate", type=int, default=0)
+        parser.add_argument("--profile", action="store_true")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options["generate"]:
+                    start = time.perf_counter()
+                    ClinicGenerator(patients=options["generate"], seed=options["seed"]).run()
+                    self.stdout.write(f"generated in {time.perf_counter() - start:.1f}s")
+                self.measure(options["sizes"], options["repeat"], options["profile"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def endpoints(self):
+        # the viewsets' own list querysets, unfiltered
+        sales = PharmacySaleViewSet(request=SimpleNamespace(query_params={})).get_queryset()
+        return [
+            ("appointments", AppointmentViewSet.queryset, AppointmentSerializer, appointment_list_reader),
+            ("pharmacy sales", sales, PharmacySaleSerializer, sale_list_reader),
+        ]
+
+    def measure(self, sizes, repeat, profile):
+        renderer = JSONRenderer()
+        self.stdout.write(
+            f"{'list':<16} {'rows':>7} {'drf ms':>9} {'fast ms':>9} {'speedup':>8} "
+            f"{'render ms':>10} {'identical':>10}"
+        )
+        for name, queryset, serializer_class, reader in self.endpoints():
+            available = queryset.count()
+            for size in sorted(sizes):
+                rows = min(size, available)
+                drf = lambda: serializer_class(queryset[:rows], many=True).data
+                fast = lambda: reader.build(reader.values(queryset)[:rows])
+                drf_seconds, drf_data = self.best(drf, repeat)
+                fast_seconds, fast_data = self.best(fast, repeat)
+                render_seconds, body = self.best(lambda: renderer.render(fast_data), repeat)
+                identical = renderer.render(drf_data) == body
+                self.stdout.write(
+                    f"{name:<16} {rows:>7} {drf_seconds * 1000:>9.1f} {fast_seconds * 1000:>9.1f} "
+                    f"{drf_seconds / max(fast_seconds, 1e-9):>7.1f}x {render_seconds * 1000:>10.1f} "
+                    f"{'yes' if identical else 'NO':>10}"
+                )
+                if rows < size:
+                    self.stdout.write(f"  only {available} rows; use --generate for more")
+                    break
+            if profile:
+                rows = min(sorted(sizes)[0], available)
+                self.profile(f"{name}: DRF serializers", lambda: serializer_class(queryset[:rows], many=True).data)
+                self.profile(f"{name}: fast path", lambda: reader.build(reader.values(queryset)[:rows]))
+
+    def best(self, func, repeat):
+        timings = []
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    def profile(self, title, func):
+        profiler = cProfile.Profile()
+        profiler.runcall(func)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("tottime").print_stats(12)
+        self.stdout.write(f"\n{title}\n{report.getvalue()}")
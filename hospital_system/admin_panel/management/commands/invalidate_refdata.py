@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hillcrest import refcache
+
+
+class Command(BaseCommand):
+    help = (
+        "Bump reference-data cache versions (all datasets by default). Run "
+        "after loading departments, doctors, lab tests or medicines with raw "
+        "SQL or fixtures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("datasets", nargs="*", metavar="dataset")
+
+    def handle(self, *args, **options):
+        unknown = set(options["datasets"]) - set(refcache.DATASETS)
+        if unknown:
+            raise CommandError(
+                f"Unknown dataset(s): {', '.join(sorted(unknown))}. "
+                f"Choose from: {', '.join(refcache.DATASETS)}"
+            )
+        datasets = options["datasets"] or list(refcache.DATASETS)
+        refcache.invalidate(*datasets)
+        for dataset in datasets:
+            self.stdout.write(f"{dataset:>16}: {refcache.etag(dataset)}")
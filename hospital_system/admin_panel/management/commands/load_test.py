@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hillcrest.loadtest import DayScenario, HttpTransport, InProcessTransport
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a day of reception -> doctor -> lab -> pharmacy traffic and "
+        "report p50/p95/p99 latency per endpoint. In-process runs are rolled "
+        "back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--visits", type=int, default=100)
+        parser.add_argument("--lab-share", type=float, default=0.3)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument(
+            "--base-url",
+            help="Send requests over HTTP to a running server instead of in-process.",
+        )
+        parser.add_argument(
+            "--password", default="hillcrest123",
+            help="Staff password for --base-url logins (see generate_clinic_data).",
+        )
+        parser.add_argument("--keep", action="store_true", help="Commit in-process writes.")
+
+    def handle(self, *args, **options):
+        if options["base_url"]:
+            transport = HttpTransport(options["base_url"], options["password"])
+        else:
+            transport = InProcessTransport()
+        scenario = DayScenario(
+            transport,
+            visits=options["visits"],
+            lab_share=options["lab_share"],
+            seed=options["seed"],
+        )
+
+        if options["base_url"] or options["keep"]:
+            rows = scenario.run()
+        else:
+            try:
+                with transaction.atomic():
+                    rows = scenario.run()
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        self.stdout.write(
+            f"{'endpoint':<64} {'n':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<64} {row['count']:>5} {row['errors']:>4} "
+                f"{row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f} {row['max']:>8.1f}"
+            )
+        self.stdout.write("latencies in ms")
@@ -0,0 +1,56 @@
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel import onboarding
+from admin_panel.hashing import default_workers
+
+REPORT_COLUMNS = ["id", "username", "password", "full_name", "role", "department"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Create staff accounts from an HR export (CSV with a header row, or "
+        "a JSON list) and write the generated credentials as CSV."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file, or - for CSV on stdin.")
+        parser.add_argument("--output", help="Credential report path (default: stdout).")
+        parser.add_argument("--workers", type=int, default=default_workers(),
+                            help="Processes used to hash passwords.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            text = sys.stdin.read() if path == "-" else open(path, encoding="utf-8-sig").read()
+            rows = json.loads(text) if path.endswith(".json") else onboarding.rows_from_csv(text)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        if not isinstance(rows, list) or not rows:
+            raise CommandError("No employees found.")
+
+        employees, errors = onboarding.validate_rows(rows)
+        if errors:
+            for error in errors:
+                self.stderr.write(f"row {error['row'] + 1}: {json.dumps(error['errors'])}")
+            raise CommandError(f"{len(errors)} invalid row(s); nothing was created.")
+
+        start = time.perf_counter()
+        credentials = onboarding.create_batch(employees, workers=options["workers"])
+        elapsed = time.perf_counter() - start
+
+        out = open(options["output"], "w", newline="", encoding="utf-8") if options["output"] else self.stdout
+        try:
+            writer = csv.DictWriter(out, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(credentials)
+        finally:
+            if options["output"]:
+                out.close()
+        self.stderr.write(self.style.SUCCESS(
+            f"Created {len(credentials)} users in {elapsed:.1f}s with {options['workers']} worker(s)"
+        ))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+def fill_search_keys(apps, schema_editor):
+    Patient = apps.get_model("admin_panel", "Patient")
+    batch = []
+    for patient in Patient.objects.only("id", "full_name", "contact_number").iterator(chunk_size=2000):
+        digits = "".join(ch for ch in (patient.contact_number or "") if ch.isdigit())
+        patient.contact_digits = digits[-10:]
+        patient.search_name = " ".join((patient.full_name or "").split()).casefold()
+        batch.append(patient)
+        if len(batch) == 2000:
+            Patient.objects.bulk_update(batch, ["contact_digits", "search_name"])
+            batch = []
+    if batch:
+        Patient.objects.bulk_update(batch, ["contact_digits", "search_name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0005_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='contact_digits',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(fill_search_keys, migrations.RunPython.noop),
+    ]
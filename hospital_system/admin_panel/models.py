@@ -33,3 +33,16 @@ class User(AbstractUser):
 
     def __str__(self):
         return f"{self.username} - {self.role}"
+
+
+class Sequence(models.Model):
+    """
+    Named counter used to hand out human-readable identifiers
+    (PT0001, tokens, usernames) without scanning the owning table.
+    Always advanced through admin_panel.sequences, never saved directly.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.last_value}"
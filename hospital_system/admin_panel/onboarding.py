@@ -0,0 +1,214 @@
+# admin_panel/onboarding.py
+"""
+Creating staff accounts, one at a time or a whole HR import.
+
+Usernames are <prefix><number> (doc001, recp014, ...). The numbers come
+from a per-role Sequence, "username:<ROLE>", reserved in one UPDATE for
+the whole batch. Concurrent imports never get the same number, and
+deleting a user does not hand theirs out again. The counter is seeded
+from the highest number already in use. Numbers already taken by a
+hand-made username are skipped.
+
+Passwords are random, and hashed in a process pool for batches (see
+admin_panel/hashing.py). Users are written with one bulk INSERT.
+create_batch() returns the plain-text credentials once; they are not
+stored anywhere.
+"""
+import csv
+import io
+import re
+import secrets
+
+from django.db import transaction
+from rest_framework import serializers
+
+from hillcrest import refcache
+
+from .hashing import hash_passwords
+from .models import Department, User
+from .sequences import reserve
+
+MAX_BATCH = 1000
+BATCH_SIZE = 500
+
+PREFIXES = {
+    "DOCTOR": "doc",
+    "RECEPTIONIST": "recp",
+    "PHARMACIST": "pharm",
+    "LAB_TECHNICIAN": "lab",
+    "ADMIN": "admin",
+}
+
+# no 0/O, 1/l/I: passwords are read off a printed sheet
+PASSWORD_ALPHABET = "abcdefghijkmnopqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+PASSWORD_LENGTH = 10
+
+CSV_COLUMNS = ["full_name", "role"]
+
+
+def generate_password():
+    return "".join(secrets.choice(PASSWORD_ALPHABET) for _ in range(PASSWORD_LENGTH))
+
+
+def split_name(full_name):
+    first, _, last = full_name.strip().partition(" ")
+    return first, last.strip()
+
+
+def _username(prefix, number):
+    return f"{prefix}{number:03d}"
+
+
+def _highest_number(prefix):
+    pattern = re.compile(rf"^{re.escape(prefix)}(\d+)$")
+    numbers = [
+        int(match.group(1))
+        for match in map(pattern.match, User.objects.filter(username__startswith=prefix)
+                         .values_list("username", flat=True))
+        if match
+    ]
+    return max(numbers, default=0)
+
+
+def reserve_usernames(role, count):
+    """
+    ``count`` unused usernames for ``role``, in increasing order.
+    """
+    prefix = PREFIXES.get(role, "user")
+    name = f"username:{role}"
+    usernames = []
+    while len(usernames) < count:
+        wanted = count - len(usernames)
+        last = reserve(name, wanted, initial=lambda: _highest_number(prefix))
+        candidates = [_username(prefix, n) for n in range(last - wanted + 1, last + 1)]
+        taken = set(User.objects.filter(username__in=candidates).values_list("username", flat=True))
+        usernames += [u for u in candidates if u not in taken]
+    return usernames
+
+
+class EmployeeImportSerializer(serializers.Serializer):
+    """
+    One row of a batch import. ``department`` is an id or a name.
+    """
+    full_name = serializers.CharField(max_length=300)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES)
+    department = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    gender = serializers.CharField(max_length=10, required=False, allow_blank=True)
+    age = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    contact_number = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    email = serializers.EmailField(required=False, allow_blank=True)
+
+    def validate_full_name(self, value):
+        if not value.strip():
+            raise serializers.ValidationError("This field may not be blank.")
+        # stored as first_name + last_name; each has its own limit
+        for part, field in zip(split_name(value), ("first_name", "last_name")):
+            limit = User._meta.get_field(field).max_length
+            if len(part) > limit:
+                raise serializers.ValidationError(
+                    f"The {field.replace('_', ' ')} may have at most {limit} characters."
+                )
+        return value.strip()
+
+
+def rows_from_csv(text):
+    """
+    HR export with a header row: full_name,role[,department,gender,age,
+    contact_number,email]. Empty cells are left out. Raises ValueError
+    when a required column is missing.
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+    return [
+        {key: value.strip() for key, value in row.items() if key and value and value.strip()}
+        for row in reader
+    ]
+
+
+def validate_rows(rows):
+    """
+    (employees, errors): validated rows with ``department`` resolved to a
+    Department (or None), and [{"row", "errors"}] for the rows that
+    failed. Departments are looked up once for the whole batch.
+    """
+    departments = list(Department.objects.all())
+    by_id = {str(d.id): d for d in departments}
+    by_name = {d.name.casefold(): d for d in departments}
+
+    employees, errors = [], []
+    for index, row in enumerate(rows):
+        serializer = EmployeeImportSerializer(data=row if isinstance(row, dict) else {})
+        if not serializer.is_valid():
+            errors.append({"row": index, "errors": serializer.errors})
+            continue
+        data = dict(serializer.validated_data)
+        department = (data.pop("department", None) or "").strip()
+        if department:
+            data["department"] = by_id.get(department) or by_name.get(department.casefold())
+            if data["department"] is None:
+                errors.append({"row": index, "errors": {"department": [f"Unknown department {department!r}."]}})
+                continue
+        employees.append(data)
+    return employees, errors
+
+
+def _insert_users(users):
+    """
+    bulk_create ``users`` and make sure they have primary keys; MySQL
+    does not return ids from a bulk INSERT, so they are read back by
+    username.
+    """
+    User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    if users and users[0].pk is None:
+        ids = dict(
+            User.objects.filter(username__in=[u.username for u in users]).values_list("username", "id")
+        )
+        for user in users:
+            user.pk = ids[user.username]
+
+
+def create_batch(employees, workers=None):
+    """
+    Create a user for each validated row (see validate_rows()). Returns
+    the credential report, in input order:
+
+        [{"id", "username", "password", "full_name", "role", "department"}]
+    """
+    passwords = [generate_password() for _ in employees]
+    # hash before the transaction: reserving usernames locks the role's
+    # counter row until commit, and hashing can take seconds
+    hashes = hash_passwords(passwords, workers)
+
+    with transaction.atomic():
+        usernames = {
+            role: iter(reserve_usernames(role, sum(1 for e in employees if e["role"] == role)))
+            for role in sorted({e["role"] for e in employees})
+        }
+        users = []
+        for employee, password_hash in zip(employees, hashes):
+            employee = dict(employee)
+            first_name, last_name = split_name(employee.pop("full_name"))
+            users.append(User(
+                username=next(usernames[employee["role"]]),
+                first_name=first_name,
+                last_name=last_name,
+                password=password_hash,
+                **employee,
+            ))
+        _insert_users(users)
+        # bulk_create skips the save signals the doctor lists listen to
+        refcache.invalidate_on_commit("doctors")
+
+    return [
+        {
+            "id": user.pk,
+            "username": user.username,
+            "password": password,
+            "full_name": f"{user.first_name} {user.last_name}".strip(),
+            "role": user.role,
+            "department": user.department.name if user.department else "",
+        }
+        for user, password in zip(users, passwords)
+    ]
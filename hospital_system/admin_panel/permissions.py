@@ -1,46 +0,0 @@
-from rest_framework.permissions import BasePermission
-
-
-class IsAdmin(BasePermission):
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == "ADMIN"
-        )
-
-
-class IsReceptionist(BasePermission):
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == "RECEPTIONIST"
-        )
-
-
-class IsDoctor(BasePermission):
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == "DOCTOR"
-        )
-
-
-class IsLabTechnician(BasePermission):
-    def has_permission(self, request, view):
-        return (
-            request.user
-            and request.user.is_authenticated
-            and request.user.role == "LAB_TECHNICIAN"
-        )
-
-class IsPharmacist(BasePermission):
-    """
-    Allows access only to users with role='PHARMACIST'.
-    """
-
-    def has_permission(self, request, view):
-        user = request.user
-        return bool(user and user.is_authenticated and getattr(user, "role", None) == "PHARMACIST")
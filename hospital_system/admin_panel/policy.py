@@ -0,0 +1,131 @@
+# admin_panel/policy.py
+"""
+Who may do what: one role x action matrix for every API view.
+
+Each view names its resource (``policy_resource = "patients"``) and the
+default permission class, Policy, looks the request up in POLICY:
+
+    resource -> action -> roles
+
+The action is the viewset action (list, retrieve, create, claim, ...)
+when the resource lists it, and otherwise "read" for GET/HEAD/OPTIONS
+and "write" for anything else. POLICY is flattened into
+{(resource, action): frozenset(roles)} at import, so a check is one or
+two dict lookups and a set membership test. It never reads the database
+either: the role comes from the token (admin_panel/authentication.py).
+
+A view without a resource, or a resource or action missing from the
+matrix, is denied. A new view cannot be left open by forgetting to add a
+permission class.
+
+Which rows a role may see is a second, separate table, SCOPES:
+
+    resource -> role -> field
+
+scope() filters a queryset to ``field = request.user`` for the roles
+listed there. Views apply it in get_queryset(), so a doctor's lookup of
+someone else's record is a 404 from the database, not a Python check
+after the fact. Roles missing from a resource's entry see every row.
+"""
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+ADMIN = "ADMIN"
+RECEPTIONIST = "RECEPTIONIST"
+DOCTOR = "DOCTOR"
+LAB_TECHNICIAN = "LAB_TECHNICIAN"
+PHARMACIST = "PHARMACIST"
+EVERYONE = (ADMIN, RECEPTIONIST, DOCTOR, LAB_TECHNICIAN, PHARMACIST)
+FRONT_DESK = (ADMIN, RECEPTIONIST)
+
+POLICY = {
+    # own session: /me/, logout, profile, notification stream
+    "session": {"read": EVERYONE, "write": EVERYONE},
+    "doctor_profile": {"read": (DOCTOR,)},
+    "events": {"read": EVERYONE},
+
+    # administration and reports
+    "employees": {"read": (ADMIN,), "write": (ADMIN,)},
+    "departments": {"read": FRONT_DESK, "write": (ADMIN,)},
+    "department_doctors": {"read": FRONT_DESK},
+    "reports": {"read": (ADMIN,)},
+
+    # front desk
+    "patients": {"read": FRONT_DESK, "write": FRONT_DESK},
+    "appointments": {"read": FRONT_DESK, "write": FRONT_DESK},
+    "bills": {"read": FRONT_DESK, "write": FRONT_DESK},
+    "vitals": {"read": FRONT_DESK, "write": FRONT_DESK},
+
+    # doctor
+    "doctor_queue": {"read": (DOCTOR,)},
+    "doctor_appointments": {"read": (DOCTOR,), "update": (DOCTOR,), "partial_update": (DOCTOR,)},
+    "doctor_patients": {"read": (DOCTOR,)},
+    "consultations": {"read": (DOCTOR,), "write": (DOCTOR,)},
+    "doctor_lab_requests": {"read": (DOCTOR,), "write": (DOCTOR,)},
+
+    # laboratory
+    "lab_worklist": {"read": (LAB_TECHNICIAN,), "write": (LAB_TECHNICIAN,)},
+    "lab_billing": {"read": (LAB_TECHNICIAN,)},
+    "lab_results": {"read": (DOCTOR, LAB_TECHNICIAN)},
+    "abnormal_lab_values": {"read": (DOCTOR, LAB_TECHNICIAN, ADMIN)},
+    "lab_catalog": {"read": EVERYONE},
+
+    # pharmacy
+    "medicines": {"read": EVERYONE, "write": (PHARMACIST,)},
+    "pharmacy": {"read": (PHARMACIST,), "write": (PHARMACIST,)},
+}
+
+SCOPES = {
+    "doctor_queue": {DOCTOR: "doctor"},
+    "doctor_appointments": {DOCTOR: "doctor"},
+    "doctor_patients": {DOCTOR: "appointments__doctor"},
+    "consultations": {DOCTOR: "doctor"},
+    "doctor_lab_requests": {DOCTOR: "doctor"},
+    "lab_results": {DOCTOR: "doctor"},
+    "abnormal_lab_values": {DOCTOR: "result__lab_request__doctor"},
+}
+
+_NOBODY = frozenset()
+_ALLOWED = {
+    (resource, action): frozenset(roles)
+    for resource, actions in POLICY.items()
+    for action, roles in actions.items()
+}
+
+
+def allowed(role, resource, action):
+    """
+    True when ``role`` may perform ``action`` ("read", "write" or a
+    viewset action listed for the resource) on ``resource``.
+    """
+    return role in _ALLOWED.get((resource, action), _NOBODY)
+
+
+class Policy(BasePermission):
+    """
+    Default permission class: checks POLICY for the view's
+    ``policy_resource``.
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        resource = getattr(view, "policy_resource", None)
+        roles = _ALLOWED.get((resource, getattr(view, "action", None)))
+        if roles is None:
+            roles = _ALLOWED.get(
+                (resource, "read" if request.method in SAFE_METHODS else "write"), _NOBODY
+            )
+        return getattr(user, "role", None) in roles
+
+
+def scope(user, resource, queryset, **filters):
+    """
+    ``queryset`` filtered by ``filters`` and limited to the rows ``user``
+    may see on ``resource``. Both go into one filter() call, so across a
+    to-many field (doctor_patients) they must hold for the same related
+    row. Such a filter can repeat rows; add distinct() there.
+    """
+    field = SCOPES.get(resource, {}).get(user.role)
+    if field is not None:
+        filters[field] = user
+    return queryset.filter(**filters)
@@ -0,0 +1,69 @@
+# admin_panel/sequences.py
+import threading
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Sequence
+
+
+def reserve(name, count=1, initial=None):
+    """
+    Atomically advance the counter ``name`` by ``count`` and return the
+    last value reserved, i.e. the caller owns ``last - count + 1 .. last``.
+
+    The increment is a single ``UPDATE ... SET last_value = last_value + n``
+    so concurrent workers never see the same value. ``initial`` is called
+    once, when the counter row does not exist yet, to seed it from legacy
+    data.
+    """
+    with transaction.atomic():
+        updated = Sequence.objects.filter(name=name).update(
+            last_value=F("last_value") + count
+        )
+        if not updated:
+            start = initial() if initial else 0
+            try:
+                with transaction.atomic():
+                    Sequence.objects.create(name=name, last_value=start + count)
+                return start + count
+            except IntegrityError:
+                # another worker created the row first
+                Sequence.objects.filter(name=name).update(
+                    last_value=F("last_value") + count
+                )
+
+        return Sequence.objects.values_list("last_value", flat=True).get(name=name)
+
+
+class SequenceBlock:
+    """
+    In-process allocator that reserves ``size`` values at a time, so a
+    busy worker touches the counter row once per block instead of once
+    per id. Values stay unique across processes; unused values of a
+    block are lost when the process exits.
+
+    Blocks are only refilled outside a transaction: a block reserved
+    inside one could be rolled back while its values stay cached here.
+    """
+
+    def __init__(self, name, size, initial=None):
+        self.name = name
+        self.size = size
+        self.initial = initial
+        self._lock = threading.Lock()
+        self._next = 1
+        self._end = 0
+
+    def next(self):
+        with self._lock:
+            if self._next > self._end:
+                if self.size <= 1 or connection.in_atomic_block:
+                    return reserve(self.name, 1, self.initial)
+                last = reserve(self.name, self.size, self.initial)
+                self._next = last - self.size + 1
+                self._end = last
+
+            value = self._next
+            self._next += 1
+            return value
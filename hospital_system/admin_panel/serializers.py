@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 # admin_panel/serializers.py
+from . import onboarding
 from .models import User, Department
 from receptionist.models import Appointment, Bill
 
@@ -53,28 +54,12 @@ class EmployeeCreateSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        full_name = validated_data.pop("full_name").strip()
+        first_name, last_name = onboarding.split_name(validated_data.pop("full_name"))
         role = validated_data["role"]
 
-        # split name into first + last
-        parts = full_name.split(" ", 1)
-        first_name = parts[0]
-        last_name = parts[1] if len(parts) > 1 else ""
-
-        # username/password prefixes
-        prefix_map = {
-            "DOCTOR": "doc",
-            "RECEPTIONIST": "recp",
-            "PHARMACIST": "pharm",
-            "LAB_TECHNICIAN": "lab",
-            "ADMIN": "admin",
-        }
-        prefix = prefix_map.get(role, "user")
-
-        # count existing users of that role to generate next number
-        count_for_role = User.objects.filter(role=role).count() + 1
-        username = f"{prefix}{count_for_role:03d}"   # doc001, recp001, etc.
-        raw_password = f"pass{count_for_role:03d}"   # pass001, ...
+        # doc001, recp001, ... from the role's sequence (see onboarding.py)
+        username = onboarding.reserve_usernames(role, 1)[0]
+        raw_password = onboarding.generate_password()
 
         user = User(
             username=username,
@@ -111,6 +96,7 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
         token["role"] = user.role
+        token["department"] = user.department_id
         return token
 
     def validate(self, attrs):
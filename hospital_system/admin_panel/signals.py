@@ -0,0 +1,29 @@
+# admin_panel/signals.py
+"""
+Revoke a user's access tokens when the claims in them go stale (see
+admin_panel/authentication.py).
+"""
+from django.db.models.signals import post_delete, pre_save
+from django.dispatch import receiver
+
+from .authentication import revoke_user_on_commit
+from .models import User
+
+# fields copied into the token, or that decide whether it may be used
+TOKEN_FIELDS = ["role", "department_id", "password", "is_active"]
+
+
+@receiver(pre_save, sender=User)
+def revoke_stale_tokens(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {"role", "department", "password", "is_active"} & set(update_fields):
+        return
+    before = User.objects.filter(pk=instance.pk).values(*TOKEN_FIELDS).first()
+    if before and any(before[field] != getattr(instance, field) for field in TOKEN_FIELDS):
+        revoke_user_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted(sender, instance, **kwargs):
+    revoke_user_on_commit(instance.pk)
@@ -1,3 +1,475 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import time
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from hillcrest import exports, metrics, refcache, urls
+from hillcrest.synthetic import ClinicGenerator
+from hillcrest.testing import ENDPOINTS, STREAMING, WRITE_ONLY, ClinicDataset, measure_endpoints
+from labtech.models import LabTestRequest
+from receptionist.models import Appointment, Bill, Patient
+from . import policy
+from .authentication import ClaimsJWTAuthentication, check_revocation_cache
+from .models import Department, User
+from .serializers import MyTokenObtainPairSerializer
+
+
+class EndpointQueryBudgetTests(TestCase):
+    """
+    Every GET endpoint must issue the same number of queries whether the
+    clinic has 2 visits or 8; a difference means an N+1 slipped in.
+    """
+
+    def test_query_counts_do_not_grow_with_data(self):
+        dataset = ClinicDataset()
+        dataset.grow(2)
+        small = measure_endpoints(dataset)
+        dataset.grow(6)
+        large = measure_endpoints(dataset)
+
+        for before, after in zip(small, large):
+            with self.subTest(url=before.url, role=before.role):
+                self.assertEqual(before.status, 200)
+                self.assertEqual(after.status, 200)
+                self.assertEqual(
+                    after.queries, before.queries,
+                    f"{before.url}: {before.queries} queries at N=2, {after.queries} at N=8",
+                )
+
+    def test_every_route_is_budgeted(self):
+        covered = [url for _, url in ENDPOINTS] + WRITE_ONLY + STREAMING
+
+        for prefix, _, _ in urls.router.registry:
+            with self.subTest(router=prefix):
+                self.assertTrue(any(u.startswith(f"/api/{prefix}/") for u in covered))
+
+        for pattern in urls.urlpatterns:
+            route = str(pattern.pattern)
+            if isinstance(pattern, URLPattern) and route.startswith("api/"):
+                prefix = "/" + route.split("<", 1)[0]
+                with self.subTest(route=route):
+                    self.assertTrue(any(u.startswith(prefix) for u in covered))
+
+
+class ClinicGeneratorTests(TestCase):
+    def test_generated_rows_link_up_and_counters_continue(self):
+        counts = ClinicGenerator(patients=40, days=5, seed=7, batch_size=25).run()
+
+        self.assertEqual(counts["admin_panel.Patient"], 40)
+        self.assertEqual(Patient.objects.count(), 40)
+        self.assertEqual(Appointment.objects.count(), counts["receptionist.Appointment"])
+        self.assertFalse(Appointment.objects.filter(token_number="").exists())
+
+        # the live allocator continues after the generated patients
+        self.assertEqual(Patient.objects.create(full_name="Walk-in", age=30).patient_id, "PT0041")
+
+
+class ReferenceDataCacheTests(TestCase):
+    url = "/api/receptionist/departments/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.receptionist = User.objects.create(username="rec001", role="RECEPTIONIST")
+        Department.objects.create(name="General")
+
+    def setUp(self):
+        refcache.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.receptionist)
+
+    def get(self, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(self.url, headers=headers)
+        return res, len(ctx.captured_queries)
+
+    def test_repeat_requests_skip_the_database(self):
+        first, queries = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(queries, 1)
+
+        again, queries = self.get()
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(queries, 0)
+
+        not_modified, queries = self.get(**{"If-None-Match": first["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(queries, 0)
+
+    def test_saving_a_department_changes_the_version(self):
+        first, _ = self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(name="Cardiology")
+
+        res, _ = self.get(**{"If-None-Match": first["ETag"]})
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], first["ETag"])
+        self.assertEqual([d["name"] for d in res.json()], ["Cardiology", "General"])
+
+    def test_bump_waits_for_commit(self):
+        first, _ = self.get()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Department.objects.create(name="ENT")
+            self.assertEqual(self.get()[0]["ETag"], first["ETag"])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_unseen_changes_expire_with_the_timeout(self):
+        # a write that never bumps this process's counter, as a change
+        # made through another worker with the per-process default cache
+        first, _ = self.get()
+        Department.objects.filter(name="General").update(name="General Medicine")
+        self.assertEqual(self.get()[0]["ETag"], first["ETag"])
+
+        later = time.time() + settings.CACHES["refdata"]["TIMEOUT"] + 1
+        with patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            res, _ = self.get(**{"If-None-Match": first["ETag"]})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([d["name"] for d in res.json()], ["General Medicine"])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin001", role="ADMIN")
+        cls.general = Department.objects.create(name="General")
+        cls.ent = Department.objects.create(name="ENT")
+        doctor = User.objects.create(username="doc001", role="DOCTOR", first_name="Asha", department=cls.general)
+        patient = Patient.objects.create(full_name="Zoë Mathew", age=30)
+        for department in [cls.general, cls.general, cls.ent]:
+            appointment = Appointment.objects.create(patient=patient, doctor=doctor, department=department)
+            Bill.objects.create(appointment=appointment, consultation_fee=300)
+
+    def export(self, url):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        res = client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        return list(csv.reader(io.StringIO(b"".join(res.streaming_content).decode("utf-8-sig"))))
+
+    def test_bills_in_keyset_chunks(self):
+        Bill.objects.update(created_at=timezone.now())  # ties are broken by id
+        with patch.object(exports, "CHUNK_SIZE", 2):
+            rows = self.export("/api/admin/bills/export/")
+        self.assertEqual(rows[0][:4], ["Bill", "Date", "Patient ID", "Patient"])
+        self.assertEqual(len(rows), 4)
+        self.assertEqual([int(r[0]) for r in rows[1:]], sorted(Bill.objects.values_list("id", flat=True), reverse=True))
+        self.assertEqual(rows[1][3:5], ["Zoë Mathew", "Asha"])
+
+    def test_filters(self):
+        rows = self.export(f"/api/admin/patient-history/export/?department={self.ent.id}")
+        self.assertEqual([r[5] for r in rows[1:]], ["ENT"])
+
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        rows = self.export(f"/api/admin/bills/export/?from={tomorrow}")
+        self.assertEqual(len(rows), 1)
+
+    def test_bad_filters_are_400(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        for url, param in [
+            ("/api/admin/bills/export/?from=2024-02-30", "from"),
+            ("/api/admin/patient-history/export/?to=yesterday", "to"),
+            ("/api/admin/bills/export/?from=2024-03-02&to=2024-03-01", "from"),
+            ("/api/admin/patient-history/export/?department=abc", "department"),
+        ]:
+            res = client.get(url)
+            self.assertEqual(res.status_code, 400, url)
+            self.assertIn(param, res.json())
+
+    def test_formula_cells_are_quoted(self):
+        Patient.objects.update(full_name="=HYPERLINK(\"http://x\")")
+        rows = self.export("/api/admin/patient-history/export/")
+        self.assertEqual(rows[1][3], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(exports.safe_cell(-300), -300)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.general = Department.objects.create(name="General")
+        cls.doctor = User.objects.create(
+            username="doc001", role="DOCTOR", first_name="Asha", department=cls.general
+        )
+
+    def setUp(self):
+        caches["revocations"].clear()
+
+    def client_with(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def token(self, user=None):
+        return MyTokenObtainPairSerializer.get_token(user or self.doctor).access_token
+
+    def test_user_comes_from_claims(self):
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {self.token()}")
+        with self.assertNumQueries(0):
+            user, _ = ClaimsJWTAuthentication().authenticate(request)
+        self.assertEqual((user.pk, user.role, user.department_id), (self.doctor.pk, "DOCTOR", self.general.id))
+        with self.assertRaises(TypeError):
+            user.save()
+
+        # profile views load the row for the fields the token lacks
+        res = self.client_with(self.token()).get("/api/doctor/profile/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["department_name"], "General")
+
+    def test_per_process_revocations_fail_the_check_with_several_workers(self):
+        self.assertEqual(check_revocation_cache(), [])
+        with self.settings(WEB_CONCURRENCY=4):
+            self.assertEqual([e.id for e in check_revocation_cache()], ["admin_panel.E001"])
+            with self.assertRaises(SystemCheckError):
+                call_command("check", stdout=io.StringIO(), stderr=io.StringIO())
+            with tempfile.TemporaryDirectory() as directory:
+                shared = {**settings.CACHES, "revocations": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory,
+                }}
+                with self.settings(CACHES=shared):
+                    self.assertEqual(check_revocation_cache(), [])
+
+    def test_token_without_role_loads_the_row(self):
+        token = self.token()
+        del token["role"]
+        res = self.client_with(token).get("/api/me/")
+        self.assertEqual(res.json()["first_name"], "Asha")
+
+    def test_logout_revokes_the_token(self):
+        client = self.client_with(self.token())
+        self.assertEqual(client.get("/api/me/").status_code, 200)
+        self.assertEqual(client.post("/api/logout/").status_code, 204)
+        self.assertEqual(client.get("/api/me/").status_code, 401)
+
+    def test_role_change_revokes_existing_tokens(self):
+        client = self.client_with(self.token())
+        self.doctor.first_name = "Asha R"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doctor.save()
+        self.assertEqual(client.get("/api/me/").status_code, 200)
+
+        self.doctor.role = "ADMIN"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doctor.save()
+        self.assertEqual(client.get("/api/me/").status_code, 401)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class OnboardingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.general = Department.objects.create(name="General")
+        cls.admin = User.objects.create(username="admin001", role="ADMIN")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_json_continues_after_existing_usernames(self):
+        User.objects.create(username="doc007", role="DOCTOR")
+        User.objects.create(username="doc009", role="DOCTOR")
+        res = self.client.post("/api/admin/employees/bulk/", [
+            {"full_name": "Asha Rao", "role": "DOCTOR", "department": "general"},
+            {"full_name": "Ben", "role": "PHARMACIST"},
+            {"full_name": "Chen Li", "role": "DOCTOR", "department": str(self.general.id)},
+        ], format="json")
+        self.assertEqual(res.status_code, 201)
+        credentials = res.json()["credentials"]
+        self.assertEqual([c["username"] for c in credentials], ["doc010", "pharm001", "doc011"])
+        self.assertEqual(credentials[0]["department"], "General")
+
+        user = User.objects.get(username="doc010")
+        self.assertEqual((user.first_name, user.last_name, user.department), ("Asha", "Rao", self.general))
+        self.assertTrue(check_password(credentials[0]["password"], user.password))
+
+        # a deleted user's number is not handed out again
+        user.delete()
+        res = self.client.post("/api/admin/employees/", {"full_name": "Dev", "role": "DOCTOR"})
+        self.assertEqual(res.json()["generated_username"], "doc012")
+
+    def test_invalid_row_rejects_the_batch(self):
+        res = self.client.post("/api/admin/employees/bulk/", {"employees": [
+            {"full_name": "Asha Rao", "role": "DOCTOR"},
+            {"full_name": "Ben", "role": "SURGEON"},
+            {"full_name": "Chen", "role": "DOCTOR", "department": "Cardiology"},
+        ]}, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([e["row"] for e in res.json()["errors"]], [1, 2])
+        self.assertFalse(User.objects.filter(role="DOCTOR").exists())
+
+    def test_name_halves_fit_the_user_columns(self):
+        res = self.client.post("/api/admin/employees/bulk/", [
+            {"full_name": "A" * 151, "role": "DOCTOR"},
+            {"full_name": "Asha " + "R" * 151, "role": "DOCTOR"},
+            {"full_name": "A" * 150 + " " + "R" * 149, "role": "DOCTOR"},
+        ], format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual([(e["row"], list(e["errors"])) for e in res.json()["errors"]],
+                         [(0, ["full_name"]), (1, ["full_name"])])
+
+    def test_csv_upload_and_command(self):
+        upload = SimpleUploadedFile(
+            "staff.csv", b"\xef\xbb\xbffull_name,role,department\nAsha Rao,LAB_TECHNICIAN,General\n"
+        )
+        res = self.client.post("/api/admin/employees/bulk/", {"file": upload}, format="multipart")
+        self.assertEqual([c["username"] for c in res.json()["credentials"]], ["lab001"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "staff.csv")
+            with open(path, "w") as f:
+                f.write("full_name,role\nBen,LAB_TECHNICIAN\n")
+            out = io.StringIO()
+            call_command("onboard_employees", path, stdout=out, stderr=io.StringIO())
+        report = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual([(r["username"], r["full_name"]) for r in report], [("lab002", "Ben")])
+
+
+class PolicyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.general = Department.objects.create(name="General")
+        cls.users = {
+            role: User.objects.create(username=role.lower(), role=role, department=cls.general)
+            for role in policy.EVERYONE
+        }
+        cls.other_doctor = User.objects.create(username="doc002", role="DOCTOR", department=cls.general)
+        cls.patient = Patient.objects.create(full_name="A", age=30)
+
+    def client_for(self, role, user=None):
+        client = APIClient()
+        client.force_authenticate(user or self.users[role])
+        return client
+
+    def test_every_api_view_names_a_known_resource(self):
+        views = [viewset for _, viewset, _ in urls.router.registry]
+        views += [
+            getattr(pattern.callback, "cls", None) for pattern in urls.urlpatterns
+            if isinstance(pattern, URLPattern) and str(pattern.pattern).startswith("api/")
+        ]
+        for view in filter(None, views):
+            if view.permission_classes != [policy.Policy]:
+                continue  # login: explicitly public
+            with self.subTest(view=view.__name__):
+                self.assertIn(getattr(view, "policy_resource", None), policy.POLICY)
+
+    def test_matrix(self):
+        cases = [
+            ("RECEPTIONIST", "get", "/api/admin/departments/", 200),
+            ("RECEPTIONIST", "post", "/api/admin/departments/", 403),
+            ("ADMIN", "get", "/api/receptionist/patients/", 200),
+            ("DOCTOR", "get", "/api/receptionist/patients/", 403),
+            ("DOCTOR", "get", "/api/pharmacy/medicines/", 200),
+            ("DOCTOR", "post", "/api/pharmacy/medicines/", 403),
+            ("PHARMACIST", "get", "/api/admin/dashboard/", 403),
+            ("LAB_TECHNICIAN", "get", "/api/lab/parameters/", 200),
+        ]
+        for role, method, url, expected in cases:
+            with self.subTest(role=role, method=method, url=url):
+                res = getattr(self.client_for(role), method)(url, {}, format="json")
+                self.assertEqual(res.status_code, expected)
+        self.assertEqual(APIClient().get("/api/lab/parameters/").status_code, 401)
+
+    def test_doctors_only_reach_their_own_records(self):
+        doctor = self.users["DOCTOR"]
+        theirs = Appointment.objects.create(patient=self.patient, doctor=self.other_doctor, department=self.general)
+        lab_request = LabTestRequest.objects.create(
+            appointment=theirs, doctor=self.other_doctor, patient=self.patient,
+            test_type="CBC", status="COMPLETED",
+        )
+        client = self.client_for("DOCTOR")
+
+        self.assertFalse(policy.scope(doctor, "lab_results", LabTestRequest.objects).exists())
+        self.assertTrue(policy.scope(self.users["LAB_TECHNICIAN"], "lab_results", LabTestRequest.objects).exists())
+        self.assertEqual(client.get(f"/api/doctor/patients/{self.patient.id}/history/").status_code, 404)
+        res = client.post(
+            f"/api/doctor/lab-requests/?appointment_id={theirs.id}", {"test_type": "CBC"}, format="json"
+        )
+        self.assertEqual(res.status_code, 404)
+
+        self.assertEqual(
+            self.client_for("DOCTOR", self.other_doctor).get(f"/api/doctor/lab-results/{lab_request.id}/").status_code,
+            200,
+        )
+        Appointment.objects.create(patient=self.patient, doctor=doctor, department=self.general)
+        self.assertEqual(client.get(f"/api/doctor/patients/{self.patient.id}/history/").status_code, 200)
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin001", role="ADMIN")
+        Patient.objects.create(full_name="A", age=30)
+
+    def setUp(self):
+        metrics.store.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_series_per_view_and_action(self):
+        self.client.get("/api/receptionist/patients/")
+        self.client.get("/api/receptionist/patients/")
+        with self.settings(METRICS_ALLOWED_IPS=["127.0.0.1"]):
+            text = self.client.get("/metrics").content.decode()
+
+        labels = 'view="PatientViewSet",action="list",method="GET",status="200"'
+        self.assertIn(f"hillcrest_http_request_duration_seconds_count{{{labels}}} 2", text)
+        self.assertIn(f'hillcrest_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        totals = metrics.store.collect()
+        series = totals[("PatientViewSet", "list", "GET", "200")]
+        self.assertGreaterEqual(series["queries"], 2)
+        self.assertGreater(series["serializer_seconds"], 0)
+        self.assertGreater(series["response_bytes"], 0)
+
+    def test_scraping_is_closed_by_default(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with self.settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+        with self.settings(METRICS_ALLOWED_IPS=["10.0.0.5"]):
+            self.assertEqual(self.client.get("/metrics").status_code, 403)
+            self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.5").status_code, 200)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    async def test_async_requests_are_recorded(self):
+        token = MyTokenObtainPairSerializer.get_token(self.admin).access_token
+        await self.async_client.get("/api/receptionist/patients/", headers={"Authorization": f"Bearer {token}"})
+        series = metrics.store.collect()[("PatientViewSet", "list", "GET", "200")]
+        self.assertEqual(series["count"], 1)
+        self.assertGreaterEqual(series["queries"], 1)  # the user comes from the token's claims
+        self.assertGreater(series["serializer_seconds"], 0)
+
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.settings(SLOW_REQUEST_SECONDS=0), self.assertLogs("hillcrest.slow_requests") as logs:
+            self.client.get("/api/receptionist/patients/")
+        self.assertIn("GET /api/receptionist/patients/ -> 200", logs.output[0])
+        self.assertIn(Patient._meta.db_table, logs.output[0])
+
+    def test_workers_are_summed_from_their_files(self):
+        labels = ("DepartmentViewSet", "list", "GET", "200")
+        with tempfile.TemporaryDirectory() as directory:
+            first, second = metrics.Store(directory), metrics.Store(directory, flush_seconds=3600)
+            first.record(labels, 0.02, 3, 0.01, 0.005, 100)
+            second.record(labels, 0.3, 1, 0.1, 0.05, 50)
+            second.record(labels, 0.3, 1, 0.1, 0.05, 50)  # not flushed yet: only in memory
+
+            self.assertEqual(first.collect()[labels]["count"], 2)
+            series = second.collect()[labels]
+            self.assertEqual((series["count"], series["queries"], series["response_bytes"]), (3, 5, 200))
+            self.assertEqual(series["buckets"][metrics.BUCKETS.index(0.025)], 1)
@@ -1,10 +1,13 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.generics import ListAPIView
 
-from admin_panel.permissions import IsAdmin, IsDoctor, IsReceptionist
+from hillcrest import exports
+from hillcrest.params import id_param
+from hillcrest.refcache import ReferenceDataMixin
 from receptionist.models import Appointment, Patient
 from receptionist.serializers import (
     AppointmentSerializer,
@@ -12,6 +15,8 @@ from receptionist.serializers import (
     DoctorSerializer,
 )
 
+from . import onboarding, policy
+from .authentication import full_user, revoke_token
 from .models import User, Department
 from .serializers import (
     EmployeeCreateSerializer,
@@ -25,7 +30,6 @@ from receptionist.serializers import BillSerializer
 
 # admin_panel/views.py
 from rest_framework import generics
-from admin_panel.permissions import IsAdmin
 from receptionist.models import Appointment, Bill
 from .serializers import (
     AdminPatientHistorySerializer,
@@ -40,39 +44,91 @@ class MyTokenObtainPairView(TokenObtainPairView):
 
 # Who Am I?
 class CurrentUserView(APIView):
-    permission_classes = [permissions.IsAuthenticated]
+    policy_resource = "session"
 
     def get(self, request):
-        serializer = UserBasicSerializer(request.user)
+        serializer = UserBasicSerializer(full_user(request.user))
         return Response(serializer.data)
 
 
+# Logout: the access token stops working at once instead of at expiry
+class LogoutView(APIView):
+    policy_resource = "session"
+
+    def post(self, request):
+        if request.auth is not None:
+            revoke_token(request.auth)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 # ADMIN: Manage Employees
 class EmployeeViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.exclude(role="ADMIN").order_by("id")
-    permission_classes = [IsAdmin]
+    queryset = User.objects.exclude(role="ADMIN").select_related("department").order_by("id")
+    policy_resource = "employees"
 
     def get_serializer_class(self):
         if self.action == "create":
             return EmployeeCreateSerializer
         return EmployeeListSerializer
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        POST /api/admin/employees/bulk/
+
+        Body: a JSON list of {"full_name", "role", "department", ...} (or
+        {"employees": [...]}), or a CSV upload in the "file" field (see
+        onboarding.rows_from_csv). ``department`` is an id or a name.
+
+        All or nothing: any invalid row rejects the batch with 400 and
+        per-row errors. Otherwise 201 with the generated credentials,
+        which are shown only this once.
+        """
+        upload = request.FILES.get("file")
+        if upload is not None:
+            try:
+                rows = onboarding.rows_from_csv(upload.read().decode("utf-8-sig"))
+            except (UnicodeDecodeError, ValueError) as exc:
+                return Response({"detail": str(exc)}, status=400)
+        else:
+            rows = request.data
+            if isinstance(rows, dict):
+                rows = rows.get("employees")
+            if not isinstance(rows, list):
+                return Response({"detail": "Send a list of employees or a CSV file."}, status=400)
+
+        if not rows:
+            return Response({"detail": "No employees submitted."}, status=400)
+        if len(rows) > onboarding.MAX_BATCH:
+            return Response({"detail": f"At most {onboarding.MAX_BATCH} employees per batch."}, status=400)
+
+        employees, errors = onboarding.validate_rows(rows)
+        if errors:
+            return Response({"errors": errors}, status=400)
+
+        credentials = onboarding.create_batch(employees)
+        return Response(
+            {"created": len(credentials), "credentials": credentials},
+            status=status.HTTP_201_CREATED,
+        )
+
 
 # ADMIN + RECEPTIONIST: Manage departments
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ReferenceDataMixin, viewsets.ModelViewSet):
+    reference_dataset = "departments"
     queryset = Department.objects.all().order_by("name")
     serializer_class = DepartmentSerializer
-    permission_classes = [IsAdmin | IsReceptionist]
+    policy_resource = "departments"
 
 
 # DOCTOR: Manage own appointments only
 class DoctorAppointmentViewSet(viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
-    permission_classes = [IsDoctor]
+    policy_resource = "doctor_appointments"
 
     def get_queryset(self):
-        return Appointment.objects.filter(
-            doctor=self.request.user
+        return policy.scope(
+            self.request.user, self.policy_resource, Appointment.objects
         ).order_by("-created_at")
 
     def get_serializer(self, *args, **kwargs):
@@ -87,17 +143,15 @@ class DoctorAppointmentViewSet(viewsets.ModelViewSet):
 # DOCTOR: View assigned patients only
 class DoctorPatientsViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = PatientSerializer
-    permission_classes = [IsDoctor]
+    policy_resource = "doctor_patients"
 
     def get_queryset(self):
-        return Patient.objects.filter(
-            appointments__doctor=self.request.user
-        ).distinct()
+        return policy.scope(self.request.user, self.policy_resource, Patient.objects).distinct()
 
 
 # Receptionist/Admin: View doctors by department
 class DoctorsByDepartmentView(APIView):
-    permission_classes = [IsReceptionist | IsAdmin]
+    policy_resource = "department_doctors"
 
     def get(self, request, department_id):
         doctors = User.objects.filter(role="DOCTOR", department_id=department_id)
@@ -113,7 +167,7 @@ from .serializers import (
 )
 
 class AdminPatientHistoryView(ListAPIView):
-    permission_classes = [IsAdmin]
+    policy_resource = "reports"
     serializer_class = AdminPatientHistorySerializer
 
     def get_queryset(self):
@@ -124,8 +178,41 @@ class AdminPatientHistoryView(ListAPIView):
             .order_by("-created_at")
         )
 
+class AdminPatientHistoryExportView(APIView):
+    """
+    GET /api/admin/patient-history/export/?from=&to=&department=&status=
+    Streams the visit history as CSV (see hillcrest/exports.py).
+    """
+    policy_resource = "reports"
+
+    def get(self, request):
+        params = request.query_params
+        visits = Appointment.objects.filter(exports.date_filter(params))
+        department = id_param(params, "department")
+        if department is not None:
+            visits = visits.filter(department_id=department)
+        if params.get("status"):
+            visits = visits.filter(status__iexact=params["status"])
+
+        rows = (
+            (pk, exports.local_time(created_at), patient_id, patient_name,
+             f"{first or ''} {last or ''}".strip(), department, token, visit_status)
+            for pk, created_at, patient_id, patient_name, first, last, department, token, visit_status
+            in exports.keyset_rows(visits, [
+                "id", "created_at", "patient__patient_id", "patient__full_name",
+                "doctor__first_name", "doctor__last_name", "department__name",
+                "token_number", "status",
+            ])
+        )
+        return exports.stream_csv(
+            "patient-history.csv",
+            ["Visit", "Date", "Patient ID", "Patient", "Doctor", "Department", "Token", "Status"],
+            rows,
+        )
+
+
 class AdminBillListView(ListAPIView):
-    permission_classes = [IsAdmin]
+    policy_resource = "reports"
     serializer_class = AdminBillSerializer
 
     def get_queryset(self):
@@ -138,4 +225,36 @@ class AdminBillListView(ListAPIView):
                 "appointment__department",
             )
             .order_by("-created_at")
-        )
\ No newline at end of file
+        )
+
+
+class AdminBillExportView(APIView):
+    """
+    GET /api/admin/bills/export/?from=&to=&department=
+    Streams consultation bills as CSV (see hillcrest/exports.py).
+    """
+    policy_resource = "reports"
+
+    def get(self, request):
+        params = request.query_params
+        bills = Bill.objects.filter(exports.date_filter(params))
+        department = id_param(params, "department")
+        if department is not None:
+            bills = bills.filter(appointment__department_id=department)
+
+        rows = (
+            (pk, exports.local_time(created_at), patient_id, patient_name,
+             f"{first or ''} {last or ''}".strip(), department, token, fee)
+            for pk, created_at, patient_id, patient_name, first, last, department, token, fee
+            in exports.keyset_rows(bills, [
+                "id", "created_at", "appointment__patient__patient_id",
+                "appointment__patient__full_name", "appointment__doctor__first_name",
+                "appointment__doctor__last_name", "appointment__department__name",
+                "appointment__token_number", "consultation_fee",
+            ])
+        )
+        return exports.stream_csv(
+            "bills.csv",
+            ["Bill", "Date", "Patient ID", "Patient", "Doctor", "Department", "Token", "Consultation Fee"],
+            rows,
+        )
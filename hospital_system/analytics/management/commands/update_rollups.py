@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analytics import rollups
+from analytics.models import DailyStat, RollupWatermark
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold rows added since the last run into the daily dashboard "
+        "rollups. Run it every few minutes (cron); --rebuild starts over "
+        "from an empty table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true")
+        parser.add_argument("--chunk-size", type=int, default=rollups.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            with transaction.atomic():
+                DailyStat.objects.all().delete()
+                RollupWatermark.objects.all().delete()
+
+        processed = rollups.update(chunk_size=options["chunk_size"])
+        for stream, count in processed.items():
+            self.stdout.write(f"{stream}: {count} new rows")
+        self.stdout.write(self.style.SUCCESS(f"Rollups complete until {rollups.as_of():%Y-%m-%d %H:%M:%S}"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:17
+
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Fold rows that share a key into the oldest one before the unique
+    index goes on.
+    """
+    DailyStat = apps.get_model("analytics", "DailyStat")
+    kept = {}
+    for stat in DailyStat.objects.order_by("id"):
+        key = (stat.date, stat.department_id, stat.doctor_id, stat.metric)
+        first = kept.setdefault(key, stat)
+        if first is not stat:
+            first.value += stat.value
+            first.save(update_fields=["value"])
+            stat.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0006_patient_search_keys'),
+        ('analytics', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailystat',
+            constraint=models.UniqueConstraint(models.F('date'), django.db.models.functions.comparison.Coalesce('department', models.Value(0)), django.db.models.functions.comparison.Coalesce('doctor', models.Value(0)), models.F('metric'), name='dailystat_unique_key'),
+        ),
+    ]
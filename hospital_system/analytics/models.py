@@ -0,0 +1,68 @@
+# analytics/models.py
+from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from admin_panel.models import Department, User
+
+
+class DailyStat(models.Model):
+    """
+    One pre-aggregated number: ``metric`` for one doctor (or none, e.g. a
+    walk-in pharmacy sale) in one department on one local day. Department
+    totals are the sum over its doctors, which stays small however long
+    the history gets.
+
+    Metrics: appointments, consultations, lab_tests:<TEST_TYPE>,
+    revenue:<SOURCE>, medicines_dispensed. Maintained by
+    analytics/rollups.py; like the ledger, the dimension keys carry no
+    database constraint. There is one row per (date, department, doctor,
+    metric); the unique index coalesces the nullable keys to 0 so rows
+    without a doctor or department are covered too.
+    """
+    date = models.DateField()
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    doctor = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+"
+    )
+    metric = models.CharField(max_length=60)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "metric"], name="dailystat_date_metric_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                F("date"), Coalesce("department", Value(0)), Coalesce("doctor", Value(0)), F("metric"),
+                name="dailystat_unique_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.metric}={self.value}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Highest source row id already folded into DailyStat, per stream, and
+    the cutoff time of the last run that caught the stream up.
+    """
+    stream = models.CharField(max_length=30, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    complete_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.stream} @ {self.last_id}"
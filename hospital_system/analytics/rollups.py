@@ -0,0 +1,190 @@
+# analytics/rollups.py
+"""
+Daily rollups for the admin dashboard.
+
+Each stream reads one insert-only table in id order, starting after its
+watermark:
+
+    appointments    Appointment         -> appointments
+    consultations   Consultation        -> consultations
+    lab_results     LabTestResult       -> lab_tests:<TEST_TYPE>
+    ledger          LedgerEntry         -> revenue:<SOURCE>, medicines_dispensed
+
+The stream turns each chunk into per-(day, department, doctor, metric)
+increments. It adds them to DailyStat and moves the watermark in the
+same transaction, so a row is counted exactly once however often
+update() runs. Only new rows are read, so a run costs the same whether
+the history is a day or ten years.
+
+Rows younger than settings.ROLLUP_LAG_SECONDS are left for the next
+run. Auto-increment ids are handed out at INSERT but become visible at
+COMMIT, so a slow transaction can commit a lower id after a higher one
+has been read. The lag gives such transactions time to land.
+
+Revenue comes from the ledger, so edits and deletions of bills show up
+as their ADJUSTMENT/REVERSAL entries. Medicines are counted when a sale's
+CHARGE is posted, i.e. when it is dispensed, and taken off again on its
+REVERSAL (the sale left DISPENSED). A sale deleted outright has no
+items left to read by then, so its units stay counted.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from doctor.models import Consultation
+from labtech.models import LabTestResult
+from ledger.models import LedgerEntry
+from pharmacist.models import PharmacySaleItem
+from receptionist.models import Appointment
+from .models import DailyStat, RollupWatermark
+
+CHUNK_SIZE = 5000
+
+
+def _visits(rows):
+    for created_at, department_id, doctor_id in rows:
+        yield timezone.localdate(created_at), department_id, doctor_id, "appointments", 1
+
+
+def _consultations(rows):
+    for created_at, department_id, doctor_id in rows:
+        yield timezone.localdate(created_at), department_id, doctor_id, "consultations", 1
+
+
+def _lab_results(rows):
+    for created_at, department_id, doctor_id, test_type in rows:
+        yield timezone.localdate(created_at), department_id, doctor_id, f"lab_tests:{test_type}", 1
+
+
+# sign of the medicines_dispensed change for a PHARMACY entry
+_DISPENSED = {"CHARGE": 1, "REVERSAL": -1}
+
+
+def _ledger(rows):
+    sales = [
+        reference_id for _, _, _, source, kind, reference_id, _ in rows
+        if source == "PHARMACY" and kind in _DISPENSED
+    ]
+    quantities = dict(
+        PharmacySaleItem.objects.filter(sale_id__in=sales)
+        .values("sale_id").annotate(total=Sum("quantity")).values_list("sale_id", "total")
+    )
+    for date, department_id, doctor_id, source, kind, reference_id, amount in rows:
+        yield date, department_id, doctor_id, f"revenue:{source}", amount
+        if source == "PHARMACY" and kind in _DISPENSED:
+            yield (date, department_id, doctor_id, "medicines_dispensed",
+                   _DISPENSED[kind] * quantities.get(reference_id, 0))
+
+
+# stream -> (queryset, columns after id and created_at, increments)
+STREAMS = {
+    "appointments": (
+        lambda: Appointment.objects.all(),
+        ["created_at", "department_id", "doctor_id"],
+        _visits,
+    ),
+    "consultations": (
+        lambda: Consultation.objects.all(),
+        ["created_at", "appointment__department_id", "doctor_id"],
+        _consultations,
+    ),
+    "lab_results": (
+        lambda: LabTestResult.objects.all(),
+        ["created_at", "lab_request__appointment__department_id", "lab_request__doctor_id", "lab_request__test_type"],
+        _lab_results,
+    ),
+    "ledger": (
+        lambda: LedgerEntry.objects.all(),
+        ["date", "department_id", "doctor_id", "source", "kind", "reference_id", "amount"],
+        _ledger,
+    ),
+}
+
+
+def add(increments):
+    """
+    Add {(date, department_id, doctor_id, metric): value} to DailyStat.
+    """
+    if not increments:
+        return
+    existing = {
+        (s.date, s.department_id, s.doctor_id, s.metric): s
+        for s in DailyStat.objects.filter(
+            date__in={key[0] for key in increments},
+            metric__in={key[3] for key in increments},
+        )
+    }
+    changed, created = [], []
+    for (date, department_id, doctor_id, metric), value in increments.items():
+        stat = existing.get((date, department_id, doctor_id, metric))
+        if stat is None:
+            created.append(DailyStat(
+                date=date, department_id=department_id, doctor_id=doctor_id, metric=metric, value=value
+            ))
+        else:
+            stat.value += value
+            changed.append(stat)
+    DailyStat.objects.bulk_update(changed, ["value"], batch_size=1000)
+    DailyStat.objects.bulk_create(created, batch_size=1000)
+
+
+def step(stream, cutoff, chunk_size=CHUNK_SIZE):
+    """
+    Fold the next chunk of ``stream`` into DailyStat. Returns the number
+    of source rows processed (0 once caught up).
+    """
+    queryset, columns, increments_for = STREAMS[stream]
+    with transaction.atomic():
+        # the row lock also keeps two runs from folding the same chunk
+        RollupWatermark.objects.get_or_create(stream=stream)
+        watermark = RollupWatermark.objects.select_for_update().get(stream=stream)
+        rows = list(
+            queryset().filter(id__gt=watermark.last_id).order_by("id")
+            .values_list("id", "created_at", *columns)[:chunk_size]
+        )
+        # stop at the first row that is too young, keeping id order
+        for position, row in enumerate(rows):
+            if row[1] >= cutoff:
+                rows = rows[:position]
+                break
+        if not rows:
+            return 0
+
+        increments = defaultdict(int)
+        for date, department_id, doctor_id, metric, value in increments_for([row[2:] for row in rows]):
+            increments[(date, department_id, doctor_id, metric)] += value
+        add(increments)
+
+        watermark.last_id = rows[-1][0]
+        watermark.save(update_fields=["last_id"])
+        return len(rows)
+
+
+def update(chunk_size=CHUNK_SIZE, now=None):
+    """
+    Bring every stream up to date. Returns {stream: rows processed}.
+    """
+    cutoff = (now or timezone.now()) - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    processed = {}
+    for stream in STREAMS:
+        total = 0
+        while count := step(stream, cutoff, chunk_size):
+            total += count
+        RollupWatermark.objects.filter(stream=stream).update(complete_until=cutoff)
+        processed[stream] = total
+    return processed
+
+
+def as_of():
+    """
+    Everything before this moment is in the rollups; None before the
+    first complete run.
+    """
+    marks = list(RollupWatermark.objects.values_list("complete_until", flat=True))
+    if len(marks) < len(STREAMS) or None in marks:
+        return None
+    return min(marks)
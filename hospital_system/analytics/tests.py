@@ -0,0 +1,147 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_panel.models import Department, User
+from doctor.models import Consultation
+from labtech.models import LabTestRequest, LabTestResult
+from pharmacist.models import Medicine, PharmacySale, PharmacySaleItem
+from receptionist.models import Appointment, Bill, Patient
+from . import rollups
+from .models import DailyStat
+
+
+class DailyStatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.general = Department.objects.create(name="General")
+        cls.ent = Department.objects.create(name="ENT")
+        cls.doctor = User.objects.create(username="doc001", role="DOCTOR", department=cls.general)
+        cls.ent_doctor = User.objects.create(username="doc002", role="DOCTOR", department=cls.ent)
+        cls.admin = User.objects.create(username="admin001", role="ADMIN")
+        cls.patient = Patient.objects.create(full_name="A", age=30)
+
+    def later(self):
+        return timezone.now() + timedelta(minutes=5)
+
+    def visit(self, doctor=None, department=None, fee=None):
+        appointment = Appointment.objects.create(
+            patient=self.patient, doctor=doctor or self.doctor, department=department or self.general
+        )
+        if fee is not None:
+            Bill.objects.create(appointment=appointment, consultation_fee=fee)
+        return appointment
+
+    def stats(self, metric):
+        return dict(
+            DailyStat.objects.filter(metric=metric)
+            .values_list("department_id", "value")
+        )
+
+    def test_update_counts_each_row_once(self):
+        first = self.visit(fee=300)
+        self.visit(doctor=self.ent_doctor, department=self.ent, fee=200)
+        Consultation.objects.create(appointment=first, doctor=self.doctor, patient=self.patient)
+        lab_request = LabTestRequest.objects.create(
+            appointment=first, doctor=self.doctor, patient=self.patient, test_type="CBC", status="COMPLETED"
+        )
+        LabTestResult.objects.create(lab_request=lab_request, result_details="[]")
+        medicine = Medicine.objects.create(name="Paracetamol", unit_price=Decimal("2.50"), stock_quantity=10)
+        sale = PharmacySale.objects.create(patient=self.patient, status="PENDING", total_amount=Decimal("7.50"))
+        PharmacySaleItem.objects.create(
+            sale=sale, medicine=medicine, medicine_name="Paracetamol", quantity=3,
+            unit_price=Decimal("2.50"), subtotal=Decimal("7.50"),
+        )
+        sale.status = "DISPENSED"
+        sale.save()
+
+        rollups.update(now=self.later())
+        rollups.update(now=self.later())
+        self.assertEqual(self.stats("appointments"), {self.general.id: 1, self.ent.id: 1})
+        self.assertEqual(self.stats("consultations"), {self.general.id: 1})
+        self.assertEqual(self.stats("lab_tests:CBC"), {self.general.id: 1})
+        self.assertEqual(self.stats("revenue:CONSULTATION"), {self.general.id: 300, self.ent.id: 200})
+        self.assertEqual(self.stats("revenue:PHARMACY"), {None: Decimal("7.50")})
+        self.assertEqual(self.stats("medicines_dispensed"), {None: 3})
+
+        # new rows and bill edits are folded in on the next run
+        self.visit(fee=100)
+        bill = Bill.objects.get(appointment=first)
+        bill.consultation_fee = 250
+        bill.save()
+        rollups.update(now=self.later())
+        self.assertEqual(self.stats("appointments"), {self.general.id: 2, self.ent.id: 1})
+        self.assertEqual(self.stats("revenue:CONSULTATION"), {self.general.id: 350, self.ent.id: 200})
+
+    def test_reversed_sale_takes_its_medicines_back(self):
+        medicine = Medicine.objects.create(name="Paracetamol", unit_price=Decimal("2.50"), stock_quantity=10)
+        sale = PharmacySale.objects.create(patient=self.patient, status="DISPENSED", total_amount=Decimal("10.00"))
+        PharmacySaleItem.objects.create(
+            sale=sale, medicine=medicine, medicine_name="Paracetamol", quantity=4,
+            unit_price=Decimal("2.50"), subtotal=Decimal("10.00"),
+        )
+        rollups.update(now=self.later())
+        self.assertEqual(self.stats("medicines_dispensed"), {None: 4})
+
+        sale.status = "PENDING"
+        sale.save()
+        rollups.update(now=self.later())
+        self.assertEqual(self.stats("revenue:PHARMACY"), {None: 0})
+        self.assertEqual(self.stats("medicines_dispensed"), {None: 0})
+
+    def test_one_row_per_key(self):
+        key = dict(date=timezone.localdate(), department=None, doctor=None, metric="appointments")
+        DailyStat.objects.create(**key, value=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            DailyStat.objects.create(**key, value=1)
+
+    def test_young_rows_wait_for_the_lag(self):
+        self.visit()
+        rollups.update(now=timezone.now())
+        self.assertEqual(self.stats("appointments"), {})
+        self.assertIsNotNone(rollups.as_of())
+
+        rollups.update(now=self.later())
+        self.assertEqual(self.stats("appointments"), {self.general.id: 1})
+
+    def test_small_chunks_and_rebuild_match(self):
+        for _ in range(5):
+            self.visit(fee=100)
+        rollups.update(chunk_size=2, now=self.later())
+        chunked = self.stats("revenue:CONSULTATION")
+
+        with self.settings(ROLLUP_LAG_SECONDS=-300):
+            call_command("update_rollups", "--rebuild", stdout=StringIO())
+        self.assertEqual(chunked, {self.general.id: 500})
+        self.assertEqual(self.stats("revenue:CONSULTATION"), chunked)
+
+    def test_dashboard(self):
+        self.visit(fee=300)
+        self.visit(doctor=self.ent_doctor, department=self.ent, fee=200)
+        rollups.update(now=self.later())
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        data = client.get("/api/admin/dashboard/").json()
+        self.assertEqual(data["totals"]["appointments"], 2)
+        self.assertEqual(Decimal(str(data["totals"]["revenue:CONSULTATION"])), Decimal("500"))
+        self.assertEqual([row["date"] for row in data["daily"]], [str(timezone.localdate())])
+        self.assertEqual(
+            [(row["department_name"], row["appointments"]) for row in data["departments"]],
+            [("ENT", 1), ("General", 1)],
+        )
+        self.assertEqual({row["doctor_id"] for row in data["doctors"]}, {self.doctor.id, self.ent_doctor.id})
+
+        data = client.get(f"/api/admin/dashboard/?department={self.ent.id}").json()
+        self.assertEqual(data["totals"]["appointments"], 1)
+
+        for query, param in [("to=2024-13-01", "to"), ("from=2024-02-30", "from"), ("department=abc", "department")]:
+            res = client.get(f"/api/admin/dashboard/?{query}")
+            self.assertEqual(res.status_code, 400, query)
+            self.assertIn(param, res.json())
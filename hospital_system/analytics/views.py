@@ -0,0 +1,74 @@
+# analytics/views.py
+from datetime import timedelta
+
+from django.db.models import F, Sum
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from hillcrest.params import date_range, id_param
+
+from . import rollups
+from .models import DailyStat
+
+
+def _pivot(rows, keys):
+    """
+    [{*keys, metric, value}] -> [{*keys, <metric>: value, ...}], keeping
+    first-seen order.
+    """
+    pivoted = {}
+    for row in rows:
+        key = tuple(row[k] for k in keys)
+        entry = pivoted.setdefault(key, {k: row[k] for k in keys})
+        entry[row["metric"]] = row["value"]
+    return list(pivoted.values())
+
+
+class DashboardView(APIView):
+    """
+    GET /api/admin/dashboard/?from=YYYY-MM-DD&to=YYYY-MM-DD[&department=<id>]
+
+    KPIs from the daily rollups (see analytics/rollups.py): totals, one
+    row per day, per department and per doctor. Reads at most days x
+    doctors x metrics rows, whatever the size of the history. Dates are
+    inclusive and default to the last 30 days; bad dates or a non-numeric
+    department are a 400. ``as_of`` says how fresh the rollups are.
+    """
+    policy_resource = "reports"
+
+    def get(self, request):
+        params = request.query_params
+        since, until = date_range(params)
+        until = until or timezone.localdate()
+        since = since or until - timedelta(days=29)
+        department = id_param(params, "department")
+
+        stats = DailyStat.objects.filter(date__gte=since, date__lte=until)
+        if department is not None:
+            stats = stats.filter(department_id=department)
+
+        totals = stats.values("metric").annotate(total=Sum("value")).order_by("metric")
+        daily = stats.values("date", "metric").annotate(value=Sum("value")).order_by("date", "metric")
+        departments = (
+            stats.values("department_id", "metric", department_name=F("department__name"))
+            .annotate(value=Sum("value")).order_by("department_name", "metric")
+        )
+        doctors = _pivot(
+            stats.filter(doctor__isnull=False)
+            .values("doctor_id", "metric", first_name=F("doctor__first_name"), last_name=F("doctor__last_name"))
+            .annotate(value=Sum("value")).order_by("doctor_id", "metric"),
+            ["doctor_id", "first_name", "last_name"],
+        )
+        for doctor in doctors:
+            doctor["doctor_name"] = f"{doctor.pop('first_name') or ''} {doctor.pop('last_name') or ''}".strip()
+
+        return Response({
+            "from": since,
+            "to": until,
+            "as_of": rollups.as_of(),
+            "totals": {row["metric"]: row["total"] for row in totals},
+            "daily": _pivot(daily, ["date"]),
+            "departments": _pivot(departments, ["department_id", "department_name"]),
+            "doctors": doctors,
+        })
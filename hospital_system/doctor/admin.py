@@ -10,6 +10,7 @@ class PrescriptionInline(admin.TabularInline):
 @admin.register(Consultation)
 class ConsultationAdmin(admin.ModelAdmin):
     list_display = ("id", "patient", "doctor", "appointment", "refer_to_lab", "created_at")
+    list_select_related = ("patient", "doctor", "appointment__patient")
     inlines = [PrescriptionInline]
 
 
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from doctor.models import Consultation, ConsultationTerm
+from doctor.search import reindex
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the consultation search index from the diagnosis, clinical "
+        "notes and prescriptions. Safe to run while the clinic is open."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        start = time.perf_counter()
+        last_id = 0
+        done = 0
+        while True:
+            ids = list(
+                Consultation.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            reindex(ids)
+            last_id = ids[-1]
+            done += len(ids)
+            self.stdout.write(f"  {done} consultations")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {done} consultations "
+            f"({ConsultationTerm.objects.count()} terms) in {time.perf_counter() - start:.1f}s"
+        ))
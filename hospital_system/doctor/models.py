@@ -58,3 +58,35 @@ class PrescriptionItem(models.Model):
         return f"{self.medicine_name} for {self.consultation.patient.patient_id}"
 
 
+
+class ConsultationTerm(models.Model):
+    """
+    Inverted-index posting for consultation search: one row per
+    (consultation, term). Built by doctor/search.py from the diagnosis,
+    clinical notes and prescribed medicine names. doctor and created_at
+    are copied from the consultation so a search never joins back to it.
+    """
+    consultation = models.ForeignKey(
+        Consultation,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+    )
+    doctor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    term = models.CharField(max_length=40)
+    weight = models.PositiveIntegerField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["consultation", "term"], name="consult_term_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["doctor", "term", "created_at"], name="consult_term_lookup_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> consultation {self.consultation_id}"
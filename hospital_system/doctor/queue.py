@@ -0,0 +1,106 @@
+# doctor/queue.py
+"""
+Live waiting queue per doctor.
+
+The queue (PENDING and IN_PROGRESS appointments in arrival order) is
+serialized once and kept in the default cache, keyed by a per-doctor
+version. Appointment, consultation and patient saves bump the version
+after commit (see doctor/signals.py). The next read then rebuilds the
+snapshot with one query, and every other read is served from the cache.
+
+The stream view in doctor/views.py watches the version and pushes a
+fresh snapshot only when it changes.
+
+The default cache is locmem, which is per process: a booking made
+through one worker does not bump the version in the others. Versions
+and snapshots therefore expire after DOCTOR_QUEUE_CACHE_SECONDS, so
+another worker's queue is stale for at most that long. With a shared
+default cache (FileBasedCache or RedisCache) every worker sees each
+change at once.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from receptionist.models import Appointment
+
+WAITING = ["PENDING", "IN_PROGRESS"]
+
+
+def _version_key(doctor_id):
+    return f"doctor-queue:{doctor_id}:version"
+
+
+def version(doctor_id):
+    current = cache.get(_version_key(doctor_id))
+    if current is None:
+        cache.add(_version_key(doctor_id), time.time_ns() // 1000, timeout=settings.DOCTOR_QUEUE_CACHE_SECONDS)
+        current = cache.get(_version_key(doctor_id))
+    return current
+
+
+async def aversion(doctor_id):
+    current = await cache.aget(_version_key(doctor_id))
+    if current is None:
+        await cache.aadd(_version_key(doctor_id), time.time_ns() // 1000, timeout=settings.DOCTOR_QUEUE_CACHE_SECONDS)
+        current = await cache.aget(_version_key(doctor_id))
+    return current
+
+
+def invalidate(*doctor_ids):
+    for doctor_id in doctor_ids:
+        if doctor_id is None:
+            continue
+        try:
+            cache.incr(_version_key(doctor_id))
+        except ValueError:
+            cache.add(_version_key(doctor_id), time.time_ns() // 1000, timeout=settings.DOCTOR_QUEUE_CACHE_SECONDS)
+
+
+def invalidate_on_commit(*doctor_ids):
+    transaction.on_commit(lambda: invalidate(*doctor_ids))
+
+
+def waiting_appointments(doctor_id):
+    return Appointment.objects.filter(
+        doctor_id=doctor_id,
+        status__in=WAITING,
+    ).select_related("patient").order_by("created_at", "id")  # tokens restart daily, so order by arrival
+
+
+def snapshot(doctor_id):
+    """
+    {"version": n, "appointments": [serialized, in queue order]}.
+    The version is read before the query, so a change that lands while
+    we build is caught on the next read.
+    """
+    from .serializers import DoctorAppointmentSerializer
+
+    current = version(doctor_id)
+    key = f"doctor-queue:{doctor_id}:{current}"
+    data = cache.get(key)
+    if data is None:
+        data = {
+            "version": current,
+            "appointments": DoctorAppointmentSerializer(
+                waiting_appointments(doctor_id), many=True
+            ).data,
+        }
+        cache.set(key, data, timeout=settings.DOCTOR_QUEUE_CACHE_SECONDS)
+    return data
+
+
+def head(doctor_id, count):
+    """
+    Current appointment plus the next ``count`` in one payload.
+    """
+    data = snapshot(doctor_id)
+    appointments = data["appointments"]
+    return {
+        "version": data["version"],
+        "current": appointments[0] if appointments else None,
+        "upcoming": appointments[1:count + 1],
+        "waiting": len(appointments),
+    }
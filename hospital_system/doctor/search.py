@@ -0,0 +1,167 @@
+# doctor/search.py
+"""
+Full-text search over a doctor's consultations.
+
+ConsultationTerm rows form an inverted index: each consultation's
+diagnosis, clinical notes and prescribed medicine names are tokenized
+and stored as (doctor, term, weight) postings. A search touches only
+the postings for the query terms, so it stays fast as notes pile up.
+
+Ranking is tf-idf: weight is the term count with field boosts
+(diagnosis x3, medicine x2, notes x1) and idf comes from how many of the
+doctor's consultations contain the term. All query terms must match;
+the last one also matches as a prefix ("deng" finds "dengue").
+
+The index is refreshed after commit whenever a consultation or one of
+its prescription items changes (see doctor/signals.py);
+rebuild_consultation_index rebuilds it from scratch.
+"""
+import math
+import re
+import threading
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Max, Q, Sum, Value, When
+
+from hillcrest.prefix import prefix_match
+
+from .models import Consultation, ConsultationTerm
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MAX_TERM_LENGTH = 40
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or the to was were with "
+    "advised patient pt c/o".split()
+)
+FIELD_WEIGHTS = {"diagnosis": 3, "medicine": 2, "clinical_notes": 1}
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall((text or "").casefold())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def term_weights(consultation, medicine_names):
+    weights = Counter()
+    for token in tokenize(consultation.diagnosis):
+        weights[token] += FIELD_WEIGHTS["diagnosis"]
+    for token in tokenize(consultation.clinical_notes):
+        weights[token] += FIELD_WEIGHTS["clinical_notes"]
+    for name in medicine_names:
+        for token in tokenize(name):
+            weights[token] += FIELD_WEIGHTS["medicine"]
+    return weights
+
+
+def build_postings(consultation, medicine_names):
+    """
+    Unsaved ConsultationTerm rows for one consultation. Bulk loaders
+    that already hold the prescriptions in memory call this directly.
+    """
+    return [
+        ConsultationTerm(
+            consultation_id=consultation.id,
+            doctor_id=consultation.doctor_id,
+            term=term,
+            weight=weight,
+            created_at=consultation.created_at,
+        )
+        for term, weight in term_weights(consultation, medicine_names).items()
+    ]
+
+
+def reindex(consultation_ids):
+    """
+    Replace the postings of the given consultations. Ids that no longer
+    exist simply lose their postings.
+    """
+    consultation_ids = list(consultation_ids)
+    with transaction.atomic():
+        ConsultationTerm.objects.filter(consultation_id__in=consultation_ids).delete()
+        consultations = Consultation.objects.filter(
+            id__in=consultation_ids
+        ).prefetch_related("prescriptions")
+        ConsultationTerm.objects.bulk_create([
+            posting
+            for c in consultations
+            for posting in build_postings(c, [item.medicine_name for item in c.prescriptions.all()])
+        ])
+
+
+_pending = threading.local()
+
+
+def schedule_reindex(consultation_id):
+    """
+    Reindex after the surrounding transaction commits. Every change
+    registers a flush, but the first flush drains all pending ids, so a
+    consultation saved with five prescription items is indexed once.
+    """
+    pending = getattr(_pending, "ids", None)
+    if pending is None:
+        pending = _pending.ids = set()
+    pending.add(consultation_id)
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    ids = getattr(_pending, "ids", None)
+    if ids:
+        _pending.ids = set()
+        reindex(ids)
+
+
+def _term_condition(term, prefix):
+    if not prefix:
+        return Q(term=term)
+    return prefix_match("term", term)
+
+
+def search_consultations(doctor, query, since=None, until=None, limit=20):
+    """
+    Return [(consultation_id, score)] for ``doctor``, best match first.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    postings = ConsultationTerm.objects.filter(doctor=doctor)
+    if since:
+        postings = postings.filter(created_at__gte=since)
+    if until:
+        postings = postings.filter(created_at__lt=until)
+
+    conditions = [
+        _term_condition(term, prefix=(i == len(terms) - 1))
+        for i, term in enumerate(terms)
+    ]
+
+    total = Consultation.objects.filter(doctor=doctor).count() or 1
+    idf = [
+        math.log(1 + total / (1 + postings.filter(cond).values("consultation").distinct().count()))
+        for cond in conditions
+    ]
+
+    matched = {
+        f"hit{i}": Max(Case(When(cond, then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for i, cond in enumerate(conditions)
+    }
+    score = Sum(Case(
+        *[When(cond, then=F("weight") * Value(w)) for cond, w in zip(conditions, idf)],
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
+    rows = (
+        postings.filter(reduce(or_, conditions))
+        .values("consultation", "created_at")
+        .annotate(score=score, **matched)
+        .filter(**{name: 1 for name in matched})
+        .order_by("-score", "-created_at")[:limit]
+    )
+    return [(row["consultation"], row["score"]) for row in rows]
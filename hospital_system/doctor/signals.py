@@ -0,0 +1,47 @@
+# doctor/signals.py
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from receptionist.models import Appointment, Patient
+from . import queue
+from .models import Consultation, PrescriptionItem
+from .search import schedule_reindex
+
+
+@receiver(post_save, sender=Consultation)
+def consultation_saved(sender, instance, **kwargs):
+    schedule_reindex(instance.id)
+    queue.invalidate_on_commit(instance.doctor_id)
+
+
+@receiver(post_save, sender=PrescriptionItem)
+@receiver(post_delete, sender=PrescriptionItem)
+def prescription_changed(sender, instance, **kwargs):
+    schedule_reindex(instance.consultation_id)
+
+
+@receiver(post_init, sender=Appointment)
+def appointment_loaded(sender, instance, **kwargs):
+    # remembered so a reassigned appointment leaves the old doctor's queue
+    instance._queued_doctor_id = instance.__dict__.get("doctor_id")
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def appointment_changed(sender, instance, **kwargs):
+    doctors = {instance.doctor_id, instance._queued_doctor_id}
+    instance._queued_doctor_id = instance.doctor_id
+    queue.invalidate_on_commit(*doctors)
+
+
+@receiver(post_save, sender=Patient)
+def patient_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    doctors = set(
+        Appointment.objects.filter(
+            patient_id=instance.id, status__in=queue.WAITING
+        ).values_list("doctor_id", flat=True)
+    )
+    if doctors:
+        queue.invalidate_on_commit(*doctors)
@@ -1,3 +1,204 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admin_panel.models import Department, User
+from receptionist.models import Appointment, Patient
+from .models import Consultation, ConsultationTerm, PrescriptionItem
+from .search import reindex, tokenize
+
+SEARCH_URL = "/api/doctor/consultations/search/"
+
+
+class ConsultationSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="General")
+        cls.doctor = User.objects.create(username="doc001", role="DOCTOR", department=cls.department)
+        cls.other = User.objects.create(username="doc002", role="DOCTOR", department=cls.department)
+        cls.patient = Patient.objects.create(full_name="A", age=30)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor)
+
+    def consult(self, diagnosis, notes="", medicines=(), doctor=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                patient=self.patient, doctor=doctor or self.doctor, department=self.department
+            )
+            consultation = Consultation.objects.create(
+                appointment=appointment,
+                doctor=doctor or self.doctor,
+                patient=self.patient,
+                diagnosis=diagnosis,
+                clinical_notes=notes,
+            )
+            for name in medicines:
+                PrescriptionItem.objects.create(
+                    consultation=consultation, medicine_name=name, quantity=1,
+                    dosage="1 tablet", frequency="1-0-1", duration="3 days",
+                )
+        return consultation
+
+    def search(self, **params):
+        res = self.client.get(SEARCH_URL, params)
+        self.assertEqual(res.status_code, 200)
+        return [row["id"] for row in res.data]
+
+    def test_tokenizer_drops_noise(self):
+        self.assertEqual(tokenize("Pt c/o FEVER, and a cough x 3"), ["fever", "cough"])
+
+    def test_index_follows_prescriptions(self):
+        consultation = self.consult("Viral fever", medicines=["Paracetamol 500"])
+        self.assertEqual(
+            ConsultationTerm.objects.get(consultation=consultation, term="paracetamol").weight, 2
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            consultation.prescriptions.all().delete()
+        self.assertFalse(ConsultationTerm.objects.filter(term="paracetamol").exists())
+
+    def test_all_words_must_match_and_diagnosis_ranks_first(self):
+        in_notes = self.consult("Gastritis", notes="history of dengue fever last year")
+        in_diagnosis = self.consult("Dengue fever", notes="platelets low")
+        self.consult("Viral fever")
+
+        self.assertEqual(self.search(q="dengue fever"), [in_diagnosis.id, in_notes.id])
+        self.assertEqual(self.search(q="fever deng")[:2], [in_diagnosis.id, in_notes.id])
+        self.assertEqual(self.search(q="platelets gastritis"), [])
+
+    def test_prefix_ending_in_z_or_9(self):
+        covid = self.consult("Covid19 pneumonia")
+        quiz = self.consult("Hb low", notes="quizz score normal")
+        self.assertEqual(self.search(q="covid19"), [covid.id])
+        self.assertEqual(self.search(q="covid1"), [covid.id])
+        self.assertEqual(self.search(q="quiz"), [quiz.id])
+
+    def test_scoped_to_doctor_and_date_range(self):
+        recent = self.consult("Migraine")
+        old = self.consult("Migraine")
+        ConsultationTerm.objects.filter(consultation=old).update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        self.consult("Migraine", doctor=self.other)
+
+        self.assertEqual(sorted(self.search(q="migraine")), sorted([recent.id, old.id]))
+        since = (timezone.localdate() - timedelta(days=7)).isoformat()
+        self.assertEqual(self.search(q="migraine", **{"from": since}), [recent.id])
+
+        res = self.client.get(SEARCH_URL, {"q": "migraine", "to": "2024-02-30"})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("to", res.json())
+
+    def test_reindex_restores_missing_postings(self):
+        consultation = self.consult("Asthma", medicines=["Salbutamol inhaler"])
+        ConsultationTerm.objects.all().delete()
+        reindex([consultation.id])
+        self.assertEqual(self.search(q="salbutamol"), [consultation.id])
+
+
+class DoctorQueueTests(TestCase):
+    url = "/api/doctor/appointments/queue/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="General")
+        cls.doctor = User.objects.create(username="doc001", role="DOCTOR", department=cls.department)
+        cls.other = User.objects.create(username="doc002", role="DOCTOR", department=cls.department)
+        cls.patients = [Patient.objects.create(full_name=f"P{i}", age=30) for i in range(4)]
+        cls.appointments = [
+            Appointment.objects.create(
+                patient=p, doctor=cls.doctor, department=cls.department, status="PENDING"
+            )
+            for p in cls.patients
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor)
+
+    def queue(self, **params):
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def test_current_and_next_in_one_call(self):
+        data = self.queue(next=2)
+        self.assertEqual(data["current"]["id"], self.appointments[0].id)
+        self.assertEqual([a["id"] for a in data["upcoming"]], [a.id for a in self.appointments[1:3]])
+        self.assertEqual(data["waiting"], 4)
+
+    def test_repeat_reads_come_from_the_snapshot(self):
+        self.queue()
+        with CaptureQueriesContext(connection) as ctx:
+            self.queue()
+            self.client.get("/api/doctor/appointments/current/")
+            self.client.get("/api/doctor/appointments/upcoming/")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_completed_and_reassigned_appointments_leave_the_queue(self):
+        before = self.queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Appointment.objects.get(id=self.appointments[0].id)
+            first.status = "COMPLETED"
+            first.save(update_fields=["status"])
+            second = Appointment.objects.get(id=self.appointments[1].id)
+            second.doctor = self.other
+            second.save(update_fields=["doctor"])
+
+        data = self.queue()
+        self.assertGreater(data["version"], before["version"])
+        self.assertEqual(data["current"]["id"], self.appointments[2].id)
+        self.assertEqual(data["waiting"], 2)
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.queue()["current"]["id"], self.appointments[1].id)
+
+    def test_patient_rename_refreshes_the_queue(self):
+        self.queue()
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = Patient.objects.get(id=self.patients[0].id)
+            patient.full_name = "Renamed"
+            patient.save()
+        self.assertEqual(self.queue()["current"]["patient"]["full_name"], "Renamed")
+
+    def test_unseen_bookings_show_after_the_cache_timeout(self):
+        # bulk_create sends no signal, like a booking made through another
+        # worker with the per-process default cache
+        before = self.queue()
+        Appointment.objects.bulk_create([
+            Appointment(patient=self.patients[0], doctor=self.doctor, department=self.department, status="PENDING")
+        ])
+        self.assertEqual(self.queue()["waiting"], before["waiting"])
+
+        later = time.time() + settings.DOCTOR_QUEUE_CACHE_SECONDS + 1
+        with patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertEqual(self.queue()["waiting"], before["waiting"] + 1)
+
+    async def test_stream_sends_the_queue_on_connect(self):
+        token = str(AccessToken.for_user(self.doctor))
+        res = await self.async_client.get("/api/doctor/queue/stream/", {"token": token, "next": 1})
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        first = await anext(aiter(res.streaming_content))
+        first = first.decode() if isinstance(first, bytes) else first
+        self.assertIn("event: queue", first)
+        self.assertIn(f'"id": {self.appointments[0].id}', first)
 
-# Create your tests here.
+    async def test_stream_requires_a_doctor_token(self):
+        res = await self.async_client.get("/api/doctor/queue/stream/")
+        self.assertEqual(res.status_code, 401)
+        other = await User.objects.acreate(username="rec001", role="RECEPTIONIST")
+        res = await self.async_client.get(
+            "/api/doctor/queue/stream/", {"token": str(AccessToken.for_user(other))}
+        )
+        self.assertEqual(res.status_code, 403)
@@ -1,13 +1,23 @@
 # doctor/views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+
 from django.db import transaction
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 
-from admin_panel.permissions import IsDoctor
+from admin_panel.authentication import full_user
+from admin_panel import policy
+from hillcrest import sse
+from hillcrest.params import date_range, day_bounds
+from notifications import bus
 from receptionist.models import Appointment, Patient
+from . import queue as doctor_queue
 from .models import Consultation
+from .search import search_consultations
 from .serializers import (
     DoctorAppointmentSerializer,
     ConsultationSerializer,
@@ -18,8 +28,26 @@ from .serializers import (
     ConsultationListSerializer,
 )
 
+from labtech import trends
 from labtech.models import LabTestRequest
 from labtech.serializers import LabTestRequestSerializer
+from labtech.worklist import parse_priority
+
+# the stream checks the queue version (a cache read) this often
+QUEUE_POLL_SECONDS = 1.0
+QUEUE_HEARTBEAT_SECONDS = 15.0
+
+
+def publish_lab_request(lab_request):
+    bus.publish(
+        "lab_request.created",
+        {
+            "lab_request": lab_request.id,
+            "patient_id": lab_request.patient.patient_id,
+            "test_type": lab_request.test_type,
+        },
+        role="LAB_TECHNICIAN",
+    )
 
 
 # =======================
@@ -27,32 +55,81 @@ from labtech.serializers import LabTestRequestSerializer
 # =======================
 class DoctorAppointmentViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = DoctorAppointmentSerializer
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    policy_resource = "doctor_queue"
 
     def get_queryset(self):
-        return Appointment.objects.filter(
-            doctor=self.request.user,
-            status__in=["PENDING", "IN_PROGRESS"]
-        ).order_by("token_number")
+        return doctor_queue.waiting_appointments(self.request.user.id)
 
     @action(detail=False, methods=["get"])
     def current(self, request):
-        appt = self.get_queryset().first()
+        appt = doctor_queue.head(request.user.id, 0)["current"]
         if not appt:
             return Response(status=status.HTTP_204_NO_CONTENT)
-        return Response(self.get_serializer(appt).data)
+        return Response(appt)
 
     @action(detail=False, methods=["get"])
     def upcoming(self, request):
-        qs = self.get_queryset()[1:]
-        return Response(self.get_serializer(qs, many=True).data)
+        return Response(doctor_queue.snapshot(request.user.id)["appointments"][1:])
+
+    @action(detail=False, methods=["get"])
+    def queue(self, request):
+        """
+        GET /doctor/appointments/queue/?next=5
+        Current appointment, the next N and the total waiting, in one call.
+        """
+        try:
+            count = min(max(int(request.query_params.get("next", 5)), 0), 50)
+        except ValueError:
+            count = 5
+        return Response(doctor_queue.head(request.user.id, count))
+
+
+async def queue_stream(request):
+    """
+    GET /api/doctor/queue/stream/?token=<access>&next=5  (text/event-stream)
+    Sends a "queue" event with the same payload as /queue/ on connect and
+    whenever the queue changes; comments keep idle connections open.
+    """
+    user = await sse.authenticate(request)
+    if user is None:
+        return sse.denied()
+    if not policy.allowed(user.role, "doctor_queue", "read"):
+        return sse.denied(403, "You do not have permission to perform this action.")
+    try:
+        count = min(max(int(request.GET.get("next", 5)), 0), 50)
+    except ValueError:
+        count = 5
+
+    async def events():
+        sent = None
+        last = None
+        idle = 0.0
+        while True:
+            current = await doctor_queue.aversion(user.id)
+            if current != sent:
+                payload = await sync_to_async(doctor_queue.head)(user.id, count)
+                sent = payload["version"]
+                # an expired version (see doctor/queue.py) is new but
+                # usually has the same queue; only send real changes
+                queue = {k: v for k, v in payload.items() if k != "version"}
+                if queue != last:
+                    last = queue
+                    idle = 0.0
+                    yield sse.event(payload, name="queue", event_id=sent)
+            elif idle >= QUEUE_HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield sse.HEARTBEAT
+            await asyncio.sleep(QUEUE_POLL_SECONDS)
+            idle += QUEUE_POLL_SECONDS
+
+    return sse.stream_response(events())
 
 
 # =======================
 # Consultation Create + Lab Request Auto-Create
 # =======================
 class ConsultationViewSet(viewsets.ModelViewSet):
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    policy_resource = "consultations"
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -60,7 +137,9 @@ class ConsultationViewSet(viewsets.ModelViewSet):
         return ConsultationSerializer
 
     def get_queryset(self):
-        return Consultation.objects.filter(doctor=self.request.user)
+        return policy.scope(
+            self.request.user, self.policy_resource, Consultation.objects
+        ).select_related("patient").prefetch_related("prescriptions")
 
     def retrieve(self, request, *args, **kwargs):
         consultation = self.get_object()
@@ -74,7 +153,9 @@ class ConsultationViewSet(viewsets.ModelViewSet):
             return Response({"detail": "appointment_id required"}, status=400)
 
         try:
-            appt = Appointment.objects.get(id=appointment_id, doctor=request.user)
+            appt = policy.scope(
+                request.user, "doctor_appointments", Appointment.objects, id=appointment_id
+            ).get()
         except Appointment.DoesNotExist:
             return Response({"detail": "Not your appointment"}, status=404)
 
@@ -94,13 +175,22 @@ class ConsultationViewSet(viewsets.ModelViewSet):
 
         if refer_to_lab and test_type:
             if not hasattr(appt, "lab_request"):
-                LabTestRequest.objects.create(
+                lab_request = LabTestRequest.objects.create(
                     appointment=appt,
                     doctor=request.user,
                     patient=appt.patient,
                     test_type=test_type,
+                    priority=parse_priority(request.data.get("lab_priority")),
                     status="PENDING"
                 )
+                publish_lab_request(lab_request)
+
+        if serializer.validated_data.get("prescriptions"):
+            bus.publish(
+                "prescription.created",
+                {"consultation": consultation.id, "patient_id": appt.patient.patient_id},
+                role="PHARMACIST",
+            )
 
         # Mark appointment complete
         appt.status = "COMPLETED"
@@ -108,18 +198,44 @@ class ConsultationViewSet(viewsets.ModelViewSet):
 
         return Response(self.get_serializer(consultation).data, status=201)
 
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        GET /doctor/consultations/search/?q=<words>&from=YYYY-MM-DD&to=YYYY-MM-DD&limit=20
+        Every word must appear in the diagnosis, notes or prescribed
+        medicines; results are ranked best match first.
+        """
+        params = request.query_params
+        try:
+            limit = min(max(int(params.get("limit", 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        # "to" is inclusive; an impossible date is a 400
+        since, until = day_bounds(*date_range(params))
+
+        ranked = search_consultations(request.user, params.get("q"), since, until, limit)
+        consultations = Consultation.objects.select_related("patient").in_bulk(
+            [consultation_id for consultation_id, _ in ranked]
+        )
+        results = []
+        for consultation_id, score in ranked:
+            data = ConsultationListSerializer(consultations[consultation_id]).data
+            data["score"] = round(score, 3)
+            results.append(data)
+        return Response(results)
+
 
 # =======================
 # Doctor Patients List
 # =======================
 class DoctorPatientsViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = DoctorPatientSerializer
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    policy_resource = "doctor_patients"
 
     def get_queryset(self):
-        return Patient.objects.filter(
-            appointments__doctor=self.request.user,
-            appointments__status="COMPLETED"
+        return policy.scope(
+            self.request.user, self.policy_resource, Patient.objects,
+            appointments__status="COMPLETED",
         ).distinct()
 
 
@@ -127,12 +243,11 @@ class DoctorPatientsViewSet(viewsets.ReadOnlyModelViewSet):
 # Doctor Patient History View
 # =======================
 class PatientHistoryView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    policy_resource = "doctor_patients"
 
     def get(self, request, patient_id):
-        try:
-            patient = Patient.objects.get(id=patient_id)
-        except Patient.DoesNotExist:
+        patient = policy.scope(request.user, self.policy_resource, Patient.objects, id=patient_id).first()
+        if patient is None:
             return Response({"detail": "Patient not found"}, status=404)
 
         consultations = Consultation.objects.filter(
@@ -148,25 +263,50 @@ class PatientHistoryView(APIView):
         return Response(data)
 
 
+class PatientLabTrendView(APIView):
+    """
+    GET /api/doctor/patients/<id>/lab-trends/[?parameter=Hemoglobin]
+
+    Every numeric lab parameter of the patient across visits, with
+    min/max/mean, latest value, slope per day and out-of-range count
+    (see labtech/trends.py). ``parameter`` filters by case-insensitive
+    prefix. Only the doctor's own patients (an appointment with them);
+    any other id is a 404, checked before the cached trends are read.
+    """
+    policy_resource = "doctor_patients"
+
+    def get(self, request, patient_id):
+        if not policy.scope(request.user, self.policy_resource, Patient.objects, id=patient_id).exists():
+            return Response({"detail": "Patient not found"}, status=404)
+
+        data = trends.patient_trends(patient_id)
+        prefix = request.query_params.get("parameter", "").strip().lower()
+        parameters = [
+            p for p in data["parameters"] if p["parameter"].lower().startswith(prefix)
+        ]
+        return Response({"patient": patient_id, "version": data["version"], "parameters": parameters})
+
+
 # =======================
 # Doctor Profile
 # =======================
 class DoctorProfileView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    policy_resource = "doctor_profile"
 
     def get(self, request):
-        return Response(DoctorProfileSerializer(request.user).data)
+        return Response(DoctorProfileSerializer(full_user(request.user)).data)
 
 
 # =======================
 # Doctor View Lab Requests Sent
 # =======================
 class DoctorLabRequestsView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    policy_resource = "doctor_lab_requests"
 
     def get(self, request):
-        doctor = request.user
-        requests = LabTestRequest.objects.filter(doctor=doctor).select_related("patient", "doctor")
+        requests = LabTestRequestSerializer.setup_eager_loading(
+            policy.scope(request.user, self.policy_resource, LabTestRequest.objects)
+        )
         serializer = LabTestRequestSerializer(requests, many=True)
         return Response(serializer.data)
 
@@ -178,17 +318,21 @@ class DoctorLabRequestsView(APIView):
             return Response({"detail": "appointment_id and test_type required"}, status=400)
 
         try:
-            appointment = Appointment.objects.get(id=appointment_id)
+            appointment = policy.scope(
+                request.user, "doctor_appointments", Appointment.objects, id=appointment_id
+            ).get()
         except Appointment.DoesNotExist:
             return Response({"error": "Appointment not found"}, status=404)
 
-        LabTestRequest.objects.create(
+        lab_request = LabTestRequest.objects.create(
             appointment=appointment,
             doctor=request.user,
             patient=appointment.patient,
             test_type=test_type,
+            priority=parse_priority(request.data.get("priority")),
             status="PENDING"
         )
+        publish_lab_request(lab_request)
 
         return Response({"message": "Lab request sent"}, status=201)
 
@@ -197,14 +341,11 @@ class DoctorLabRequestsView(APIView):
 # Doctor View Lab Results Received (list)
 # =======================
 class DoctorLabResultsView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    policy_resource = "doctor_lab_requests"
 
     def get(self, request):
-        # Correct filtering: lab requests assigned to this doctor (LabTestRequest.doctor)
-        requests = (
-            LabTestRequest.objects
-            .filter(doctor=request.user, status="COMPLETED")
-            .select_related("patient", "doctor", "appointment")
+        requests = LabTestRequestSerializer.setup_eager_loading(
+            policy.scope(request.user, self.policy_resource, LabTestRequest.objects, status="COMPLETED")
             .order_by("-requested_at")
         )
         serializer = LabTestRequestSerializer(requests, many=True)
@@ -214,19 +355,17 @@ class DoctorLabResultsView(APIView):
 # =======================
 # Doctor Lab Result Detail
 # =======================
-from rest_framework.permissions import IsAuthenticated
-
 class DoctorLabResultDetailView(APIView):
-    permission_classes = [IsAuthenticated, IsDoctor]
+    policy_resource = "doctor_lab_requests"
 
     def get(self, request, request_id):
         try:
-            # Correct filter: match LabTestRequest.doctor to the logged-in doctor
-            lab_request = LabTestRequest.objects.get(
-                id=request_id,
-                doctor=request.user,
-                status="COMPLETED",
-            )
+            lab_request = LabTestRequestSerializer.setup_eager_loading(
+                policy.scope(
+                    request.user, self.policy_resource, LabTestRequest.objects,
+                    id=request_id, status="COMPLETED",
+                )
+            ).get()
         except LabTestRequest.DoesNotExist:
             return Response({"detail": "Not found"}, status=404)
 
@@ -3,6 +3,10 @@ ASGI config for hillcrest project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this entry point (e.g. ``uvicorn
+hillcrest.asgi:application``) for the Server-Sent Event streams such as
+/api/doctor/queue/stream/; WSGI servers buffer them.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
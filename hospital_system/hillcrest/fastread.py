@@ -0,0 +1,292 @@
+# hillcrest/fastread.py
+"""
+Read-only fast path for large list responses.
+
+A DRF ModelSerializer builds each row from a model instance. It resolves
+every field's source, runs to_representation and collects the result in
+an OrderedDict. With nested serializers that is tens of microseconds per
+row, spent on every row of a list of thousands.
+
+ValuesReader compiles a serializer class once into a plan:
+
+    columns   the values() paths it reads, e.g. "patient__full_name"
+    steps     one per output key: the column, nested plan or method to
+              read, and the converter DRF's field would apply
+
+It then turns values() dicts straight into the response data, with no
+model instances and no serializer objects. The output is the same as
+serializer(queryset, many=True).data, with the same keys in the same
+order and the same types, so the rendered JSON is byte-identical. Some
+details of that:
+
+    * a null foreign key inside a dotted source (source="patient.name")
+      leaves the key out, as DRF does for read-only fields
+    * nested many=True serializers over a reverse foreign key (a sale's
+      items) are read with one extra query per 1000 parents. They are
+      ordered like prefetch_related: the model's default ordering, else
+      the primary key
+    * datetimes are converted to the current time zone, as by
+      DateTimeField
+
+SerializerMethodField has no values() equivalent. Pass its columns and a
+plain function instead:
+
+    ValuesReader(PharmacySaleSerializer, methods={
+        "doctor_name": (("doctor", "doctor__first_name", ...), func),
+    })
+
+Sources that values() cannot read (properties, methods, to-many fields
+other than one nested list) raise ImproperlyConfigured when the plan is
+built. Those serializers keep the normal path.
+
+FastListMixin uses a reader for a viewset's list action. Pagination still
+applies, since values() querysets page and cursor the same way.
+"""
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import fields, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from hillcrest.metrics import serializing
+
+CHUNK_SIZE = 1000
+
+LEAF, NESTED, METHOD, MANY = range(4)
+_SKIP = object()
+
+_STRING_FIELDS = (fields.CharField, fields.EmailField, fields.SlugField, fields.URLField)
+
+
+def _iso_datetime(tz):
+    if tz is None:
+        return lambda value: value.isoformat()
+
+    def convert(value):
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    return convert
+
+
+def _converter(field, tz):
+    """
+    What DRF's ``field.to_representation`` does to a non-null value, or
+    None when the value is already the output.
+    """
+    kind = type(field)
+    if kind is fields.DateTimeField and not hasattr(field, "timezone"):
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        if output_format and output_format.lower() == fields.ISO_8601:
+            return _iso_datetime(tz)
+    if kind in _STRING_FIELDS:
+        return str
+    if kind is fields.IntegerField:
+        return int
+    if kind is fields.BooleanField:
+        return bool
+    if kind is fields.ReadOnlyField:
+        return None
+    if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    if isinstance(field, (relations.RelatedField, relations.ManyRelatedField, fields.HiddenField)):
+        raise ImproperlyConfigured(f"{field.field_name}: {kind.__name__} cannot be read from values()")
+    return field.to_representation
+
+
+def _missing(field):
+    """
+    What DRF does when a null relation part-way along ``field``'s source
+    raises AttributeError: the default, None, or leave the key out.
+    """
+    if field.default is not fields.empty:
+        return field.get_default
+    if field.allow_null:
+        return lambda: None
+    if not field.required:
+        return _SKIP
+
+    def fail():
+        raise AttributeError(f"{field.field_name}: null relation in source {field.source!r}")
+    return fail
+
+
+def _resolve(model, attrs, prefix, where):
+    """
+    (path, guards, last model field, model owning it) for a source
+    through forward relations. ``guards`` are the nullable foreign keys
+    on the way.
+    """
+    if not attrs:
+        raise ImproperlyConfigured(f"{where}: source='*' cannot be read from values()")
+    guards = []
+    for i, attr in enumerate(attrs):
+        try:
+            field = model._meta.pk if attr == "pk" else model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f"{where}: {model.__name__}.{attr} is not a model field")
+        path = prefix + "__".join(attrs[:i + 1])
+        if i == len(attrs) - 1:
+            return path, tuple(guards), field, model
+        if not (field.concrete and (field.many_to_one or field.one_to_one)):
+            raise ImproperlyConfigured(f"{where}: {model.__name__}.{attr} is not a forward relation")
+        if field.null:
+            guards.append(path)
+        model = field.related_model
+
+
+class _Plan:
+    def __init__(self):
+        self.columns = []
+        self.many = []
+
+    def column(self, path):
+        if path not in self.columns:
+            self.columns.append(path)
+        return path
+
+
+def _compile(serializer, model, prefix, tz, methods, plan, top):
+    steps = []
+    for field in serializer._readable_fields:
+        key = field.field_name
+        where = f"{type(serializer).__name__}.{key}"
+
+        if isinstance(field, fields.SerializerMethodField):
+            if key not in methods:
+                raise ImproperlyConfigured(f"{where}: pass its columns and a function in methods")
+            columns, func = methods[key]
+            steps.append((METHOD, key, (), None, tuple(plan.column(prefix + c) for c in columns), func))
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            try:
+                relation = model._meta.get_field(field.source) if top and len(field.source_attrs) == 1 else None
+            except FieldDoesNotExist:
+                relation = None
+            if relation is None or not (relation.one_to_many and relation.auto_created):
+                raise ImproperlyConfigured(f"{where}: only a top-level reverse foreign key can be a nested list")
+            child_plan = _Plan()
+            fk = child_plan.column(relation.field.name)
+            child_model = relation.related_model
+            child_steps = _compile(field.child, child_model, "", tz, _methods_under(methods, key), child_plan, False)
+            ordering = child_model._meta.ordering or ["pk"]
+            plan.many.append((key, child_model, fk, child_plan.columns, child_steps, ordering))
+            plan.column("pk")
+            steps.append((MANY, key, (), None, None, None))
+            continue
+
+        path, guards, target, owner = _resolve(model, field.source_attrs, prefix, where)
+        guards = tuple(plan.column(g) for g in guards)
+        missing = _missing(field) if guards else None
+
+        if isinstance(field, serializers.BaseSerializer):
+            if not (target.concrete and (target.many_to_one or target.one_to_one)):
+                raise ImproperlyConfigured(f"{where}: nested serializer over {owner.__name__}.{target.name}")
+            nested = _compile(
+                field, target.related_model, path + "__", tz, _methods_under(methods, key), plan, False
+            )
+            steps.append((NESTED, key, guards, missing, plan.column(path), nested))
+            continue
+
+        if target.is_relation and not isinstance(field, relations.PrimaryKeyRelatedField):
+            raise ImproperlyConfigured(f"{where}: {type(field).__name__} over relation {target.name}")
+        steps.append((LEAF, key, guards, missing, plan.column(path), _converter(field, tz)))
+    return steps
+
+
+def _methods_under(methods, key):
+    """
+    The entries of ``methods`` for a nested serializer at ``key``.
+    """
+    start = f"{key}."
+    return {name[len(start):]: value for name, value in methods.items() if name.startswith(start)}
+
+
+def _row(steps, row, children):
+    out = {}
+    for kind, key, guards, missing, source, convert in steps:
+        if guards and any(row[g] is None for g in guards):
+            if missing is not _SKIP:
+                out[key] = missing()
+            continue
+        if kind == LEAF:
+            value = row[source]
+            out[key] = value if value is None or convert is None else convert(value)
+        elif kind == NESTED:
+            out[key] = None if row[source] is None else _row(convert, row, children)
+        elif kind == METHOD:
+            out[key] = convert(*[row[c] for c in source])
+        else:
+            out[key] = children[key].get(row["pk"], [])
+    return out
+
+
+class ValuesReader:
+    """
+    serializer_class(queryset, many=True).data, read with values().
+    """
+
+    def __init__(self, serializer_class, methods=None):
+        self.serializer_class = serializer_class
+        self.methods = methods or {}
+        # plans by time zone; compiled on first use, after app loading
+        self._plans = {}
+
+    def plan(self):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        plan = self._plans.get(tz)
+        if plan is None:
+            plan = _Plan()
+            serializer = self.serializer_class()
+            plan.steps = _compile(serializer, serializer.Meta.model, "", tz, self.methods, plan, True)
+            self._plans[tz] = plan
+        return plan
+
+    def values(self, queryset):
+        """
+        ``queryset`` as the values() rows build() expects.
+        """
+        return queryset.prefetch_related(None).values(*self.plan().columns)
+
+    def build(self, rows):
+        """
+        Response data for values() ``rows`` (a queryset or a page of one).
+        """
+        return serializing(self._build, rows)
+
+    def read(self, queryset):
+        return self.build(self.values(queryset))
+
+    def _build(self, rows):
+        plan = self.plan()
+        rows = list(rows)
+        children = {}
+        for key, model, fk, columns, steps, ordering in plan.many:
+            ids = [row["pk"] for row in rows]
+            grouped = children[key] = {}
+            for start in range(0, len(ids), CHUNK_SIZE):
+                chunk = (
+                    model._default_manager
+                    .filter(**{f"{fk}__in": ids[start:start + CHUNK_SIZE]})
+                    .order_by(*ordering)
+                    .values(*columns)
+                )
+                for child in chunk:
+                    grouped.setdefault(child[fk], []).append(_row(steps, child, None))
+        return [_row(plan.steps, row, children) for row in rows]
+
+
+class FastListMixin:
+    """
+    Serves a viewset's list action through ``list_reader``, a
+    ValuesReader for its serializer. Other actions are unchanged.
+    """
+    list_reader = None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.list_reader.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.list_reader.build(page))
+        return Response(self.list_reader.build(rows))
@@ -0,0 +1,239 @@
+# hillcrest/loadtest.py
+"""
+Scripted replay of a clinic day against the API:
+reception -> doctor -> lab -> pharmacy, then the end-of-day admin lists.
+
+Requests go either through the Django stack in-process (APIClient) or
+over HTTP to a running server; latencies are collected per route.
+"""
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from rest_framework.test import APIClient
+
+from admin_panel.models import User
+from hillcrest.synthetic import DIAGNOSES, FIRST_NAMES, LAB_PRICES, LAST_NAMES
+from labtech.parameters import CATALOG
+
+
+def route_of(path):
+    try:
+        route = resolve(path.split("?", 1)[0]).route
+    except Resolver404:
+        return path
+    # router patterns are regexes; drop the anchors for display
+    return "/" + route.replace("^", "").replace("$", "")
+
+
+class InProcessTransport:
+    def __init__(self):
+        hosts = [h for h in settings.ALLOWED_HOSTS if h != "*"]
+        self.host = hosts[0] if hosts else "localhost"
+        self.clients = {}
+
+    def request(self, user, method, path, data=None):
+        client = self.clients.get(user.pk)
+        if client is None:
+            client = self.clients[user.pk] = APIClient(HTTP_HOST=self.host)
+            client.force_authenticate(user)
+        response = getattr(client, method.lower())(path, data, format="json")
+        body = response.json() if response.content else None
+        return response.status_code, body
+
+
+class HttpTransport:
+    def __init__(self, base_url, password):
+        self.base_url = base_url.rstrip("/")
+        self.password = password
+        self.tokens = {}
+
+    def _send(self, method, path, data=None, token=None):
+        request = urllib.request.Request(
+            self.base_url + path,
+            method=method,
+            data=json.dumps(data).encode() if data is not None else None,
+            headers={"Content-Type": "application/json"},
+        )
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        try:
+            with urllib.request.urlopen(request) as response:
+                status, raw = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, raw = error.code, error.read()
+        try:
+            return status, json.loads(raw) if raw else None
+        except ValueError:
+            return status, None
+
+    def request(self, user, method, path, data=None):
+        token = self.tokens.get(user.pk)
+        if token is None:
+            _, body = self._send(
+                "POST", "/api/login/", {"username": user.username, "password": self.password}
+            )
+            token = self.tokens[user.pk] = body["access"]
+        return self._send(method, path, data, token)
+
+
+class DayScenario:
+    def __init__(self, transport, visits=100, lab_share=0.3, seed=None):
+        self.transport = transport
+        self.visits = visits
+        self.lab_share = lab_share
+        self.random = random.Random(seed)
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, user, method, path, data=None):
+        start = time.perf_counter()
+        status, body = self.transport.request(user, method, path, data)
+        key = f"{method} {route_of(path)}"
+        self.timings[key].append((time.perf_counter() - start) * 1000)
+        if status >= 400:
+            self.errors[key] += 1
+        return status, body
+
+    def staff(self, role):
+        users = list(User.objects.filter(role=role, is_active=True))
+        if not users:
+            raise ValueError(f"No active {role} users; run generate_clinic_data first.")
+        return users
+
+    def run(self):
+        receptionist = self.random.choice(self.staff("RECEPTIONIST"))
+        technician = self.random.choice(self.staff("LAB_TECHNICIAN"))
+        pharmacist = self.random.choice(self.staff("PHARMACIST"))
+        admin = self.random.choice(self.staff("ADMIN"))
+        doctors = [d for d in self.staff("DOCTOR") if d.department_id]
+
+        _, medicines = self.call(pharmacist, "GET", "/api/pharmacy/medicines/")
+        medicines = [m for m in medicines if m["stock_quantity"] > 100]
+
+        for n in range(self.visits):
+            doctor = self.random.choice(doctors)
+            appointment_id = self.reception(receptionist, doctor, n)
+            if appointment_id is None:
+                continue
+            consultation_id, test_type = self.consult(doctor, appointment_id)
+            if consultation_id is None:
+                continue
+            if test_type:
+                self.lab(technician, appointment_id, test_type)
+            else:
+                self.pharmacy(pharmacist, consultation_id, medicines)
+
+        self.end_of_day(admin, receptionist, technician, pharmacist, doctors[0])
+        return self.report()
+
+    def reception(self, receptionist, doctor, n):
+        phone = f"7{self.random.randrange(10**9):09d}"
+        self.call(receptionist, "GET", f"/api/receptionist/patients/?phone={phone}")
+        self.call(receptionist, "GET", f"/api/receptionist/doctors/by-department/{doctor.department_id}/")
+        status, patient = self.call(receptionist, "POST", "/api/receptionist/patients/", {
+            "full_name": f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}",
+            "age": self.random.randint(1, 90),
+            "gender": self.random.choice(["Male", "Female"]),
+            "contact_number": phone,
+        })
+        if status != 201:
+            return None
+        status, appointment = self.call(receptionist, "POST", "/api/receptionist/appointments/", {
+            "patient": patient["id"],
+            "doctor": doctor.id,
+            "department": doctor.department_id,
+        })
+        if status != 201:
+            return None
+        self.call(receptionist, "POST", "/api/receptionist/bills/", {
+            "appointment": appointment["id"],
+            "consultation_fee": 300,
+        })
+        if n % 10 == 0:
+            self.call(receptionist, "GET", "/api/receptionist/appointments/")
+        return appointment["id"]
+
+    def consult(self, doctor, appointment_id):
+        self.call(doctor, "GET", "/api/doctor/appointments/current/")
+        diagnosis, notes = self.random.choice(DIAGNOSES)
+        test_type = self.random.choice(list(LAB_PRICES)) if self.random.random() < self.lab_share else None
+        status, consultation = self.call(
+            doctor, "POST", f"/api/doctor/consultations/?appointment_id={appointment_id}", {
+                "diagnosis": diagnosis,
+                "clinical_notes": notes,
+                "refer_to_lab": bool(test_type),
+                "test_type": test_type,
+                "prescriptions": [] if test_type else [
+                    {"medicine_name": "Paracetamol 500mg", "quantity": 6, "frequency": "1-0-1"},
+                ],
+            },
+        )
+        if status != 201:
+            return None, None
+        return consultation["id"], test_type
+
+    def lab(self, technician, appointment_id, test_type):
+        _, pending = self.call(technician, "GET", "/api/lab/pending/")
+        request = next((r for r in pending if r["appointment"] == appointment_id), None)
+        if request is None:
+            return
+        values = [
+            {"parameter": p.name, "value": str(round(self.random.uniform(p.low, p.high), 2))}
+            for p in CATALOG[test_type]
+        ]
+        self.call(
+            technician, "POST", f"/api/lab/process/?request_id={request['id']}",
+            {"result_details": json.dumps(values)},
+        )
+
+    def pharmacy(self, pharmacist, consultation_id, medicines):
+        self.call(pharmacist, "GET", "/api/pharmacy/active-prescriptions/")
+        self.call(pharmacist, "GET", f"/api/pharmacy/consultation/{consultation_id}/")
+        if medicines:
+            items = [
+                {"medicine": m["id"], "quantity": self.random.randint(1, 10)}
+                for m in self.random.sample(medicines, min(2, len(medicines)))
+            ]
+            self.call(pharmacist, "POST", "/api/pharmacy/create-sale/", {
+                "consultation_id": consultation_id,
+                "items": items,
+            })
+
+    def end_of_day(self, admin, receptionist, technician, pharmacist, doctor):
+        self.call(admin, "GET", "/api/admin/bills/")
+        self.call(admin, "GET", "/api/admin/patient-history/")
+        self.call(receptionist, "GET", "/api/receptionist/bills/")
+        self.call(technician, "GET", "/api/lab/completed/")
+        self.call(technician, "GET", "/api/lab/billing/")
+        self.call(pharmacist, "GET", "/api/pharmacy/sales/")
+        self.call(doctor, "GET", "/api/doctor/consultations/")
+        self.call(doctor, "GET", "/api/doctor/lab-results/")
+
+    def report(self):
+        rows = []
+        for key, samples in self.timings.items():
+            samples = sorted(samples)
+            rows.append({
+                "endpoint": key,
+                "count": len(samples),
+                "errors": self.errors.get(key, 0),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "max": samples[-1],
+            })
+        return sorted(rows, key=lambda row: row["p95"], reverse=True)
+
+
+def percentile(sorted_samples, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    rank = max(1, -(-len(sorted_samples) * pct // 100))
+    return sorted_samples[int(rank) - 1]
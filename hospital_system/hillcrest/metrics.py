@@ -0,0 +1,363 @@
+# hillcrest/metrics.py
+"""
+Request metrics in the Prometheus text format, and a slow-request log.
+
+MetricsMiddleware records, for every request, under the labels
+(view, action, method, status):
+
+    hillcrest_http_request_duration_seconds   histogram
+    hillcrest_http_queries_total              SQL statements
+    hillcrest_http_sql_seconds_total          time spent in SQL
+    hillcrest_http_serializer_seconds_total   time in serializer .data
+    hillcrest_http_response_bytes_total       body size (not streams)
+
+``view`` is the view class (or function) name, ``action`` the viewset
+action or the lowercased method. Queries are counted by an
+execute_wrapper installed once on each database connection, which adds
+to the current request's recorder (a context variable, so it follows
+the request into sync_to_async threads). Serializer time is measured by
+wrapping DRF's BaseSerializer.data once, counting only the outermost
+call. The middleware runs natively under both WSGI and ASGI.
+
+Everything is aggregated in process memory under one lock, so a request
+costs a few dict updates. With several workers, set METRICS_DIR. Each
+process then writes its totals to <METRICS_DIR>/<pid>-<start>.json at
+most every METRICS_FLUSH_SECONDS. /metrics adds up the files of every
+process plus its own live totals. Files of exited workers are kept so
+the counters never go backwards. Empty the directory when the
+service is restarted. Prometheus' own client is not a dependency here,
+so the text format is written by render().
+
+Requests slower than SLOW_REQUEST_SECONDS are logged to
+"hillcrest.slow_requests", with each SQL statement and its time.
+
+/metrics is closed by default: it needs METRICS_TOKEN as a bearer token,
+a client address in METRICS_ALLOWED_IPS, or DEBUG.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger("hillcrest.slow_requests")
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# SQL kept per request for the slow log
+MAX_CAPTURED_QUERIES = 200
+
+LABELS = ("view", "action", "method", "status")
+# (name, help, field in a series)
+COUNTERS = [
+    ("hillcrest_http_queries_total", "SQL statements executed.", "queries"),
+    ("hillcrest_http_sql_seconds_total", "Time spent executing SQL.", "sql_seconds"),
+    ("hillcrest_http_serializer_seconds_total", "Time spent in serializer .data.", "serializer_seconds"),
+    ("hillcrest_http_response_bytes_total", "Response body bytes (streams excluded).", "response_bytes"),
+]
+
+
+def _series():
+    return {
+        "count": 0,
+        "buckets": [0] * len(BUCKETS),
+        "seconds": 0.0,
+        "queries": 0,
+        "sql_seconds": 0.0,
+        "serializer_seconds": 0.0,
+        "response_bytes": 0,
+    }
+
+
+class Store:
+    """
+    In-process totals per label tuple, optionally flushed to a
+    per-process file for a multi-worker /metrics.
+    """
+
+    def __init__(self, directory=None, flush_seconds=5.0):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self.filename = f"{os.getpid()}-{time.time_ns()}.json"
+        self._lock = threading.Lock()
+        self._series = defaultdict(_series)
+        self._flushed_at = float("-inf")
+
+    def record(self, labels, seconds, queries, sql_seconds, serializer_seconds, response_bytes):
+        with self._lock:
+            series = self._series[labels]
+            series["count"] += 1
+            series["seconds"] += seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    series["buckets"][i] += 1
+                    break
+            series["queries"] += queries
+            series["sql_seconds"] += sql_seconds
+            series["serializer_seconds"] += serializer_seconds
+            series["response_bytes"] += response_bytes
+
+            now = time.monotonic()
+            if not self.directory or now - self._flushed_at < self.flush_seconds:
+                return
+            self._flushed_at = now
+            snapshot = self._dump()
+        self._write(snapshot)
+
+    def _dump(self):
+        return json.dumps([[list(labels), dict(series)] for labels, series in self._series.items()])
+
+    def _write(self, snapshot):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, self.filename)
+        with open(path + ".tmp", "w") as f:
+            f.write(snapshot)
+        os.replace(path + ".tmp", path)
+
+    def collect(self):
+        """
+        {labels: series} summed over this process and every other
+        process's file.
+        """
+        with self._lock:
+            totals = defaultdict(_series)
+            for labels, series in json.loads(self._dump()):
+                totals[tuple(labels)] = series
+        if not self.directory or not os.path.isdir(self.directory):
+            return totals
+        for name in os.listdir(self.directory):
+            if name == self.filename or not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue  # being replaced right now; picked up next scrape
+            for labels, series in rows:
+                total = totals[tuple(labels)]
+                for key, value in series.items():
+                    if key == "buckets":
+                        total[key] = [a + b for a, b in zip(total[key], value)]
+                    else:
+                        total[key] += value
+        return totals
+
+    def flush(self):
+        if not self.directory:
+            return
+        with self._lock:
+            snapshot = self._dump()
+        self._write(snapshot)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+store = Store(getattr(settings, "METRICS_DIR", None), getattr(settings, "METRICS_FLUSH_SECONDS", 5.0))
+# the last few seconds of a worker that exits cleanly
+atexit.register(store.flush)
+
+
+# ---------------------------------------------------------
+# Serializer timing
+# ---------------------------------------------------------
+_serializer_time = contextvars.ContextVar("serializer_time", default=None)
+_original_data = BaseSerializer.data
+
+
+def serializing(func, *args):
+    """
+    func(*args), counted as serializer time of the current request. For
+    serialization that bypasses .data (hillcrest/fastread.py).
+    """
+    timer = _serializer_time.get()
+    if timer is None or timer[1]:
+        # outside a request, or nested inside an outer .data
+        return func(*args)
+    timer[1] = True
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timer[0] += time.perf_counter() - start
+        timer[1] = False
+
+
+def _timed_data(self):
+    return serializing(_original_data.fget, self)
+
+
+def instrument_serializers():
+    if BaseSerializer.data is _original_data:
+        BaseSerializer.data = property(_timed_data)
+
+
+# ---------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------
+_queries = contextvars.ContextVar("queries", default=None)
+
+
+class _QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.captured = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.captured) < MAX_CAPTURED_QUERIES:
+                self.captured.append((sql, elapsed))
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _queries.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _instrument_connection(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+# connections opened from now on, in any thread
+connection_created.connect(_instrument_connection)
+
+
+def _view_labels(view_func, method):
+    view_class = getattr(view_func, "cls", None)
+    name = view_class.__name__ if view_class else getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None) or {}
+    return name, actions.get(method.lower(), method.lower())
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instrument_serializers()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # a connection opened before this module was imported
+        _instrument_connection(connection)
+        queries, timer, tokens = self.start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(tokens)
+        return self.finish(request, response, time.perf_counter() - start, queries, timer)
+
+    async def __acall__(self, request):
+        queries, timer, tokens = self.start()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(tokens)
+        return self.finish(request, response, time.perf_counter() - start, queries, timer)
+
+    def start(self):
+        queries = _QueryRecorder()
+        timer = [0.0, False]
+        return queries, timer, (_queries.set(queries), _serializer_time.set(timer))
+
+    def stop(self, tokens):
+        _queries.reset(tokens[0])
+        _serializer_time.reset(tokens[1])
+
+    def finish(self, request, response, seconds, queries, timer):
+        view, action = getattr(request, "_metrics_view", ("unmatched", request.method.lower()))
+        size = 0 if response.streaming else len(response.content)
+        store.record(
+            (view, action, request.method, str(response.status_code)),
+            seconds, queries.count, queries.seconds, timer[0], size,
+        )
+        if seconds >= settings.SLOW_REQUEST_SECONDS:
+            self.log_slow(request, response, view, action, seconds, queries, timer[0])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = _view_labels(view_func, request.method)
+
+    def log_slow(self, request, response, view, action, seconds, queries, serializer_seconds):
+        lines = [
+            f"{request.method} {request.get_full_path()} -> {response.status_code} "
+            f"in {seconds * 1000:.0f} ms ({view}.{action}): {queries.count} queries, "
+            f"{queries.seconds * 1000:.0f} ms SQL, {serializer_seconds * 1000:.0f} ms serializers"
+        ]
+        lines += [f"  {elapsed * 1000:8.2f} ms  {sql}" for sql, elapsed in queries.captured]
+        if queries.count > len(queries.captured):
+            lines.append(f"  ... {queries.count - len(queries.captured)} more")
+        logger.warning("\n".join(lines))
+
+
+# ---------------------------------------------------------
+# /metrics
+# ---------------------------------------------------------
+def _label_text(labels, le=None):
+    pairs = [f'{name}="{value}"' for name, value in zip(LABELS, labels)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def render(totals):
+    name = "hillcrest_http_request_duration_seconds"
+    lines = [f"# HELP {name} Request latency.", f"# TYPE {name} histogram"]
+    for labels, series in sorted(totals.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, series["buckets"]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_label_text(labels, bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_label_text(labels, '+Inf')} {series['count']}")
+        lines.append(f"{name}_sum{_label_text(labels)} {series['seconds']}")
+        lines.append(f"{name}_count{_label_text(labels)} {series['count']}")
+    for metric, description, field in COUNTERS:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+        lines += [f"{metric}{_label_text(labels)} {series[field]}" for labels, series in sorted(totals.items())]
+    return "\n".join(lines) + "\n"
+
+
+def _may_scrape(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.headers.get("Authorization") == f"Bearer {token}":
+        return True
+    if request.META.get("REMOTE_ADDR") in getattr(settings, "METRICS_ALLOWED_IPS", ()):
+        return True
+    return settings.DEBUG
+
+
+def metrics_view(request):
+    """
+    GET /metrics in the Prometheus text format, for a scraper sending
+    "Authorization: Bearer <METRICS_TOKEN>", one at an address in
+    METRICS_ALLOWED_IPS, or anyone when DEBUG is on. Otherwise 403.
+    """
+    if not _may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(store.collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
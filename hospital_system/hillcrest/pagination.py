@@ -0,0 +1,68 @@
+# hillcrest/pagination.py
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+class ClinicPageNumberPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class ClinicCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id), newest first. Models without
+    created_at fall back to the primary key.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        field_names = {f.name for f in queryset.model._meta.get_fields()}
+        if "created_at" in field_names:
+            return self.ordering
+        return ("-pk",)
+
+
+class OptInPagination(BasePagination):
+    """
+    Project-wide list pagination that existing clients must ask for:
+
+        ?page=N[&page_size=M]                 page-number mode
+        ?paginate=cursor or ?cursor=<token>   keyset mode
+
+    Without these params the full list is returned exactly as before.
+    """
+    page_number_class = ClinicPageNumberPagination
+    cursor_class = ClinicCursorPagination
+
+    def __init__(self):
+        self.delegate = None
+
+    def get_delegate(self, request):
+        params = request.query_params
+        if params.get("paginate") == "cursor" or "cursor" in params:
+            return self.cursor_class()
+        if params.get("paginate") == "page" or "page" in params or "page_size" in params:
+            return self.page_number_class()
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.delegate = self.get_delegate(request)
+        if self.delegate is None:
+            return None
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return self.page_number_class().get_schema_operation_parameters(view)
@@ -0,0 +1,62 @@
+# hillcrest/params.py
+"""
+Query-string parameters shared by report, search and export views.
+
+Bad input raises DRF's ValidationError, so the view answers 400 with
+{"<param>": ["..."]} instead of a 500 from a ValueError deep inside
+parse_date() or the ORM.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def date_param(params, name):
+    """
+    The date in ?<name>=YYYY-MM-DD, or None when it is absent or blank.
+    """
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:  # well-formed but impossible, e.g. 2024-02-30
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: [f"Enter a valid date as YYYY-MM-DD, not {value!r}."]})
+    return parsed
+
+
+def id_param(params, name):
+    """
+    The integer id in ?<name>=, or None when it is absent or blank.
+    """
+    value = (params.get(name) or "").strip()
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValidationError({name: [f"Enter a numeric id, not {value!r}."]})
+    return int(value)
+
+
+def date_range(params):
+    """
+    (from, to) dates from ?from=&to=, both inclusive; either may be None.
+    """
+    since, until = date_param(params, "from"), date_param(params, "to")
+    if since and until and since > until:
+        raise ValidationError({"from": ["Must not be after 'to'."]})
+    return since, until
+
+
+def day_bounds(since, until):
+    """
+    Aware datetimes covering the local dates ``since``..``until``
+    inclusive: (start of since, start of the day after until). Either
+    end may be None.
+    """
+    start = timezone.make_aware(datetime.combine(since, time.min)) if since else None
+    end = timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min)) if until else None
+    return start, end
@@ -0,0 +1,47 @@
+# hillcrest/prefix.py
+"""
+Index-friendly prefix matching on normalized search keys.
+
+A prefix match is written as a range, key >= "abc" AND key < "abd",
+which every backend answers from the column's index. The upper bound
+must sort after every key starting with the prefix under the column's
+collation, not just by code point. MySQL's default utf8mb4_0900_ai_ci
+puts ':' and '{' before the digits and letters, so "…9" -> "…:" or
+"…z" -> "…{" would be an empty range there.
+
+The bound is therefore taken within 0-9a-z, which sorts the same way
+under a binary and a UCA collation: the last character is stepped to
+the next one ("…9" -> "…a"), and a trailing "z" carries into the
+character before it ("abz" -> "ac"). When there is no such bound (the
+prefix ends in something else, or is all "z") the range is open at the
+top. A startswith condition is always added on top, so the rows are
+exactly the prefix matches; the range is only there to use the index.
+"""
+from django.db.models import Q
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def upper_bound(prefix):
+    """
+    A key that sorts after every key starting with ``prefix``, or None.
+    """
+    for i in range(len(prefix) - 1, -1, -1):
+        char = prefix[i]
+        if char == ALPHABET[-1]:
+            continue
+        if char not in ALPHABET:
+            return None
+        return prefix[:i] + ALPHABET[ALPHABET.index(char) + 1]
+    return None
+
+
+def prefix_match(field, prefix):
+    """
+    Q for ``field`` starting with ``prefix`` (already normalized).
+    """
+    condition = Q(**{f"{field}__gte": prefix, f"{field}__startswith": prefix})
+    upper = upper_bound(prefix)
+    if upper is not None:
+        condition &= Q(**{f"{field}__lt": upper})
+    return condition
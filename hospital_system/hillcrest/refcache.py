@@ -0,0 +1,150 @@
+# hillcrest/refcache.py
+"""
+Versioned cache for reference data: departments, doctors, lab test
+types and medicines. Almost every screen loads these lists, but they
+rarely change.
+
+Each dataset has a version counter in the "refdata" cache. Saving or
+deleting a model the dataset depends on bumps the counter after the
+transaction commits. Nothing is ever deleted: responses are cached
+under the current version, so after a bump the old entries are simply
+never read again.
+
+Responses carry ETag "<dataset>.<version>". A client that sends it back
+in If-None-Match gets a 304 without touching the database.
+
+The backend is whatever CACHES["refdata"] names. locmem is per process,
+so a bump in one worker is invisible to the others. The counters and
+responses therefore expire with the alias's TIMEOUT, kept short by
+default: another worker serves stale data (medicine stock included)
+for at most that long, then restarts its counter from the clock. With
+a shared backend (FileBasedCache on one host, or RedisCache) every
+worker sees each bump at once, and TIMEOUT can be raised to hours.
+
+Writes that bypass model signals (queryset.update(), bulk_create, raw
+SQL) must call invalidate() themselves.
+"""
+import time
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+CACHE_ALIAS = "refdata"
+
+# dataset -> models whose rows appear in it
+DATASETS = {
+    "departments": ["admin_panel.Department"],
+    "doctors": ["admin_panel.User", "admin_panel.Department"],
+    "lab_test_types": ["labtech.LabTestType"],
+    "medicines": ["pharmacist.Medicine"],
+}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(dataset):
+    return f"refdata:version:{dataset}"
+
+
+def version(dataset):
+    """
+    Current version of ``dataset``. A missing counter (cold cache, evicted
+    or expired) restarts from the clock, so it never reuses an old number.
+    """
+    cache = _cache()
+    current = cache.get(_version_key(dataset))
+    if current is None:
+        cache.add(_version_key(dataset), time.time_ns() // 1000)
+        current = cache.get(_version_key(dataset))
+    return current
+
+
+def invalidate(*datasets):
+    """
+    Bump the version of each dataset (all when none is given).
+    """
+    cache = _cache()
+    for dataset in datasets or DATASETS:
+        try:
+            cache.incr(_version_key(dataset))
+        except ValueError:
+            cache.add(_version_key(dataset), time.time_ns() // 1000)
+
+
+def invalidate_on_commit(*datasets):
+    """
+    Bump once the current transaction commits. Bumping earlier would let
+    a concurrent reader cache the old rows under the new version.
+    """
+    transaction.on_commit(lambda: invalidate(*datasets))
+
+
+def etag(dataset):
+    return quote_etag(f"{dataset}.{version(dataset)}")
+
+
+def cached_response(request, dataset, build):
+    """
+    Serve ``build()`` (a DRF Response) through the cache for ``dataset``.
+    The full path is part of the key, so query strings such as ?q= and
+    pagination cursors get their own entries.
+    """
+    tag = etag(dataset)
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+
+    if tag in parse_etags(request.headers.get("If-None-Match", "")):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache = _cache()
+    key = f"refdata:{dataset}:{tag}:{request.get_full_path()}"
+    data = cache.get(key)
+    if data is None:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        data = response.data
+        cache.set(key, data)
+    return Response(data, headers=headers)
+
+
+class ReferenceDataMixin:
+    """
+    For list views over reference data: set ``reference_dataset``.
+    """
+    reference_dataset = None
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            self.reference_dataset,
+            lambda: super(ReferenceDataMixin, self).list(request, *args, **kwargs),
+        )
+
+
+def _bump(datasets):
+    def receiver(sender, instance, update_fields=None, **kwargs):
+        # logins only touch last_login, which no dataset shows
+        if update_fields is not None and set(update_fields) <= {"last_login"}:
+            return
+        invalidate_on_commit(*datasets)
+    return receiver
+
+
+_receivers = []
+
+
+def connect_signals():
+    for label in {label for labels in DATASETS.values() for label in labels}:
+        model = apps.get_model(label)
+        datasets = [name for name, labels in DATASETS.items() if label in labels]
+        receiver = _bump(datasets)
+        _receivers.append(receiver)  # signals hold weak references
+        post_save.connect(receiver, sender=model, dispatch_uid=f"refcache:save:{label}")
+        post_delete.connect(receiver, sender=model, dispatch_uid=f"refcache:delete:{label}")
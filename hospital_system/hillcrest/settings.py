@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -45,10 +46,15 @@ INSTALLED_APPS = [
     'doctor',
     'labtech',
     'pharmacist',
+    'notifications',
+    'ledger',
+    'analytics',
 ]
 
 
 MIDDLEWARE = [
+    # outermost, so the latency covers the other middleware too
+    'hillcrest.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
 
@@ -144,11 +150,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # request.user from the token's claims, no query (admin_panel/authentication.py)
+        "admin_panel.authentication.ClaimsJWTAuthentication",
     ],
+    # role x action matrix; views name a policy_resource (admin_panel/policy.py)
     "DEFAULT_PERMISSION_CLASSES": [
-        "rest_framework.permissions.IsAuthenticated",
-    ]
+        "admin_panel.policy.Policy",
+    ],
+    # opt-in: lists are only paginated when ?page= / ?cursor= is sent
+    "DEFAULT_PAGINATION_CLASS": "hillcrest.pagination.OptInPagination",
 }
 
 
@@ -163,3 +173,92 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 AUTH_USER_MODEL = 'admin_panel.User'
 
+
+# Patient IDs reserved per database round-trip. 1 keeps PT numbers gapless;
+# larger blocks cut contention under heavy registration but leave gaps when
+# a worker restarts.
+PATIENT_ID_BLOCK_SIZE = 1
+
+# Appointment token numbering (see receptionist/tokens.py).
+APPOINTMENT_TOKENS = {
+    "FORMAT": "T{number:03d}",
+    "SCOPE": "doctor",
+    "RESET": "daily",
+}
+
+# "refdata" holds cached reference lists (see hillcrest/refcache.py).
+# locmem is per process, so a change made through one worker reaches the
+# others only when their entries expire: keep TIMEOUT short with it.
+# With several workers prefer a shared backend, and a longer TIMEOUT, e.g.
+#   "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+#   "LOCATION": "/var/tmp/hillcrest-refdata",
+# or "django.core.cache.backends.redis.RedisCache" with
+#   "LOCATION": "redis://127.0.0.1:6379/1".
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "refdata": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "refdata",
+        "TIMEOUT": 30,
+    },
+    # revoked access tokens (see admin_panel/authentication.py); locmem
+    # is per process, so share it the same way as "refdata" whenever
+    # WEB_CONCURRENCY is above 1 (manage.py check fails until then)
+    "revocations": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "revocations",
+    },
+}
+
+# Web server worker processes; gunicorn and uvicorn read the same
+# variable.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+# Doctor queue snapshots and their version counters live in the default
+# cache (see doctor/queue.py). With the per-process locmem default, a
+# change made through another worker shows up after at most this long.
+DOCTOR_QUEUE_CACHE_SECONDS = 10
+
+# Per-patient lab trends and their versions, also in the default cache
+# (see labtech/trends.py): another worker's new results show up after at
+# most this long.
+LAB_TREND_CACHE_SECONDS = 30
+
+# A technician's claim on a lab request lapses after this long, and the
+# sample goes back to the worklist (see labtech/worklist.py).
+LAB_CLAIM_TIMEOUT_MINUTES = 30
+
+# update_rollups leaves rows younger than this for its next run, so
+# transactions still open when it starts are not skipped
+# (see analytics/rollups.py).
+ROLLUP_LAG_SECONDS = 60
+
+# Request metrics served at /metrics (see hillcrest/metrics.py). Without a
+# directory each worker only reports its own requests; with several
+# workers point every one at the same writable directory, e.g.
+# "/var/tmp/hillcrest-metrics", and empty it on restart.
+METRICS_DIR = None
+METRICS_FLUSH_SECONDS = 5
+# /metrics answers a scraper sending "Authorization: Bearer <METRICS_TOKEN>"
+# or connecting from one of METRICS_ALLOWED_IPS (e.g. ["10.0.0.5"]), and
+# anyone while DEBUG is on; everyone else gets 403. Behind a reverse proxy
+# on the same host every client appears as 127.0.0.1, so do not list it
+# there.
+METRICS_TOKEN = ""
+METRICS_ALLOWED_IPS = []
+# Requests at least this slow are logged with their SQL to
+# "hillcrest.slow_requests".
+SLOW_REQUEST_SECONDS = 1.0
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "hillcrest.slow_requests": {"handlers": ["console"], "level": "WARNING"},
+    },
+}
@@ -0,0 +1,61 @@
+# hillcrest/sse.py
+"""
+Helpers for Server-Sent Events views.
+
+EventSource cannot send an Authorization header, so stream views take
+the JWT access token as ?token=. Streams only make sense under an ASGI
+server (uvicorn/daphne hillcrest.asgi:application); under WSGI Django
+buffers an async iterator in full, and an endless stream never returns.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from admin_panel.authentication import ClaimsJWTAuthentication
+
+HEARTBEAT = ": keep-alive\n\n"
+
+
+def _authenticate(raw_token):
+    auth = ClaimsJWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        return None
+
+
+async def authenticate(request):
+    """
+    The user for ?token= (or an Authorization header), or None.
+    """
+    raw = request.GET.get("token")
+    if not raw:
+        header = request.headers.get("Authorization", "")
+        raw = header[7:] if header.startswith("Bearer ") else ""
+    if not raw:
+        return None
+    return await sync_to_async(_authenticate)(raw)
+
+
+def event(data, name=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if name:
+        lines.append(f"event: {name}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_response(events):
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+    return response
+
+
+def denied(status=401, detail="Authentication credentials were not provided."):
+    return JsonResponse({"detail": detail}, status=status)
@@ -0,0 +1,564 @@
+# hillcrest/synthetic.py
+"""
+Bulk generator for realistic clinic volumes, used by the
+generate_clinic_data command and by the benchmark commands.
+
+Rows are written with bulk_create and primary keys assigned up front, so
+a consultation can point at its appointment without reading ids back
+(MySQL does not return them from a bulk insert). Ids start after the
+current MAX(id), so run it against a database nobody else is writing to.
+"""
+import json
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from admin_panel.models import Department, User
+from admin_panel.sequences import reserve
+from doctor.models import Consultation, ConsultationTerm, PrescriptionItem
+from doctor.search import build_postings
+from hillcrest import refcache
+from labtech import trends
+from labtech.models import Bill as LabBill, LabResultValue, LabTestRequest, LabTestResult, LabTestType
+from labtech.parameters import CATALOG, normalize
+from labtech.results import value_rows
+from ledger import posting
+from ledger.models import LedgerEntry
+from pharmacist.models import ActivePrescription, Medicine, PharmacySale, PharmacySaleItem
+from receptionist.models import (
+    Appointment, Bill, Patient, Vitals, _last_patient_number, fold_name, normalize_phone,
+)
+from receptionist.tokens import sequence_name, token_settings
+
+DEPARTMENTS = {
+    "General Medicine": 300,
+    "Pediatrics": 400,
+    "Cardiology": 800,
+    "Orthopedics": 600,
+    "Dermatology": 500,
+    "ENT": 400,
+    "Gynecology": 600,
+}
+
+STAFF_PREFIXES = {
+    "RECEPTIONIST": "recp",
+    "LAB_TECHNICIAN": "lab",
+    "PHARMACIST": "pharm",
+    "ADMIN": "admin",
+}
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Arjun", "Reyansh", "Sai", "Krishna", "Ishaan",
+    "Ananya", "Diya", "Aadhya", "Saanvi", "Meera", "Kavya", "Lakshmi", "Fatima",
+    "Mohammed", "Joseph", "Maria", "Priya", "Rahul", "Sneha", "Vikram", "Nisha",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Iyer", "Nair", "Menon", "Reddy", "Khan", "Das", "Patel",
+    "Pillai", "Joseph", "Thomas", "Gupta", "Rao", "Singh", "Kumar",
+]
+
+DIAGNOSES = [
+    ("Viral fever", "Fever for 3 days, body ache. Advised rest and fluids."),
+    ("Dengue fever", "High fever, low platelets suspected. Monitor platelet count."),
+    ("Typhoid", "Step-ladder fever, abdominal discomfort. Widal advised."),
+    ("Hypertension", "BP elevated on two readings. Low salt diet advised."),
+    ("Type 2 diabetes mellitus", "Raised fasting sugar. Diet counselling given."),
+    ("Migraine", "Unilateral throbbing headache with photophobia."),
+    ("Acute gastritis", "Epigastric pain after meals. Avoid spicy food."),
+    ("Upper respiratory tract infection", "Sore throat, cough, mild fever."),
+    ("Urinary tract infection", "Burning micturition. Urine culture advised."),
+    ("Bronchial asthma", "Wheeze on exertion. Inhaler technique explained."),
+    ("Iron deficiency anaemia", "Fatigue and pallor. Hb check advised."),
+    ("Lumbar strain", "Low back pain after lifting. Physiotherapy advised."),
+]
+
+MEDICINES = [
+    ("Paracetamol 500mg", "Paracetamol", "2.00"),
+    ("Amoxicillin 500mg", "Amoxicillin", "8.50"),
+    ("Azithromycin 500mg", "Azithromycin", "22.00"),
+    ("Cetirizine 10mg", "Cetirizine", "1.50"),
+    ("Pantoprazole 40mg", "Pantoprazole", "6.00"),
+    ("Metformin 500mg", "Metformin", "3.00"),
+    ("Amlodipine 5mg", "Amlodipine", "4.00"),
+    ("Ibuprofen 400mg", "Ibuprofen", "3.50"),
+    ("Salbutamol Inhaler", "Salbutamol", "145.00"),
+    ("Ferrous Sulphate 200mg", "Ferrous sulphate", "1.20"),
+    ("ORS Sachet", "Oral rehydration salts", "18.00"),
+    ("Ondansetron 4mg", "Ondansetron", "5.50"),
+]
+
+# test type -> price; what each test measures comes from the backend
+# catalogue in labtech/parameters.py
+LAB_PRICES = {
+    "BLOOD_TEST": "350.00",
+    "URINE_TEST": "200.00",
+    "LIVER_FUNCTION_TEST": "650.00",
+    "KIDNEY_FUNCTION_TEST": "600.00",
+}
+
+TIMESTAMPED_MODELS = [
+    Patient, Appointment, Bill, Vitals, Consultation,
+    LabTestRequest, LabTestResult, LabBill, PharmacySale,
+]
+
+
+class IdBlock:
+    """
+    Hands out primary keys after the table's current maximum.
+    """
+
+    def __init__(self, model):
+        self.next = (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+    def take(self):
+        value = self.next
+        self.next += 1
+        return value
+
+
+@contextmanager
+def explicit_timestamps(models):
+    """
+    Let bulk_create keep the created_at/updated_at values we set instead
+    of stamping every row with now().
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+class ClinicGenerator:
+    """
+    Generates ``patients`` patients with about ``visits_per_patient``
+    visits each, spread over the last ``days`` days of clinic hours.
+
+    Every visit gets a billed appointment and vitals. Finished visits
+    also get a consultation with prescriptions, a lab request (with
+    result and lab bill) for roughly a third of them, and a pharmacy
+    sale for most of the rest. Visits from the last two hours are left
+    in the doctors' queues.
+    """
+
+    def __init__(
+        self,
+        patients=1000,
+        days=30,
+        visits_per_patient=2.0,
+        doctors_per_department=3,
+        staff_per_role=3,
+        batch_size=2000,
+        password="hillcrest123",
+        seed=None,
+        log=None,
+    ):
+        self.patients = patients
+        self.days = days
+        self.visits_per_patient = visits_per_patient
+        self.doctors_per_department = doctors_per_department
+        self.staff_per_role = staff_per_role
+        self.batch_size = batch_size
+        self.password = password
+        self.random = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    # ------------------------------------------------------------------
+    def run(self):
+        with transaction.atomic():
+            self.create_reference_data()
+            self.create_staff()
+            with explicit_timestamps(TIMESTAMPED_MODELS):
+                self.create_visits()
+            self.reset_sequences()
+        return self.counts
+
+    def count(self, name, rows):
+        self.counts[name] = self.counts.get(name, 0) + rows
+
+    # ------------------------------------------------------------------
+    def create_reference_data(self):
+        self.departments = [
+            Department.objects.get_or_create(name=name)[0] for name in DEPARTMENTS
+        ]
+        self.fees = {d.id: DEPARTMENTS[d.name] for d in self.departments}
+
+        self.test_prices = {}
+        for name, price in LAB_PRICES.items():
+            test_type, _ = LabTestType.objects.get_or_create(
+                name=name, defaults={"price": Decimal(price)}
+            )
+            self.test_prices[name] = test_type.price
+
+        self.medicines = []
+        for name, generic, price in MEDICINES:
+            medicine, _ = Medicine.objects.get_or_create(
+                name=name,
+                defaults={
+                    "generic_name": generic,
+                    "unit_price": Decimal(price),
+                    "stock_quantity": 1_000_000,
+                },
+            )
+            self.medicines.append(medicine)
+
+    def create_staff(self):
+        run = reserve("synthetic_run")
+        password = make_password(self.password)  # hash once, share it
+        users = []
+
+        def add(role, prefix, n, department=None):
+            users.append(User(
+                username=f"syn{run}_{prefix}{n:03d}",
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=self.random.choice(LAST_NAMES),
+                role=role,
+                department=department,
+                password=password,
+            ))
+
+        n = 0
+        for department in self.departments:
+            for _ in range(self.doctors_per_department):
+                n += 1
+                add("DOCTOR", "doc", n, department)
+        for role, prefix in STAFF_PREFIXES.items():
+            for i in range(1, self.staff_per_role + 1):
+                add(role, prefix, i)
+
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        refcache.invalidate_on_commit("doctors")  # bulk_create sends no signals
+        staff = {
+            u.username: u
+            for u in User.objects.filter(username__startswith=f"syn{run}_").select_related("department")
+        }
+        self.doctors = [u for u in staff.values() if u.role == "DOCTOR"]
+        self.staff = {
+            role: [u for u in staff.values() if u.role == role] for role in STAFF_PREFIXES
+        }
+        self.count("users", len(users))
+
+    # ------------------------------------------------------------------
+    def visit_times(self):
+        """
+        Sorted visit timestamps during clinic hours (09:00-18:00).
+        """
+        now = timezone.now()
+        today = timezone.localdate()
+        total = max(1, round(self.patients * self.visits_per_patient))
+        times = []
+        for _ in range(total):
+            day = today - timedelta(days=self.random.randrange(self.days))
+            opening = timezone.make_aware(datetime.combine(day, time(9)))
+            moment = opening + timedelta(seconds=self.random.randrange(9 * 3600))
+            times.append(min(moment, now))
+        return sorted(times)
+
+    def create_visits(self):
+        times = self.visit_times()
+        patients = min(self.patients, len(times))
+        first = reserve("patient_id", patients, initial=_last_patient_number) - patients + 1
+
+        # each patient is registered at their first visit; later visits
+        # pick a random already-registered patient
+        ids = {
+            model: IdBlock(model)
+            for model in [
+                Patient, Appointment, Bill, Vitals, Consultation, PrescriptionItem,
+                LabTestRequest, LabTestResult, LabBill, PharmacySale, PharmacySaleItem,
+            ]
+        }
+        self.ids = ids
+        registered = []
+        first_visits = {0, *self.random.sample(range(1, len(times)), patients - 1)}
+        token_conf = token_settings()
+        self.now = timezone.now()
+
+        for start in range(0, len(times), self.batch_size):
+            rows = {model: [] for model in [*ids, LabResultValue]}
+            tokens = {}
+            for index in range(start, min(start + self.batch_size, len(times))):
+                moment = times[index]
+                if index in first_visits:
+                    patient = self.new_patient(ids[Patient].take(), first + len(registered), moment)
+                    rows[Patient].append(patient)
+                    registered.append(patient.id)
+                    patient_id = patient.id
+                else:
+                    patient_id = self.random.choice(registered)
+
+                doctor = self.random.choice(self.doctors)
+                key = sequence_name(
+                    doctor.id, doctor.department_id, timezone.localtime(moment).date(), token_conf
+                )
+                tokens.setdefault(key, []).append(len(rows[Appointment]))
+                self.add_visit(rows, patient_id, doctor, moment, done=moment < self.now - timedelta(hours=2))
+
+            self.assign_tokens(rows[Appointment], tokens, token_conf)
+            rows[ConsultationTerm] = self.index_consultations(rows)
+            rows[ActivePrescription] = self.open_prescriptions(rows)
+            rows[LedgerEntry] = self.ledger_entries(rows)
+            self.flush(rows)
+            self.log(f"  {min(start + self.batch_size, len(times))}/{len(times)} visits")
+
+    def new_patient(self, pk, number, moment):
+        full_name = f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}"
+        phone = f"9{self.random.randrange(10**9):09d}"
+        return Patient(
+            id=pk,
+            patient_id=f"PT{number:04d}",
+            full_name=full_name,
+            age=self.random.randint(1, 90),
+            gender=self.random.choice(["Male", "Female"]),
+            blood_group=self.random.choice(["A+", "B+", "O+", "AB+", "O-", "A-"]),
+            contact_number=phone,
+            address=f"{self.random.randint(1, 300)}, MG Road",
+            created_at=moment,
+            # bulk_create skips Patient.save(), so fill the search keys here
+            contact_digits=normalize_phone(phone),
+            search_name=fold_name(full_name),
+        )
+
+    def add_visit(self, rows, patient_id, doctor, moment, done):
+        ids = self.ids
+        rand = self.random
+        appointment = Appointment(
+            id=ids[Appointment].take(),
+            patient_id=patient_id,
+            doctor=doctor,
+            department_id=doctor.department_id,
+            status="COMPLETED" if done else "PENDING",
+            created_at=moment,
+        )
+        rows[Appointment].append(appointment)
+        rows[Bill].append(Bill(
+            id=ids[Bill].take(),
+            appointment_id=appointment.id,
+            consultation_fee=self.fees[doctor.department_id],
+            created_at=moment,
+        ))
+        rows[Vitals].append(Vitals(
+            id=ids[Vitals].take(),
+            patient_id=patient_id,
+            height=str(rand.randint(140, 190)),
+            weight=str(rand.randint(40, 100)),
+            blood_pressure=f"{rand.randint(100, 150)}/{rand.randint(60, 95)}",
+            heart_rate=rand.randint(60, 110),
+            oxygen_saturation=rand.randint(93, 100),
+            recorded_at=moment,
+        ))
+        if not done:
+            return
+
+        seen_at = moment + timedelta(minutes=rand.randint(5, 60))
+        diagnosis, notes = rand.choice(DIAGNOSES)
+        consultation = Consultation(
+            id=ids[Consultation].take(),
+            appointment_id=appointment.id,
+            doctor=doctor,
+            patient_id=patient_id,
+            diagnosis=diagnosis,
+            clinical_notes=notes,
+            refer_to_lab=rand.random() < 0.3,
+            created_at=seen_at,
+            updated_at=seen_at,
+        )
+        rows[Consultation].append(consultation)
+
+        prescribed = rand.sample(self.medicines, rand.randint(1, 3))
+        for medicine in prescribed:
+            rows[PrescriptionItem].append(PrescriptionItem(
+                id=ids[PrescriptionItem].take(),
+                consultation_id=consultation.id,
+                medicine_name=medicine.name,
+                quantity=rand.randint(1, 15),
+                dosage="1 tablet",
+                frequency=rand.choice(["1-0-1", "1-1-1", "0-0-1"]),
+                duration=f"{rand.randint(3, 10)} days",
+            ))
+
+        if consultation.refer_to_lab:
+            self.add_lab_work(rows, appointment, doctor, seen_at)
+        elif rand.random() < 0.8:
+            self.add_sale(rows, consultation, prescribed, seen_at)
+
+    def add_lab_work(self, rows, appointment, doctor, moment):
+        ids = self.ids
+        test_type = self.random.choice(list(LAB_PRICES))
+        processed_at = moment + timedelta(minutes=self.random.randint(20, 240))
+        pending = processed_at > self.now
+        lab_request = LabTestRequest(
+            id=ids[LabTestRequest].take(),
+            appointment_id=appointment.id,
+            doctor=doctor,
+            patient_id=appointment.patient_id,
+            test_type=test_type,
+            status="PENDING" if pending else "COMPLETED",
+            requested_at=moment,
+            processed_at=None if pending else processed_at,
+        )
+        rows[LabTestRequest].append(lab_request)
+        if pending:
+            return
+
+        result_id = ids[LabTestResult].take()
+        bill = LabBill(
+            id=ids[LabBill].take(),
+            patient_id=appointment.patient_id,
+            amount=self.test_prices[test_type],
+            description=f"Lab Test: {test_type}",
+            reference_id=result_id,
+            created_by=self.random.choice(self.staff["LAB_TECHNICIAN"]),
+            created_at=processed_at,
+        )
+        rows[LabBill].append(bill)
+        values = self.lab_values(test_type)
+        result = LabTestResult(
+            id=result_id,
+            lab_request_id=lab_request.id,
+            result_details=json.dumps(values),
+            technician=bill.created_by,
+            bill_id=bill.id,
+            created_at=processed_at,
+        )
+        rows[LabTestResult].append(result)
+        rows[LabResultValue].extend(value_rows(result, lab_request, values))
+
+    def lab_values(self, test_type):
+        submitted = []
+        for parameter in CATALOG[test_type]:
+            low, high = parameter.low, parameter.high
+            span = high - low
+            if self.random.random() < 0.15:
+                value = self.random.choice([low - span * 0.2, high + span * 0.3])
+            else:
+                value = self.random.uniform(low, high)
+            submitted.append({"parameter": parameter.name, "value": str(round(max(value, 0), 2))})
+        return normalize(test_type, submitted)
+
+    def add_sale(self, rows, consultation, prescribed, moment):
+        ids = self.ids
+        dispensed_at = moment + timedelta(minutes=self.random.randint(5, 45))
+        sale = PharmacySale(
+            id=ids[PharmacySale].take(),
+            patient_id=consultation.patient_id,
+            doctor_id=consultation.doctor_id,
+            consultation_id=consultation.id,
+            created_by=self.random.choice(self.staff["PHARMACIST"]),
+            status="DISPENSED",
+            created_at=dispensed_at,
+            updated_at=dispensed_at,
+        )
+        total = Decimal("0.00")
+        for medicine in prescribed:
+            quantity = self.random.randint(1, 15)
+            subtotal = medicine.unit_price * quantity
+            total += subtotal
+            rows[PharmacySaleItem].append(PharmacySaleItem(
+                id=ids[PharmacySaleItem].take(),
+                sale_id=sale.id,
+                medicine=medicine,
+                medicine_name=medicine.name,
+                quantity=quantity,
+                unit_price=medicine.unit_price,
+                subtotal=subtotal,
+            ))
+        sale.total_amount = total
+        rows[PharmacySale].append(sale)
+
+    def assign_tokens(self, appointments, tokens, conf):
+        """
+        Number this batch's appointments per token counter, advancing the
+        real counters so later bookings continue after them.
+        """
+        for key, positions in tokens.items():
+            last = reserve(key, len(positions))
+            for offset, position in enumerate(positions):
+                appointment = appointments[position]
+                appointment.token_number = conf["FORMAT"].format(
+                    number=last - len(positions) + offset + 1,
+                    doctor_id=appointment.doctor_id,
+                    department_id=appointment.department_id,
+                    date=timezone.localtime(appointment.created_at).date(),
+                )
+
+    def index_consultations(self, rows):
+        medicines = {}
+        for item in rows[PrescriptionItem]:
+            medicines.setdefault(item.consultation_id, []).append(item.medicine_name)
+        return [
+            posting
+            for consultation in rows[Consultation]
+            for posting in build_postings(consultation, medicines.get(consultation.id, []))
+        ]
+
+    def open_prescriptions(self, rows):
+        prescribed = {item.consultation_id for item in rows[PrescriptionItem]}
+        dispensed = {
+            sale.consultation_id for sale in rows[PharmacySale] if sale.status == "DISPENSED"
+        }
+        return [
+            ActivePrescription(consultation_id=c.id, created_at=c.created_at)
+            for c in rows[Consultation]
+            if c.id in prescribed and c.id not in dispensed
+        ]
+
+    def ledger_entries(self, rows):
+        appointments = {a.id: a for a in rows[Appointment]}
+        lab_requests = {r.id: r for r in rows[LabTestRequest]}
+        results = {r.id: lab_requests[r.lab_request_id] for r in rows[LabTestResult]}
+        departments = {c.id: appointments[c.appointment_id].department_id for c in rows[Consultation]}
+        entries = []
+        for bill in rows[Bill]:
+            visit = appointments[bill.appointment_id]
+            entries.append(posting.charge(
+                "CONSULTATION", bill.id, bill.consultation_fee, bill.created_at,
+                visit.department_id, visit.doctor_id, visit.patient_id,
+            ))
+        for bill in rows[LabBill]:
+            lab_request = results[bill.reference_id]
+            entries.append(posting.charge(
+                "LAB", bill.id, bill.amount, bill.created_at,
+                appointments[lab_request.appointment_id].department_id,
+                lab_request.doctor_id, bill.patient_id,
+            ))
+        for sale in rows[PharmacySale]:
+            if sale.status == "DISPENSED":
+                entries.append(posting.charge(
+                    "PHARMACY", sale.id, sale.total_amount, sale.created_at,
+                    departments[sale.consultation_id], sale.doctor_id, sale.patient_id,
+                ))
+        return entries
+
+    def flush(self, rows):
+        for model, objs in rows.items():
+            if objs:
+                model.objects.bulk_create(objs, batch_size=self.batch_size)
+                self.count(model._meta.label, len(objs))
+        # returning patients may have cached trends
+        trends.invalidate_on_commit(*{value.patient_id for value in rows[LabResultValue]})
+
+    def reset_sequences(self):
+        """
+        Backends with real sequences (PostgreSQL) do not advance them for
+        explicit ids; MySQL and SQLite return no statements here.
+        """
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self.ids))
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
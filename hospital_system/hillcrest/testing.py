@@ -0,0 +1,208 @@
+# hillcrest/testing.py
+"""
+Helpers for API-wide tests: a synthetic clinic dataset that can be grown
+step by step, and a query/time recorder for every GET endpoint routed in
+hillcrest/urls.py.
+"""
+import json
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from admin_panel.models import Department, User
+from doctor.models import Consultation, PrescriptionItem
+from hillcrest import refcache
+from labtech.models import Bill as LabBill, LabTestRequest, LabTestResult, LabTestType
+from labtech.parameters import normalize
+from labtech.results import record_values
+from pharmacist.models import Medicine, PharmacySale, PharmacySaleItem
+from receptionist.models import Appointment, Bill, Patient, Vitals
+
+
+# (role, url) for every readable route; {names} are filled from
+# ClinicDataset.url_kwargs(). POST-only routes are listed in WRITE_ONLY,
+# event streams in STREAMING.
+ENDPOINTS = [
+    ("ADMIN", "/api/me/"),
+    ("ADMIN", "/api/admin/employees/"),
+    ("ADMIN", "/api/admin/departments/"),
+    ("ADMIN", "/api/admin/patient-history/"),
+    ("ADMIN", "/api/admin/patient-history/export/"),
+    ("ADMIN", "/api/admin/bills/"),
+    ("ADMIN", "/api/admin/bills/export/?from=2020-01-01"),
+    ("ADMIN", "/api/admin/revenue/?group=date,department,source,doctor"),
+    ("ADMIN", "/api/admin/dashboard/"),
+    ("RECEPTIONIST", "/api/receptionist/patients/"),
+    ("RECEPTIONIST", "/api/receptionist/appointments/"),
+    ("RECEPTIONIST", "/api/receptionist/bills/"),
+    ("RECEPTIONIST", "/api/receptionist/vitals/"),
+    ("RECEPTIONIST", "/api/receptionist/departments/"),
+    ("RECEPTIONIST", "/api/receptionist/doctors/by-department/{department}/"),
+    ("DOCTOR", "/api/doctor/appointments/"),
+    ("DOCTOR", "/api/doctor/appointments/current/"),
+    ("DOCTOR", "/api/doctor/appointments/upcoming/"),
+    ("DOCTOR", "/api/doctor/appointments/queue/?next=5"),
+    ("DOCTOR", "/api/doctor/consultations/"),
+    ("DOCTOR", "/api/doctor/consultations/search/?q=fever"),
+    ("DOCTOR", "/api/doctor/consultations/{consultation}/"),
+    ("DOCTOR", "/api/doctor/patients/"),
+    ("DOCTOR", "/api/doctor/patients/{patient}/history/"),
+    ("DOCTOR", "/api/doctor/patients/{patient}/lab-trends/"),
+    ("DOCTOR", "/api/doctor/profile/"),
+    ("DOCTOR", "/api/doctor/lab-requests/"),
+    ("DOCTOR", "/api/doctor/lab-results/"),
+    ("DOCTOR", "/api/doctor/lab-results/{lab_request}/"),
+    ("DOCTOR", "/api/lab/test-types/"),
+    ("DOCTOR", "/api/lab/parameters/"),
+    ("DOCTOR", "/api/lab/results/abnormal/"),
+    ("LAB_TECHNICIAN", "/api/lab/pending/"),
+    ("LAB_TECHNICIAN", "/api/lab/completed/"),
+    ("LAB_TECHNICIAN", "/api/lab/process/"),
+    ("LAB_TECHNICIAN", "/api/lab/billing/"),
+    ("PHARMACIST", "/api/pharmacy/medicines/"),
+    ("PHARMACIST", "/api/pharmacy/sales/"),
+    ("PHARMACIST", "/api/pharmacy/active-prescriptions/"),
+    ("PHARMACIST", "/api/pharmacy/consultation/{consultation}/"),
+]
+
+WRITE_ONLY = [
+    "/api/login/",
+    "/api/logout/",
+    "/api/pharmacy/create-sale/",
+]
+
+# Server-Sent Event streams never finish, so they cannot be measured here.
+STREAMING = [
+    "/api/doctor/queue/stream/",
+    "/api/events/stream/",
+]
+
+
+@dataclass
+class Measurement:
+    role: str
+    url: str
+    status: int
+    queries: int
+    seconds: float
+
+
+class ClinicDataset:
+    """
+    One doctor's clinic. Every ``grow()`` call adds complete visits:
+    patient, vitals, billed appointment, consultation with prescriptions,
+    a lab request (alternately pending/completed with result and bill),
+    a pharmacy sale, plus one appointment still waiting in the queue.
+    """
+
+    def __init__(self):
+        self.department = Department.objects.create(name="General Medicine")
+        self.users = {
+            role: User.objects.create(
+                username=f"{role.lower()}-budget",
+                first_name=role.title(),
+                role=role,
+                department=self.department,
+            )
+            for role, _ in User.ROLE_CHOICES
+        }
+        LabTestType.objects.create(name="CBC", price=Decimal("350.00"))
+        self.medicines = [
+            Medicine.objects.create(name=f"Medicine {i}", unit_price=Decimal("12.50"), stock_quantity=10_000)
+            for i in range(3)
+        ]
+        self.visits = 0
+        self.last = {}
+
+    def grow(self, count):
+        doctor = self.users["DOCTOR"]
+        for _ in range(count):
+            self.visits += 1
+            patient = Patient.objects.create(
+                full_name=f"Patient {self.visits}", age=30, contact_number=f"98{self.visits:08d}"
+            )
+            Vitals.objects.create(patient=patient, heart_rate=72, blood_pressure="120/80")
+
+            appointment = Appointment.objects.create(
+                patient=patient, doctor=doctor, department=self.department, status="COMPLETED"
+            )
+            Bill.objects.create(appointment=appointment, consultation_fee=300)
+            Appointment.objects.create(
+                patient=patient, doctor=doctor, department=self.department, status="PENDING"
+            )
+
+            consultation = Consultation.objects.create(
+                appointment=appointment, doctor=doctor, patient=patient,
+                diagnosis="Viral fever", clinical_notes="Rest and fluids",
+            )
+            for medicine in self.medicines[:2]:
+                PrescriptionItem.objects.create(
+                    consultation=consultation, medicine_name=medicine.name, quantity=2
+                )
+
+            completed = self.visits % 2 == 0
+            lab_request = LabTestRequest.objects.create(
+                appointment=appointment, doctor=doctor, patient=patient, test_type="CBC",
+                status="COMPLETED" if completed else "PENDING",
+            )
+            if completed:
+                bill = LabBill.objects.create(
+                    patient=patient, amount=Decimal("350.00"), description="Lab Test: CBC",
+                    created_by=self.users["LAB_TECHNICIAN"],
+                )
+                rows = normalize("BLOOD_TEST", [{"parameter": "Hemoglobin (Hb)", "value": "9.1"}])
+                result = LabTestResult.objects.create(
+                    lab_request=lab_request, result_details=json.dumps(rows),
+                    technician=self.users["LAB_TECHNICIAN"], bill=bill,
+                )
+                record_values(result, lab_request, rows)
+                self.last["lab_request"] = lab_request.id
+
+                sale = PharmacySale.objects.create(
+                    patient=patient, doctor=doctor, consultation=consultation,
+                    created_by=self.users["PHARMACIST"], total_amount=Decimal("25.00"),
+                )
+                PharmacySaleItem.objects.create(
+                    sale=sale, medicine=self.medicines[0], medicine_name=self.medicines[0].name,
+                    quantity=2, unit_price=Decimal("12.50"), subtotal=Decimal("25.00"),
+                )
+
+            self.last["patient"] = patient.id
+            self.last["consultation"] = consultation.id
+
+    def url_kwargs(self):
+        return {"department": self.department.id, **self.last}
+
+
+def measure(user, url):
+    """
+    GET ``url`` as ``user`` and return (status, query count, seconds).
+    """
+    client = APIClient()
+    client.force_authenticate(user)
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        response = client.get(url)
+        if response.streaming:  # exports query as they are read
+            b"".join(response.streaming_content)
+        elapsed = time.perf_counter() - start
+    return response.status_code, len(ctx.captured_queries), elapsed
+
+
+def measure_endpoints(dataset, endpoints=ENDPOINTS):
+    # budgets are for cold caches; inside a test transaction the
+    # on-commit version bumps never run
+    refcache.invalidate()
+    cache.clear()
+    kwargs = dataset.url_kwargs()
+    results = []
+    for role, template in endpoints:
+        url = template.format(**kwargs)
+        status, queries, seconds = measure(dataset.users[role], url)
+        results.append(Measurement(role, template, status, queries, seconds))
+    return results
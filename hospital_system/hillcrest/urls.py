@@ -3,14 +3,19 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from django.http import JsonResponse
 
+from hillcrest.metrics import metrics_view
+
 # ADMIN PANEL
 from admin_panel.views import (
     EmployeeViewSet,
     DepartmentViewSet,
     MyTokenObtainPairView,
     CurrentUserView,
+    LogoutView,
     AdminBillListView,
     AdminPatientHistoryView,
+    AdminPatientHistoryExportView,
+    AdminBillExportView,
 )
 
 # RECEPTIONIST
@@ -29,10 +34,12 @@ from doctor.views import (
     ConsultationViewSet,
     DoctorPatientsViewSet,
     PatientHistoryView,
+    PatientLabTrendView,
     DoctorProfileView,
     DoctorLabRequestsView,
     DoctorLabResultsView,
     DoctorLabResultDetailView,
+    queue_stream,
 )
 
 # LAB
@@ -41,8 +48,16 @@ from labtech.views import (
     CompletedLabRequestsView,
     ProcessLabRequestView,
     LabBillingListView,
+    LabTestTypeListView,
+    LabParameterCatalogView,
+    AbnormalLabValuesView,
 )
 
+# NOTIFICATIONS
+from analytics.views import DashboardView
+from ledger.views import RevenueView
+from notifications.views import event_stream
+
 # PHARMACY
 from pharmacist.views import (
     MedicineViewSet,
@@ -94,13 +109,24 @@ urlpatterns = [
     path("", home),
     path("admin/", admin.site.urls),
 
+    # Prometheus scrape (see hillcrest/metrics.py)
+    path("metrics", metrics_view),
+
     # AUTH
     path("api/login/", MyTokenObtainPairView.as_view()),
     path("api/me/", CurrentUserView.as_view()),
+    path("api/logout/", LogoutView.as_view()),
+
+    # NOTIFICATIONS (Server-Sent Events)
+    path("api/events/stream/", event_stream),
 
     # ADMIN DATA
     path("api/admin/patient-history/", AdminPatientHistoryView.as_view()),
+    path("api/admin/patient-history/export/", AdminPatientHistoryExportView.as_view()),
     path("api/admin/bills/", AdminBillListView.as_view()),
+    path("api/admin/bills/export/", AdminBillExportView.as_view()),
+    path("api/admin/revenue/", RevenueView.as_view()),
+    path("api/admin/dashboard/", DashboardView.as_view()),
 
     # RECEPTIONIST DROPDOWNS
     path("api/receptionist/departments/", DepartmentListView.as_view()),
@@ -109,7 +135,13 @@ urlpatterns = [
         DoctorListByDepartmentView.as_view(),
     ),
 
+    # LAB TEST CATALOGUE
+    path("api/lab/test-types/", LabTestTypeListView.as_view()),
+    path("api/lab/parameters/", LabParameterCatalogView.as_view()),
+    path("api/lab/results/abnormal/", AbnormalLabValuesView.as_view()),
+
     # DOCTOR VIEWS
+    path("api/doctor/queue/stream/", queue_stream),
     path("api/doctor/lab-requests/", DoctorLabRequestsView.as_view()),
     path("api/doctor/lab-results/", DoctorLabResultsView.as_view()),
 
@@ -117,6 +149,10 @@ urlpatterns = [
         "api/doctor/patients/<int:patient_id>/history/",
         PatientHistoryView.as_view(),
     ),
+    path(
+        "api/doctor/patients/<int:patient_id>/lab-trends/",
+        PatientLabTrendView.as_view(),
+    ),
 
     path(
         "api/doctor/lab-results/<int:request_id>/",
@@ -6,6 +6,7 @@ from .models import LabTestRequest, LabTestResult, LabTestType, Bill
 @admin.register(LabTestRequest)
 class LabTestRequestAdmin(admin.ModelAdmin):
     list_display = ("appointment", "test_type", "status", "requested_at")
+    list_select_related = ("appointment__patient",)
     list_filter = ("status", "test_type")
     search_fields = ("patient__full_name", "doctor__first_name", "doctor__last_name")
 
@@ -13,6 +14,7 @@ class LabTestRequestAdmin(admin.ModelAdmin):
 @admin.register(LabTestResult)
 class LabTestResultAdmin(admin.ModelAdmin):
     list_display = ("lab_request", "technician", "created_at", "bill")
+    list_select_related = ("lab_request__patient", "technician", "bill__patient")
     search_fields = ("lab_request__patient__full_name",)
 
 
@@ -25,5 +27,6 @@ class LabTestTypeAdmin(admin.ModelAdmin):
 @admin.register(Bill)
 class BillAdmin(admin.ModelAdmin):
     list_display = ("id", "patient", "amount", "description", "created_by", "created_at")
+    list_select_related = ("patient", "created_by")
     search_fields = ("patient__full_name", "description")
     list_filter = ("created_at",)
@@ -0,0 +1,134 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from admin_panel.models import Department, User
+from hillcrest.synthetic import IdBlock, explicit_timestamps
+from labtech import worklist
+from labtech.models import LabTestRequest
+from labtech.serializers import LabTestRequestSerializer
+from receptionist.models import Appointment, Patient
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the lab worklist (open list, claim-next, completed page) on top "
+        "of --history completed requests. Everything is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--history", type=int, default=500_000)
+        parser.add_argument("--pending", type=int, default=200)
+        parser.add_argument("--rounds", type=int, default=200)
+        parser.add_argument("--batch", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                self.setup()
+                self.generate(options["history"], "COMPLETED", options["batch"])
+                self.generate(options["pending"], "PENDING", options["batch"])
+                self.measure(options["rounds"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def setup(self):
+        department = Department.objects.create(name=f"Bench {time.time_ns()}")
+        self.doctor = User.objects.create(
+            username=f"bench_doc_{time.time_ns()}", role="DOCTOR", department=department
+        )
+        self.technician = User.objects.create(username=f"bench_lab_{time.time_ns()}", role="LAB_TECHNICIAN")
+        self.department = department
+        self.patients = [
+            Patient.objects.create(full_name=f"Bench Patient {n}", age=40) for n in range(50)
+        ]
+
+    def generate(self, count, status, batch):
+        start = time.perf_counter()
+        appointment_ids = IdBlock(Appointment)
+        now = timezone.now()
+        with explicit_timestamps([Appointment, LabTestRequest]):
+            for offset in range(0, count, batch):
+                appointments, requests = [], []
+                for _ in range(offset, min(offset + batch, count)):
+                    age = timedelta(minutes=self.random.randrange(
+                        365 * 24 * 60 if status == "COMPLETED" else 8 * 60
+                    ))
+                    patient = self.random.choice(self.patients)
+                    appointment = Appointment(
+                        id=appointment_ids.take(),
+                        patient=patient,
+                        doctor=self.doctor,
+                        department=self.department,
+                        token_number="B",
+                        status="Completed",
+                        created_at=now - age,
+                    )
+                    appointments.append(appointment)
+                    requests.append(LabTestRequest(
+                        appointment_id=appointment.id,
+                        doctor=self.doctor,
+                        patient=patient,
+                        test_type="BLOOD_TEST",
+                        status=status,
+                        priority=self.random.choices([0, 1, 2], weights=[85, 12, 3])[0],
+                        requested_at=now - age,
+                        processed_at=now - age + timedelta(hours=2) if status == "COMPLETED" else None,
+                    ))
+                Appointment.objects.bulk_create(appointments)
+                LabTestRequest.objects.bulk_create(requests)
+        self.stdout.write(f"inserted {count} {status.lower()} requests in {time.perf_counter() - start:.1f}s")
+
+    def time_ms(self, fn, rounds):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return timings
+
+    def measure(self, rounds):
+        self.stdout.write(
+            f"table size: {LabTestRequest.objects.count()} requests, "
+            f"{LabTestRequest.objects.filter(status__in=worklist.OPEN).count()} open"
+        )
+
+        def open_list():
+            qs = LabTestRequestSerializer.setup_eager_loading(worklist.open_requests())[:50]
+            return LabTestRequestSerializer(qs, many=True).data
+
+        def completed_page():
+            qs = LabTestRequestSerializer.setup_eager_loading(
+                LabTestRequest.objects.filter(status="COMPLETED").order_by("-requested_at", "-id")
+            )[:50]
+            return LabTestRequestSerializer(qs, many=True).data
+
+        def claim_and_release():
+            request_id = worklist.claim_next(self.technician)
+            worklist.release(request_id, self.technician)
+
+        cases = {
+            "open list (50)": open_list,
+            "completed page (50)": completed_page,
+            "claim next + release": claim_and_release,
+        }
+        self.stdout.write(f"{'operation':<24} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for label, fn in cases.items():
+            timings = self.time_ms(fn, rounds)
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            self.stdout.write(
+                f"{label:<24} {statistics.median(timings):>8.2f} {p95:>8.2f} {timings[-1]:>8.2f}"
+            )
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0006_patient_search_keys'),
+        ('labtech', '0006_created_at_id_index'),
+        ('receptionist', '0004_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labtestrequest',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='labtestrequest',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_lab_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='labtestrequest',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Routine'), (1, 'Urgent'), (2, 'STAT')], default=0),
+        ),
+        migrations.AddIndex(
+            model_name='labtestrequest',
+            index=models.Index(fields=['status', 'requested_at'], name='labreq_status_requested_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labtestrequest',
+            index=models.Index(fields=['status', '-priority', 'requested_at'], name='labreq_worklist_idx'),
+        ),
+    ]
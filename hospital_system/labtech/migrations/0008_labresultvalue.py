@@ -0,0 +1,162 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:28
+
+import json
+import math
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# A frozen copy of labtech/parameters.py as this migration was written,
+# so later changes to the catalogue or the parsers do not change what it
+# does on a fresh database. (name, unit, low, high, is_text)
+CATALOG = {
+    "BLOOD_TEST": (
+        ("Hemoglobin (Hb)", "g/dL", 12, 16, False),
+        ("RBC Count", "million/µL", 4.0, 5.2, False),
+        ("WBC Count", "cells/µL", 4000, 11000, False),
+        ("Platelets", "/µL", 150000, 450000, False),
+        ("Hematocrit (PCV)", "%", 36, 46, False),
+        ("MCV", "fL", 80, 100, False),
+        ("MCH", "pg", 27, 34, False),
+        ("MCHC", "g/dL", 32, 36, False),
+    ),
+    "URINE_TEST": (
+        ("pH", "", 4, 8, False),
+        ("Protein", "mg/dL", 0, 20, False),
+        ("Glucose", "mg/dL", 0, 15, False),
+        ("Specific Gravity", "", 1.005, 1.030, False),
+    ),
+    "LIVER_FUNCTION_TEST": (
+        ("Bilirubin Total", "mg/dL", 0.3, 1.2, False),
+        ("SGOT (AST)", "U/L", 5, 40, False),
+        ("SGPT (ALT)", "U/L", 7, 56, False),
+        ("Alkaline Phosphatase", "U/L", 44, 147, False),
+    ),
+    "KIDNEY_FUNCTION_TEST": (
+        ("Creatinine", "mg/dL", 0.6, 1.3, False),
+        ("Blood Urea", "mg/dL", 7, 20, False),
+        ("Uric Acid", "mg/dL", 3.5, 7.2, False),
+    ),
+    "ECG": (
+        ("Heart Rate", "bpm", 60, 100, False),
+        ("PR Interval", "ms", 120, 200, False),
+        ("QT Interval", "ms", 350, 440, False),
+    ),
+    "XRAY": (
+        ("Radiologist Findings", "", None, None, True),
+    ),
+    "MRI": (
+        ("Radiologist Findings", "", None, None, True),
+    ),
+}
+
+
+def to_number(value):
+    try:
+        number = float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def classify(value, low, high):
+    if value is None or low is None or high is None:
+        return ""
+    if value < low:
+        return "LOW"
+    if value > high:
+        return "HIGH"
+    return "NORMAL"
+
+
+def parse_details(raw):
+    try:
+        rows = json.loads(raw or "[]")
+    except ValueError:
+        return []
+    if not isinstance(rows, list):
+        return []
+    return [row for row in rows if isinstance(row, dict) and row.get("parameter")]
+
+
+def value_rows(test_type, rows):
+    """
+    (parameter, value, number, unit, low, high, status) per stored row,
+    graded against the catalogue as normalize() did.
+    """
+    known = {entry[0]: entry[1:] for entry in CATALOG.get(test_type, ())}
+    for row in rows:
+        name = str(row["parameter"])
+        if name in known:
+            unit, low, high, is_text = known[name]
+        else:
+            unit = str(row.get("unit") or "")
+            low, high = to_number(row.get("low")), to_number(row.get("high"))
+            is_text = False
+        value = "" if row.get("value") is None else str(row.get("value"))
+        number = None if is_text else to_number(value)
+        yield name, value, to_number(value), unit, low, high, classify(number, low, high)
+
+
+def fill_values(apps, schema_editor):
+    LabTestResult = apps.get_model("labtech", "LabTestResult")
+    LabResultValue = apps.get_model("labtech", "LabResultValue")
+    batch = []
+    results = LabTestResult.objects.select_related("lab_request").only(
+        "id", "result_details", "created_at", "lab_request__test_type", "lab_request__patient_id"
+    )
+    for result in results.iterator(chunk_size=2000):
+        request = result.lab_request
+        rows = value_rows(request.test_type, parse_details(result.result_details))
+        for name, value, number, unit, low, high, status in rows:
+            batch.append(LabResultValue(
+                result_id=result.id,
+                patient_id=request.patient_id,
+                test_type=request.test_type,
+                parameter=name[:100],
+                value=number,
+                text_value=value,
+                unit=unit[:30],
+                ref_low=low,
+                ref_high=high,
+                status=status,
+                abnormal=status in ("LOW", "HIGH"),
+                recorded_at=result.created_at,
+            ))
+        if len(batch) >= 5000:
+            LabResultValue.objects.bulk_create(batch)
+            batch = []
+    LabResultValue.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0006_patient_search_keys'),
+        ('labtech', '0007_worklist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabResultValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('test_type', models.CharField(max_length=100)),
+                ('parameter', models.CharField(max_length=100)),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('text_value', models.TextField(blank=True)),
+                ('unit', models.CharField(blank=True, max_length=30)),
+                ('ref_low', models.FloatField(blank=True, null=True)),
+                ('ref_high', models.FloatField(blank=True, null=True)),
+                ('status', models.CharField(blank=True, choices=[('LOW', 'Low'), ('NORMAL', 'Normal'), ('HIGH', 'High'), ('', 'Not graded')], max_length=10)),
+                ('abnormal', models.BooleanField(default=False)),
+                ('recorded_at', models.DateTimeField()),
+                ('patient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lab_values', to='admin_panel.patient')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='values', to='labtech.labtestresult')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['parameter', 'abnormal', 'recorded_at'], name='labvalue_param_abnormal_idx'), models.Index(fields=['patient', 'parameter', 'recorded_at'], name='labvalue_patient_param_idx')],
+            },
+        ),
+        migrations.RunPython(fill_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0006_patient_search_keys'),
+        ('labtech', '0008_labresultvalue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['reference_id'], name='labbill_reference_idx'),
+        ),
+    ]
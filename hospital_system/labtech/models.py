@@ -19,11 +19,21 @@ class LabTestType(models.Model):
 
 
 class LabTestRequest(models.Model):
+    """
+    PENDING -> PROCESSING (claimed by a technician, see labtech/worklist.py)
+    -> COMPLETED. A claim older than LAB_CLAIM_TIMEOUT_MINUTES can be
+    taken over by another technician.
+    """
     STATUS_CHOICES = [
         ("PENDING", "Pending"),
         ("PROCESSING", "Processing"),
         ("COMPLETED", "Completed"),
     ]
+    PRIORITY_CHOICES = [
+        (0, "Routine"),
+        (1, "Urgent"),
+        (2, "STAT"),
+    ]
 
     appointment = models.OneToOneField(
         Appointment,
@@ -56,9 +66,26 @@ class LabTestRequest(models.Model):
         default="PENDING"
     )
 
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=0)
+    claimed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name="claimed_lab_requests",
+        null=True,
+        blank=True
+    )
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
     requested_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "requested_at"], name="labreq_status_requested_idx"),
+            # worklist order: most urgent first, then oldest
+            models.Index(fields=["status", "-priority", "requested_at"], name="labreq_worklist_idx"),
+        ]
+
     def __str__(self):
         p_name = self.patient.full_name if self.patient else "Unknown"
         return f"{self.test_type} for {p_name}"
@@ -93,6 +120,13 @@ class Bill(models.Model):
     def __str__(self):
         return f"Bill #{self.id} - {self.patient.full_name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="labbill_created_id_idx"),
+            # complete_batch links results to their bills through it
+            models.Index(fields=["reference_id"], name="labbill_reference_idx"),
+        ]
+
 
 class LabTestResult(models.Model):
     lab_request = models.OneToOneField(
@@ -121,3 +155,52 @@ class LabTestResult(models.Model):
 
     def __str__(self):
         return f"Result - {self.lab_request}"
+
+
+class LabResultValue(models.Model):
+    """
+    One measured parameter of a lab result, typed and queryable. Written
+    from result_details when a result is saved (see labtech/results.py);
+    the JSON blob stays as the report the frontend renders.
+
+    patient, test_type and recorded_at are copied from the request and
+    result so lookups like "abnormal Hemoglobin this week" need no joins.
+    """
+    STATUS_CHOICES = [
+        ("LOW", "Low"),
+        ("NORMAL", "Normal"),
+        ("HIGH", "High"),
+        ("", "Not graded"),
+    ]
+
+    result = models.ForeignKey(
+        LabTestResult,
+        on_delete=models.CASCADE,
+        related_name="values"
+    )
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.CASCADE,
+        related_name="lab_values",
+        null=True,
+        blank=True
+    )
+    test_type = models.CharField(max_length=100)
+    parameter = models.CharField(max_length=100)
+    value = models.FloatField(null=True, blank=True)        # numeric parameters
+    text_value = models.TextField(blank=True)               # as entered
+    unit = models.CharField(max_length=30, blank=True)
+    ref_low = models.FloatField(null=True, blank=True)
+    ref_high = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, blank=True)
+    abnormal = models.BooleanField(default=False)
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["parameter", "abnormal", "recorded_at"], name="labvalue_param_abnormal_idx"),
+            models.Index(fields=["patient", "parameter", "recorded_at"], name="labvalue_patient_param_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.parameter} = {self.text_value} {self.unit}".strip()
@@ -0,0 +1,157 @@
+# labtech/parameters.py
+"""
+Lab parameter catalogue: what each test type measures, its unit and its
+reference range. It replaces the copy that lived in the frontend
+(constants/LabTestParameters.js); the frontend now loads it from
+/api/lab/parameters/.
+
+Abnormal flags are always computed here from the catalogue, never taken
+from the client.
+"""
+import json
+import math
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Parameter:
+    name: str
+    unit: str = ""
+    low: float | None = None
+    high: float | None = None
+    is_text: bool = False
+
+
+CATALOG = {
+    "BLOOD_TEST": (
+        Parameter("Hemoglobin (Hb)", "g/dL", 12, 16),
+        Parameter("RBC Count", "million/µL", 4.0, 5.2),
+        Parameter("WBC Count", "cells/µL", 4000, 11000),
+        Parameter("Platelets", "/µL", 150000, 450000),
+        Parameter("Hematocrit (PCV)", "%", 36, 46),
+        Parameter("MCV", "fL", 80, 100),
+        Parameter("MCH", "pg", 27, 34),
+        Parameter("MCHC", "g/dL", 32, 36),
+    ),
+    "URINE_TEST": (
+        Parameter("pH", "", 4, 8),
+        Parameter("Protein", "mg/dL", 0, 20),
+        Parameter("Glucose", "mg/dL", 0, 15),
+        Parameter("Specific Gravity", "", 1.005, 1.030),
+    ),
+    "LIVER_FUNCTION_TEST": (
+        Parameter("Bilirubin Total", "mg/dL", 0.3, 1.2),
+        Parameter("SGOT (AST)", "U/L", 5, 40),
+        Parameter("SGPT (ALT)", "U/L", 7, 56),
+        Parameter("Alkaline Phosphatase", "U/L", 44, 147),
+    ),
+    "KIDNEY_FUNCTION_TEST": (
+        Parameter("Creatinine", "mg/dL", 0.6, 1.3),
+        Parameter("Blood Urea", "mg/dL", 7, 20),
+        Parameter("Uric Acid", "mg/dL", 3.5, 7.2),
+    ),
+    "ECG": (
+        Parameter("Heart Rate", "bpm", 60, 100),
+        Parameter("PR Interval", "ms", 120, 200),
+        Parameter("QT Interval", "ms", 350, 440),
+    ),
+    "XRAY": (
+        Parameter("Radiologist Findings", is_text=True),
+    ),
+    "MRI": (
+        Parameter("Radiologist Findings", is_text=True),
+    ),
+}
+
+
+def as_json():
+    """
+    The catalogue in the shape the frontend used: {test_type: [{name, unit, low, high, isText}]}.
+    """
+    return {
+        test_type: [
+            {
+                "name": p.name,
+                "unit": p.unit,
+                "low": p.low,
+                "high": p.high,
+                "isText": p.is_text,
+            }
+            for p in parameters
+        ]
+        for test_type, parameters in CATALOG.items()
+    }
+
+
+def lookup(test_type, name):
+    for parameter in CATALOG.get(test_type, ()):
+        if parameter.name == name:
+            return parameter
+    return None
+
+
+def to_number(value):
+    try:
+        number = float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None  # drop NaN and infinities
+
+
+def classify(value, low, high):
+    """
+    LOW / HIGH / NORMAL, or "" when the value or the range is not numeric.
+    """
+    if value is None or low is None or high is None:
+        return ""
+    if value < low:
+        return "LOW"
+    if value > high:
+        return "HIGH"
+    return "NORMAL"
+
+
+def parse_details(raw):
+    """
+    result_details as stored (a JSON string) or as posted (string or
+    list) -> list of dicts. Anything unreadable gives [].
+    """
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw or "[]")
+        except ValueError:
+            return []
+    if not isinstance(raw, list):
+        return []
+    return [row for row in raw if isinstance(row, dict) and row.get("parameter")]
+
+
+def normalize(test_type, rows):
+    """
+    Re-derive unit, range and status for each submitted row. The
+    catalogue wins over whatever the client sent; parameters it does not
+    know keep the client's unit and range, but the status is still
+    recomputed.
+    """
+    normalized = []
+    for row in rows:
+        name = str(row["parameter"])
+        known = lookup(test_type, name)
+        if known is not None:
+            unit, low, high, is_text = known.unit, known.low, known.high, known.is_text
+        else:
+            unit = str(row.get("unit") or "")
+            low, high = to_number(row.get("low")), to_number(row.get("high"))
+            is_text = False
+        value = "" if row.get("value") is None else str(row.get("value"))
+        number = None if is_text else to_number(value)
+        normalized.append({
+            "parameter": name,
+            "value": value,
+            "unit": unit,
+            "low": low,
+            "high": high,
+            "status": classify(number, low, high),
+        })
+    return normalized
+
@@ -0,0 +1,234 @@
+# labtech/processing.py
+"""
+Completing lab requests: result, bill, typed values, status and the
+"result ready" event.
+
+ProcessLabRequestView completes one request per call. complete_batch()
+does the same for a whole analyzer run with a fixed number of queries:
+one UPDATE claims every request, and results, bills and values are each
+written with one bulk INSERT, as are their ledger entries. One UPDATE
+links the bills and another marks the requests COMPLETED. The caller wraps it in a
+transaction.
+"""
+import csv
+import io
+import json
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from ledger import posting
+from ledger.models import LedgerEntry
+from notifications import bus
+
+from . import parameters, trends, worklist
+from .models import Bill, LabResultValue, LabTestRequest, LabTestResult, LabTestType
+from .results import value_rows
+
+MAX_BATCH = 5000
+BATCH_SIZE = 1000
+
+CSV_COLUMNS = ["request_id", "parameter", "value"]
+
+
+def lab_prices(test_types):
+    """
+    {test type name: price} for the given names; unknown types bill 0.
+    """
+    return dict(
+        LabTestType.objects.filter(name__in=set(test_types)).values_list("name", "price")
+    )
+
+
+def bill_description(lab_request):
+    return f"Lab Test: {lab_request.test_type}"
+
+
+def ready_event(lab_request):
+    return (
+        "lab_result.ready",
+        {
+            "lab_request": lab_request.id,
+            "patient_id": lab_request.patient.patient_id,
+            "test_type": lab_request.test_type,
+        },
+        "DOCTOR",
+        lab_request.doctor_id,
+    )
+
+
+def items_from_csv(text):
+    """
+    Analyzer export, one row per measured parameter:
+
+        request_id,parameter,value
+        812,Hemoglobin (Hb),13.2
+        812,Platelets,250000
+
+    -> [{"request_id", "result_details": [{parameter, value}]}] in
+    first-seen order. Raises ValueError when a column is missing.
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    missing = [c for c in CSV_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+    items = {}
+    for row in reader:
+        request_id = (row["request_id"] or "").strip()
+        item = items.setdefault(request_id, {"request_id": request_id, "result_details": []})
+        item["result_details"].append({"parameter": row["parameter"], "value": row["value"]})
+    return list(items.values())
+
+
+def _request_id(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _insert_results(results):
+    """
+    bulk_create ``results`` and make sure they have primary keys. MySQL
+    does not return ids from a bulk INSERT, so they are read back by
+    lab_request (one result per request).
+    """
+    LabTestResult.objects.bulk_create(results, batch_size=BATCH_SIZE)
+    if results and results[0].pk is None:
+        ids = dict(
+            LabTestResult.objects.filter(lab_request_id__in=[r.lab_request_id for r in results])
+            .values_list("lab_request_id", "id")
+        )
+        for result in results:
+            result.pk = ids[result.lab_request_id]
+
+
+def complete_batch(technician, items):
+    """
+    Complete every request in ``items`` ([{"request_id", "result_details"}])
+    for ``technician``. Returns one outcome per item, in order:
+
+        {"index", "request_id", "status": 201, "result_id", "bill_id"}
+        {"index", "request_id", "status": 400 | 404 | 409, "detail"}
+
+    An item fails on its own; the others still complete.
+    """
+    outcomes = [None] * len(items)
+    submitted = {}
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        request_id = _request_id(item.get("request_id"))
+        rows = parameters.parse_details(item.get("result_details"))
+        detail = None
+        if request_id is None:
+            detail = "request_id is required"
+        elif not rows:
+            detail = "result_details must be a non-empty list of {parameter, value}"
+        elif request_id in submitted:
+            detail = "request_id appears more than once in this batch"
+        if detail:
+            outcomes[index] = {
+                "index": index, "request_id": item.get("request_id"), "status": 400, "detail": detail,
+            }
+        else:
+            submitted[request_id] = (index, rows)
+
+    now = timezone.now()
+    LabTestRequest.objects.filter(
+        worklist.claimable(technician, now), id__in=submitted
+    ).update(status="PROCESSING", claimed_by=technician, claimed_at=now)
+    claimed = list(
+        LabTestRequest.objects.filter(id__in=submitted, status="PROCESSING", claimed_by=technician)
+        .select_related("patient", "appointment")
+        .order_by("id")
+    )
+
+    unclaimed = set(submitted) - {r.id for r in claimed}
+    held = set(
+        LabTestRequest.objects.filter(id__in=unclaimed, status="PROCESSING")
+        .values_list("id", flat=True)
+    )
+    for request_id in unclaimed:
+        index, _ = submitted[request_id]
+        outcomes[index] = (
+            {"index": index, "request_id": request_id, "status": 409,
+             "detail": "Already claimed by another technician."}
+            if request_id in held else
+            {"index": index, "request_id": request_id, "status": 404,
+             "detail": "Invalid or already processed request."}
+        )
+    if not claimed:
+        return outcomes
+
+    normalized = {
+        r.id: parameters.normalize(r.test_type, submitted[r.id][1]) for r in claimed
+    }
+    results = [
+        LabTestResult(
+            lab_request=r,
+            result_details=json.dumps(normalized[r.id]),
+            technician=technician,
+        )
+        for r in claimed
+    ]
+    _insert_results(results)
+
+    prices = lab_prices(r.test_type for r in claimed)
+    bills = [
+        Bill(
+            patient_id=r.patient_id,
+            amount=prices.get(r.test_type, 0),
+            description=bill_description(r),
+            reference_id=result.id,
+            created_by=technician,
+        )
+        for r, result in zip(claimed, results)
+    ]
+    Bill.objects.bulk_create(bills, batch_size=BATCH_SIZE)
+
+    # link each result to its bill in one statement; bulk_update would
+    # send a CASE with a branch per row
+    result_ids = [result.id for result in results]
+    LabTestResult.objects.filter(id__in=result_ids).update(
+        bill_id=Subquery(
+            Bill.objects.filter(reference_id=OuterRef("id")).order_by("-id").values("id")[:1]
+        )
+    )
+    bill_ids = dict(
+        LabTestResult.objects.filter(id__in=result_ids).values_list("id", "bill_id")
+    )
+    # bulk_create skips the ledger's save signal
+    LedgerEntry.objects.bulk_create(
+        [
+            posting.charge(
+                "LAB", bill_ids[result.id], bill.amount, now,
+                department_id=r.appointment.department_id, doctor_id=r.doctor_id, patient_id=r.patient_id,
+            )
+            for r, result, bill in zip(claimed, results, bills)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    LabResultValue.objects.bulk_create(
+        [
+            value
+            for r, result in zip(claimed, results)
+            for value in value_rows(result, r, normalized[r.id])
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    trends.invalidate_on_commit(*{r.patient_id for r in claimed})
+
+    LabTestRequest.objects.filter(id__in=[r.id for r in claimed]).update(
+        status="COMPLETED", processed_at=now
+    )
+    bus.publish_many([ready_event(r) for r in claimed])
+
+    for r, result in zip(claimed, results):
+        index, _ = submitted[r.id]
+        outcomes[index] = {
+            "index": index, "request_id": r.id, "status": 201,
+            "result_id": result.id, "bill_id": bill_ids[result.id],
+        }
+    return outcomes
@@ -0,0 +1,37 @@
+# labtech/results.py
+"""
+Typed storage of lab result parameters (LabResultValue).
+"""
+from . import trends
+from .models import LabResultValue
+from .parameters import to_number
+
+
+def value_rows(result, lab_request, rows):
+    """
+    Unsaved LabResultValue rows for normalized result rows (see
+    parameters.normalize).
+    """
+    return [
+        LabResultValue(
+            result_id=result.id,
+            patient_id=lab_request.patient_id,
+            test_type=lab_request.test_type,
+            parameter=row["parameter"][:100],
+            value=to_number(row["value"]),
+            text_value=row["value"],
+            unit=row["unit"][:30],
+            ref_low=row["low"],
+            ref_high=row["high"],
+            status=row["status"],
+            abnormal=row["status"] in ("LOW", "HIGH"),
+            recorded_at=result.created_at,
+        )
+        for row in rows
+    ]
+
+
+def record_values(result, lab_request, rows):
+    LabResultValue.objects.filter(result_id=result.id).delete()
+    LabResultValue.objects.bulk_create(value_rows(result, lab_request, rows))
+    trends.invalidate_on_commit(lab_request.patient_id)
@@ -1,6 +1,12 @@
 # labtech/serializers.py
 from rest_framework import serializers
-from .models import LabTestRequest, LabTestResult, Bill
+from .models import LabTestRequest, LabTestResult, LabTestType, LabResultValue, Bill
+
+
+class LabTestTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LabTestType
+        fields = ["id", "name", "price"]
 
 
 class BillSerializer(serializers.ModelSerializer):
@@ -46,15 +52,60 @@ class LabTestRequestSerializer(serializers.ModelSerializer):
 
     patient_name = serializers.CharField(source="patient.full_name", read_only=True)
     doctor_name = serializers.SerializerMethodField(read_only=True)
+    claimed_by_name = serializers.SerializerMethodField(read_only=True)
     requested_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
     processed_at = serializers.DateTimeField(format="%Y-%m-%d %H:%M", read_only=True)
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load everything this serializer touches (patient, doctor and the
+        nested result -> bill -> patient chain) in the list query itself.
+        """
+        return queryset.select_related(
+            "patient",
+            "doctor",
+            "claimed_by",
+            "result",
+            "result__bill",
+            "result__bill__patient",
+        )
+
     def get_doctor_name(self, obj):
         if not obj.doctor:
             return ""
         return f"{obj.doctor.first_name} {obj.doctor.last_name}".strip()
 
+    def get_claimed_by_name(self, obj):
+        if not obj.claimed_by:
+            return ""
+        return f"{obj.claimed_by.first_name} {obj.claimed_by.last_name}".strip() or obj.claimed_by.username
+
     class Meta:
         model = LabTestRequest
         fields = "__all__"
-        read_only_fields = ("appointment", "doctor", "patient")
+        read_only_fields = ("appointment", "doctor", "patient", "claimed_by", "claimed_at")
+
+
+class LabResultValueSerializer(serializers.ModelSerializer):
+    patient_name = serializers.CharField(source="patient.full_name", read_only=True, default="")
+    patient_id = serializers.CharField(source="patient.patient_id", read_only=True, default="")
+    lab_request = serializers.IntegerField(source="result.lab_request_id", read_only=True)
+
+    class Meta:
+        model = LabResultValue
+        fields = [
+            "id",
+            "lab_request",
+            "patient_id",
+            "patient_name",
+            "test_type",
+            "parameter",
+            "value",
+            "text_value",
+            "unit",
+            "ref_low",
+            "ref_high",
+            "status",
+            "recorded_at",
+        ]
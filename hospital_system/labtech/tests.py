@@ -1,3 +1,402 @@
-from django.test import TestCase
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_panel.models import Department, User
+from notifications.models import Event
+from receptionist.models import Appointment, Patient
+from . import worklist
+from .models import Bill, LabResultValue, LabTestRequest, LabTestResult, LabTestType
+from .parameters import normalize, to_number
+from .results import record_values, value_rows
+
+
+class LabDataMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="Pathology")
+        cls.doctor = User.objects.create(
+            username="doc001", role="DOCTOR", first_name="Asha", department=cls.department
+        )
+        cls.technician = User.objects.create(username="lab001", role="LAB_TECHNICIAN")
+
+    def make_requests(self, count, completed=True, priority=0):
+        requests = []
+        for i in range(count):
+            patient = Patient.objects.create(full_name=f"Patient {i}", age=30)
+            appointment = Appointment.objects.create(
+                patient=patient, doctor=self.doctor, department=self.department
+            )
+            lab_request = LabTestRequest.objects.create(
+                appointment=appointment,
+                doctor=self.doctor,
+                patient=patient,
+                test_type="CBC",
+                status="COMPLETED" if completed else "PENDING",
+                priority=priority,
+            )
+            if completed:
+                bill = Bill.objects.create(patient=patient, amount=350, description="Lab Test: CBC")
+                LabTestResult.objects.create(
+                    lab_request=lab_request,
+                    result_details="[]",
+                    technician=self.technician,
+                    bill=bill,
+                )
+            requests.append(lab_request)
+        return requests
+
+
+class LabRequestQueryCountTests(LabDataMixin, TestCase):
+    def count_queries(self, user, url):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            res = client.get(url)
+        self.assertEqual(res.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, user, url, completed=True):
+        self.make_requests(1, completed)
+        small = self.count_queries(user, url)
+        self.make_requests(5, completed)
+        self.assertEqual(self.count_queries(user, url), small, url)
+
+    def test_pending_list(self):
+        self.assertConstantQueries(self.technician, "/lab/pending/", completed=False)
+
+    def test_completed_list(self):
+        self.assertConstantQueries(self.technician, "/lab/completed/")
+
+    def test_doctor_lab_requests(self):
+        self.assertConstantQueries(self.doctor, "/api/doctor/lab-requests/")
+
+    def test_doctor_lab_results(self):
+        self.assertConstantQueries(self.doctor, "/api/doctor/lab-results/")
+
+    def test_result_detail_is_single_query(self):
+        lab_request = self.make_requests(1)[0]
+        self.assertEqual(
+            self.count_queries(self.technician, f"/lab/completed/{lab_request.id}/"), 1
+        )
+        self.assertEqual(
+            self.count_queries(self.doctor, f"/api/doctor/lab-results/{lab_request.id}/"), 1
+        )
+
+
+class LabWorklistTests(LabDataMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.second = User.objects.create(username="lab002", role="LAB_TECHNICIAN")
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def process(self, user, lab_request):
+        return self.client_for(user).post(
+            f"/api/lab/process/?request_id={lab_request.id}", {"result_details": "[]"}, format="json"
+        )
+
+    def test_urgent_first_then_oldest(self):
+        routine = self.make_requests(2, completed=False)
+        [stat] = self.make_requests(1, completed=False, priority=2)
+        res = self.client_for(self.technician).get("/api/lab/pending/")
+        self.assertEqual([r["id"] for r in res.json()], [stat.id, routine[0].id, routine[1].id])
+
+        res = self.client_for(self.technician).post("/api/lab/pending/next/")
+        self.assertEqual(res.json()["id"], stat.id)
+        self.assertEqual(res.json()["status"], "PROCESSING")
+        res = self.client_for(self.second).post("/api/lab/pending/next/")
+        self.assertEqual(res.json()["id"], routine[0].id)
+
+    def test_only_the_claimant_can_process(self):
+        [lab_request] = self.make_requests(1, completed=False)
+        self.assertEqual(self.client_for(self.technician).post(f"/api/lab/pending/{lab_request.id}/claim/").status_code, 200)
+        self.assertEqual(self.client_for(self.second).post(f"/api/lab/pending/{lab_request.id}/claim/").status_code, 409)
+        self.assertEqual(self.process(self.second, lab_request).status_code, 409)
+        self.assertEqual(self.process(self.technician, lab_request).status_code, 201)
+        self.assertEqual(self.process(self.technician, lab_request).status_code, 404)
+
+    def test_expired_claims_return_to_the_queue(self):
+        [lab_request] = self.make_requests(1, completed=False)
+        self.assertTrue(worklist.claim(lab_request.id, self.technician))
+        self.assertIsNone(worklist.claim_next(self.second))
+
+        LabTestRequest.objects.filter(id=lab_request.id).update(
+            claimed_at=timezone.now() - worklist.claim_timeout() - timedelta(minutes=1)
+        )
+        self.assertEqual(worklist.claim_next(self.second), lab_request.id)
+
+    def test_release_is_for_the_holder(self):
+        [lab_request] = self.make_requests(1, completed=False)
+        worklist.claim(lab_request.id, self.technician)
+        self.assertFalse(worklist.release(lab_request.id, self.second))
+        self.assertTrue(worklist.release(lab_request.id, self.technician))
+        lab_request.refresh_from_db()
+        self.assertEqual((lab_request.status, lab_request.claimed_by), ("PENDING", None))
+
+    def test_processing_unclaimed_request_claims_it(self):
+        [lab_request] = self.make_requests(1, completed=False)
+        self.assertEqual(self.process(self.second, lab_request).status_code, 201)
+        lab_request.refresh_from_db()
+        self.assertEqual((lab_request.status, lab_request.claimed_by), ("COMPLETED", self.second))
+
+
+class LabResultValueTests(LabDataMixin, TestCase):
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def process(self, rows, doctor=None):
+        [lab_request] = self.make_requests(1, completed=False)
+        LabTestRequest.objects.filter(id=lab_request.id).update(
+            test_type="BLOOD_TEST", doctor=doctor or self.doctor
+        )
+        res = self.client_for(self.technician).post(
+            f"/api/lab/process/?request_id={lab_request.id}", {"result_details": rows}, format="json"
+        )
+        self.assertEqual(res.status_code, 201)
+        return lab_request
+
+    def test_catalogue_decides_status(self):
+        lab_request = self.process([
+            # the client claims NORMAL with a made-up range
+            {"parameter": "Hemoglobin (Hb)", "value": "9.1", "unit": "g/dL", "low": 1, "high": 20, "status": "NORMAL"},
+            {"parameter": "WBC Count", "value": "7000"},
+            {"parameter": "Comment", "value": "haemolysed"},
+        ])
+        values = {v.parameter: v for v in LabResultValue.objects.filter(result__lab_request=lab_request)}
+        self.assertEqual(
+            (values["Hemoglobin (Hb)"].status, values["Hemoglobin (Hb)"].value, values["Hemoglobin (Hb)"].ref_low),
+            ("LOW", 9.1, 12),
+        )
+        self.assertFalse(values["WBC Count"].abnormal)
+        self.assertEqual((values["Comment"].value, values["Comment"].text_value), (None, "haemolysed"))
+        self.assertEqual(values["Hemoglobin (Hb)"].patient_id, lab_request.patient_id)
+
+        stored = json.loads(LabTestResult.objects.get(lab_request=lab_request).result_details)
+        self.assertEqual(stored[0]["status"], "LOW")
+
+    def test_abnormal_query(self):
+        other_doctor = User.objects.create(username="doc002", role="DOCTOR", department=self.department)
+        mine = self.process([{"parameter": "Hemoglobin (Hb)", "value": "18"}])
+        self.process([{"parameter": "Hemoglobin (Hb)", "value": "8"}], doctor=other_doctor)
+        old = self.process([{"parameter": "Hemoglobin (Hb)", "value": "7"}])
+        LabResultValue.objects.filter(result__lab_request=old).update(
+            recorded_at=timezone.now() - timedelta(days=30)
+        )
+        self.process([{"parameter": "Platelets", "value": "20000"}])
+
+        res = self.client_for(self.technician).get("/api/lab/results/abnormal/?parameter=Hemoglobin")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(sorted(r["value"] for r in res.json()), [8.0, 18.0])
+
+        res = self.client_for(self.doctor).get("/api/lab/results/abnormal/?parameter=Hemoglobin")
+        self.assertEqual([r["lab_request"] for r in res.json()], [mine.id])
+
+        start = (timezone.localdate() - timedelta(days=40)).isoformat()
+        res = self.client_for(self.doctor).get(
+            f"/api/lab/results/abnormal/?parameter=Hemoglobin&from={start}&status=LOW"
+        )
+        self.assertEqual([r["value"] for r in res.json()], [7.0])
+
+        res = self.client_for(self.doctor).get("/api/lab/results/abnormal/?from=2024-02-30")
+        self.assertEqual(res.status_code, 400)
+
+    def test_non_finite_values_are_text(self):
+        self.assertEqual([to_number(v) for v in ("inf", "-Infinity", "nan", " 1e3 ")], [None, None, None, 1000.0])
+        lab_request = self.process([{"parameter": "Hemoglobin (Hb)", "value": "inf"}])
+        value = LabResultValue.objects.get(result__lab_request=lab_request)
+        self.assertEqual((value.value, value.text_value, value.abnormal), (None, "inf", False))
+
+    def test_catalogue_endpoint(self):
+        res = self.client_for(self.doctor).get("/api/lab/parameters/")
+        self.assertEqual(res.json()["BLOOD_TEST"][0]["name"], "Hemoglobin (Hb)")
+        self.assertTrue(res.json()["XRAY"][0]["isText"])
+
+
+class LabTrendTests(LabDataMixin, TestCase):
+    def setUp(self):
+        self.patient = Patient.objects.create(full_name="Trend Patient", age=50)
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor)
+
+    def add_result(self, days_ago, rows):
+        appointment = Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, department=self.department
+        )
+        lab_request = LabTestRequest.objects.create(
+            appointment=appointment, doctor=self.doctor, patient=self.patient,
+            test_type="BLOOD_TEST", status="COMPLETED",
+        )
+        bill = Bill.objects.create(patient=self.patient, amount=350, description="Lab Test: BLOOD_TEST")
+        result = LabTestResult.objects.create(
+            lab_request=lab_request, result_details="[]", technician=self.technician, bill=bill
+        )
+        result.created_at = timezone.now() - timedelta(days=days_ago)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_values(result, lab_request, normalize("BLOOD_TEST", rows))
+
+    def trends(self, query=""):
+        res = self.client.get(f"/api/doctor/patients/{self.patient.id}/lab-trends/{query}")
+        self.assertEqual(res.status_code, 200)
+        return {p["parameter"]: p for p in res.json()["parameters"]}
+
+    def test_series_statistics(self):
+        for days_ago, hb in [(20, "10"), (10, "12"), (0, "14")]:
+            self.add_result(days_ago, [
+                {"parameter": "Hemoglobin (Hb)", "value": hb},
+                {"parameter": "Platelets", "value": "200000"},
+            ])
+        hb = self.trends()["Hemoglobin (Hb)"]
+        self.assertEqual((hb["count"], hb["min"], hb["max"], hb["mean"], hb["latest"]), (3, 10, 14, 12, 14))
+        self.assertAlmostEqual(hb["slope_per_day"], 0.2, places=3)
+        self.assertEqual(hb["out_of_range"], 1)
+        self.assertEqual([p["value"] for p in hb["points"]], [10, 12, 14])
+        self.assertEqual(list(self.trends("?parameter=plat")), ["Platelets"])
+
+    def test_new_result_invalidates_cache(self):
+        self.add_result(5, [{"parameter": "Hemoglobin (Hb)", "value": "13"}])
+        self.assertIsNone(self.trends()["Hemoglobin (Hb)"]["slope_per_day"])
+        with self.assertNumQueries(1):  # the patient check; trends come from the cache
+            self.trends()
+        self.add_result(0, [{"parameter": "Hemoglobin (Hb)", "value": "18"}])
+        hb = self.trends()["Hemoglobin (Hb)"]
+        self.assertEqual((hb["count"], hb["out_of_range"]), (2, 1))
+
+    def test_other_workers_results_show_after_the_cache_timeout(self):
+        self.add_result(5, [{"parameter": "Hemoglobin (Hb)", "value": "13"}])
+        self.assertEqual(self.trends()["Hemoglobin (Hb)"]["count"], 1)
+        # recorded without the on-commit bump, as by another worker
+        # with the per-process default cache
+        result = LabTestResult.objects.get(lab_request__patient=self.patient)
+        lab_request = result.lab_request
+        LabResultValue.objects.bulk_create(value_rows(
+            result, lab_request, normalize("BLOOD_TEST", [{"parameter": "Hemoglobin (Hb)", "value": "15"}])
+        ))
+        self.assertEqual(self.trends()["Hemoglobin (Hb)"]["count"], 1)
+
+        later = time.time() + settings.LAB_TREND_CACHE_SECONDS + 1
+        with patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertEqual(self.trends()["Hemoglobin (Hb)"]["count"], 2)
+
+    def test_unknown_patient(self):
+        res = self.client.get("/api/doctor/patients/999999/lab-trends/")
+        self.assertEqual(res.status_code, 404)
+
+    def test_other_doctors_patient(self):
+        self.add_result(1, [{"parameter": "Hemoglobin (Hb)", "value": "13"}])
+        self.trends()  # cached for the treating doctor
+        other_doctor = User.objects.create(username="doc002", role="DOCTOR", department=self.department)
+        self.client.force_authenticate(other_doctor)
+        res = self.client.get(f"/api/doctor/patients/{self.patient.id}/lab-trends/")
+        self.assertEqual(res.status_code, 404)
+
+
+class LabBatchTests(LabDataMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.technician)
+
+    def blood_tests(self, count):
+        requests = self.make_requests(count, completed=False)
+        LabTestRequest.objects.filter(id__in=[r.id for r in requests]).update(test_type="BLOOD_TEST")
+        return requests
+
+    def test_json_batch_with_per_item_outcomes(self):
+        LabTestType.objects.create(name="BLOOD_TEST", price=350)
+        done, other, fresh = self.blood_tests(3)
+        worklist.claim(other.id, User.objects.create(username="lab002", role="LAB_TECHNICIAN"))
+        LabTestRequest.objects.filter(id=done.id).update(status="COMPLETED")
+        rows = [{"parameter": "Hemoglobin (Hb)", "value": "9"}]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post("/api/lab/process/batch/", [
+                {"request_id": done.id, "result_details": rows},
+                {"request_id": other.id, "result_details": rows},
+                {"request_id": fresh.id, "result_details": rows},
+                {"request_id": fresh.id, "result_details": rows},
+                {"result_details": rows},
+            ], format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([o["status"] for o in res.json()["results"]], [404, 409, 201, 400, 400])
+        self.assertEqual((res.json()["completed"], res.json()["failed"]), (1, 4))
+
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, "COMPLETED")
+        result = LabTestResult.objects.select_related("bill").get(lab_request=fresh)
+        self.assertEqual((result.bill.amount, result.bill.reference_id), (350, result.id))
+        self.assertEqual(result.values.get().status, "LOW")
+        self.assertEqual(Event.objects.filter(type="lab_result.ready", user=self.doctor).count(), 1)
+
+    def test_csv_upload(self):
+        first, second = self.blood_tests(2)
+        upload = SimpleUploadedFile("run.csv", (
+            "request_id,parameter,value\n"
+            f"{first.id},Hemoglobin (Hb),13\n"
+            f"{second.id},Hemoglobin (Hb),17\n"
+            f"{first.id},Platelets,250000\n"
+        ).encode())
+        res = self.client.post("/api/lab/process/batch/", {"file": upload}, format="multipart")
+        self.assertEqual(res.json()["completed"], 2)
+        self.assertEqual(LabResultValue.objects.filter(result__lab_request=first).count(), 2)
+
+        bad = SimpleUploadedFile("run.csv", b"id,value\n1,2\n")
+        res = self.client.post("/api/lab/process/batch/", {"file": bad}, format="multipart")
+        self.assertEqual(res.status_code, 400)
+
+    def test_query_count_does_not_grow(self):
+        def run(count):
+            items = [
+                {"request_id": r.id, "result_details": [{"parameter": "MCV", "value": "90"}]}
+                for r in self.blood_tests(count)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post("/api/lab/process/batch/", items, format="json")
+            self.assertEqual(res.json()["completed"], count)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(2), run(20))
+
+
+class ParallelClaimTests(LabDataMixin, TransactionTestCase):
+    workers = 8
+    samples = 30
+
+    def test_every_sample_is_claimed_once(self):
+        self.setUpTestData()
+        self.make_requests(self.samples, completed=False)
+        technicians = [
+            User.objects.create(username=f"lab1{n:02d}", role="LAB_TECHNICIAN") for n in range(self.workers)
+        ]
+
+        def drain(technician):
+            claimed = []
+            try:
+                while (request_id := worklist.claim_next(technician)) is not None:
+                    claimed.append(request_id)
+                    # finish it so claim_next moves on
+                    LabTestRequest.objects.filter(id=request_id).update(status="COMPLETED")
+                return claimed
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            claimed = [rid for batch in pool.map(drain, technicians) for rid in batch]
+
+        self.assertEqual(len(claimed), self.samples)
+        self.assertEqual(len(set(claimed)), self.samples)
@@ -0,0 +1,140 @@
+# labtech/trends.py
+"""
+Per-patient lab trends: every numeric parameter a patient has had
+measured, with summary statistics over the series.
+
+All of a patient's values are read with one query, ordered by parameter
+and time. The statistics are then computed with NumPy per contiguous
+group (reduceat over the group starts), so the cost does not grow with a
+Python loop per result.
+
+The computed trends are cached in the default cache under a per-patient
+version. record_values() bumps it after commit, so a new result shows up
+on the next read. Writes that bypass record_values() must call
+invalidate() themselves. With the per-process locmem default a result
+processed by another worker does not bump this worker's version, so
+versions and trends expire after LAB_TREND_CACHE_SECONDS, bounding how
+stale another worker's trends can be.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import LabResultValue
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def _version_key(patient_id):
+    return f"lab-trend:{patient_id}:version"
+
+
+def version(patient_id):
+    current = cache.get(_version_key(patient_id))
+    if current is None:
+        cache.add(_version_key(patient_id), time.time_ns() // 1000, timeout=settings.LAB_TREND_CACHE_SECONDS)
+        current = cache.get(_version_key(patient_id))
+    return current
+
+
+def invalidate(*patient_ids):
+    for patient_id in patient_ids:
+        if patient_id is None:
+            continue
+        try:
+            cache.incr(_version_key(patient_id))
+        except ValueError:
+            cache.add(_version_key(patient_id), time.time_ns() // 1000, timeout=settings.LAB_TREND_CACHE_SECONDS)
+
+
+def invalidate_on_commit(*patient_ids):
+    transaction.on_commit(lambda: invalidate(*patient_ids))
+
+
+def _float(value):
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def compute(patient_id):
+    """
+    [{parameter, unit, low, high, count, min, max, mean, latest,
+      slope_per_day, out_of_range, points: [{recorded_at, value, status, lab_request}]}]
+    ordered by parameter. slope_per_day is the least-squares slope, and is
+    None for a single value or values that were all recorded at once.
+    """
+    rows = list(
+        LabResultValue.objects.filter(patient_id=patient_id, value__isnull=False)
+        .order_by("parameter", "recorded_at", "id")
+        .values_list(
+            "parameter", "recorded_at", "value", "ref_low", "ref_high",
+            "unit", "status", "result__lab_request_id",
+        )
+    )
+    if not rows:
+        return []
+
+    names = np.array([row[0] for row in rows], dtype=object)
+    days = np.array([row[1].timestamp() for row in rows]) / SECONDS_PER_DAY
+    values = np.array([row[2] for row in rows], dtype=float)
+    low = np.array([np.nan if row[3] is None else row[3] for row in rows], dtype=float)
+    high = np.array([np.nan if row[4] is None else row[4] for row in rows], dtype=float)
+
+    starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+    ends = np.r_[starts[1:], len(rows)]
+    counts = ends - starts
+
+    mean = np.add.reduceat(values, starts) / counts
+    mean_day = np.add.reduceat(days, starts) / counts
+    dt = days - np.repeat(mean_day, counts)
+    dv = values - np.repeat(mean, counts)
+    sxx = np.add.reduceat(dt * dt, starts)
+    sxy = np.add.reduceat(dt * dv, starts)
+    slope = np.divide(sxy, sxx, out=np.full(len(starts), np.nan), where=sxx > 0)
+    # NaN bounds compare False, so values without a range never count
+    outside = (values < low) | (values > high)
+
+    summary = zip(
+        starts, ends, counts,
+        np.minimum.reduceat(values, starts),
+        np.maximum.reduceat(values, starts),
+        mean, slope,
+        np.add.reduceat(outside.astype(np.int64), starts),
+    )
+    trends = []
+    for start, end, count, lowest, highest, average, per_day, out_of_range in summary:
+        last = rows[end - 1]
+        trends.append({
+            "parameter": last[0],
+            "unit": last[5],
+            "low": last[3],
+            "high": last[4],
+            "count": int(count),
+            "min": float(lowest),
+            "max": float(highest),
+            "mean": float(average),
+            "latest": last[2],
+            "slope_per_day": _float(per_day),
+            "out_of_range": int(out_of_range),
+            "points": [
+                {"recorded_at": row[1], "value": row[2], "status": row[6], "lab_request": row[7]}
+                for row in rows[start:end]
+            ],
+        })
+    return trends
+
+
+def patient_trends(patient_id):
+    """
+    {"version": n, "parameters": compute(patient_id)}, from the cache
+    when the patient has no newer results.
+    """
+    current = version(patient_id)
+    key = f"lab-trend:{patient_id}:{current}"
+    data = cache.get(key)
+    if data is None:
+        data = {"version": current, "parameters": compute(patient_id)}
+        cache.set(key, data, timeout=settings.LAB_TREND_CACHE_SECONDS)
+    return data
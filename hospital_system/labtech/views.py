@@ -1,68 +1,133 @@
+import json
+from datetime import timedelta
+
+from django.utils import timezone
 from django.utils.timezone import now
+from django.db import transaction
 from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.generics import ListAPIView
+from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from admin_panel.permissions import IsLabTechnician, IsDoctor
+from admin_panel import policy
+from hillcrest.params import date_range, day_bounds
+from hillcrest.refcache import ReferenceDataMixin
+from notifications import bus
 
-from .models import LabTestRequest, LabTestResult, LabTestType, Bill
+from . import parameters, processing, worklist
+from .models import LabTestRequest, LabTestResult, LabTestType, LabResultValue, Bill
+from .results import record_values
 from .serializers import (
     LabTestRequestSerializer,
     LabTestResultSerializer,
     BillSerializer,
+    LabTestTypeSerializer,
+    LabResultValueSerializer,
 )
 
 
 class PendingLabRequestsView(viewsets.ReadOnlyModelViewSet):
+    """
+    Open work (PENDING and PROCESSING), most urgent and oldest first.
+
+    POST /lab/pending/next/          claim the next request
+    POST /lab/pending/<id>/claim/    claim a specific request
+    POST /lab/pending/<id>/release/  give a claim back
+    """
     serializer_class = LabTestRequestSerializer
-    permission_classes = [IsAuthenticated, IsLabTechnician]
-    queryset = LabTestRequest.objects.filter(status="PENDING")
+    policy_resource = "lab_worklist"
     lookup_field = "id"
 
+    def get_queryset(self):
+        return LabTestRequestSerializer.setup_eager_loading(worklist.open_requests())
+
+    def claimed(self, request_id):
+        lab_request = self.get_queryset().get(id=request_id)
+        return Response(self.get_serializer(lab_request).data)
+
+    @action(detail=False, methods=["post"])
+    def next(self, request):
+        request_id = worklist.claim_next(request.user)
+        if request_id is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.claimed(request_id)
+
+    @action(detail=True, methods=["post"])
+    def claim(self, request, id=None):
+        if worklist.claim(id, request.user):
+            return self.claimed(id)
+        if not LabTestRequest.objects.filter(id=id, status__in=worklist.OPEN).exists():
+            return Response({"detail": "Invalid or already processed request."}, status=404)
+        return Response({"detail": "Already claimed by another technician."}, status=409)
+
+    @action(detail=True, methods=["post"])
+    def release(self, request, id=None):
+        if not worklist.release(id, request.user):
+            return Response({"detail": "You do not hold this request."}, status=409)
+        return self.claimed(id)
+
 
 class CompletedLabRequestsView(viewsets.ReadOnlyModelViewSet):
     serializer_class = LabTestRequestSerializer
-    permission_classes = [IsAuthenticated, IsLabTechnician]
-    queryset = LabTestRequest.objects.filter(status="COMPLETED")
+    policy_resource = "lab_worklist"
     lookup_field = "id"
 
+    def get_queryset(self):
+        return LabTestRequestSerializer.setup_eager_loading(
+            LabTestRequest.objects.filter(status="COMPLETED").order_by("-requested_at", "-id")
+        )
+
 
 class ProcessLabRequestView(viewsets.ModelViewSet):
     """
     POST /lab/process/?request_id=<id>
     Body: { "result_details": "<JSON string>" }
 
+    - Claims the request (unless this technician already holds it)
     - Saves LabTestResult
     - Marks LabTestRequest as COMPLETED
     - AUTO generates Bill using LabTestType price
     """
     serializer_class = LabTestResultSerializer
-    permission_classes = [IsAuthenticated, IsLabTechnician]
+    policy_resource = "lab_worklist"
 
     def get_queryset(self):
-        return LabTestResult.objects.all()
+        return LabTestResult.objects.select_related(
+            "lab_request__patient", "lab_request__doctor", "bill__patient"
+        )
 
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         request_id = request.query_params.get("request_id")
 
         if not request_id:
             return Response({"detail": "request_id is required"}, status=400)
 
-        try:
-            lab_request = LabTestRequest.objects.get(
-                id=request_id, status="PENDING"
-            )
-        except LabTestRequest.DoesNotExist:
+        # Claim (or confirm our claim) first; the row stays locked until
+        # commit, so a concurrent submit for the same sample cannot pass.
+        if not worklist.claim(request_id, request.user):
+            if LabTestRequest.objects.filter(id=request_id, status="PROCESSING").exists():
+                return Response({"detail": "Already claimed by another technician."}, status=409)
             return Response(
                 {"detail": "Invalid or already processed request."},
                 status=404,
             )
+        lab_request = LabTestRequest.objects.select_related("patient").get(id=request_id)
 
         data = request.data.copy()
         data["lab_request"] = request_id
 
+        # statuses and ranges come from the backend catalogue, not the client
+        rows = parameters.normalize(
+            lab_request.test_type, parameters.parse_details(data.get("result_details"))
+        )
+        if rows:
+            data["result_details"] = json.dumps(rows)
+
         serializer = self.get_serializer(data=data)
         serializer.is_valid(raise_exception=True)
         result = serializer.save(technician=request.user)
+        record_values(result, lab_request, rows)
 
         # Update lab request to COMPLETED
         lab_request.status = "COMPLETED"
@@ -70,15 +135,12 @@ class ProcessLabRequestView(viewsets.ModelViewSet):
         lab_request.save(update_fields=["status", "processed_at"])
 
         # AUTO BILLING
-        test_type_obj = LabTestType.objects.filter(
-            name=lab_request.test_type
-        ).first()
-        price = test_type_obj.price if test_type_obj else 0
+        price = processing.lab_prices([lab_request.test_type]).get(lab_request.test_type, 0)
 
         bill = Bill.objects.create(
             patient=lab_request.patient,
             amount=price,
-            description=f"Lab Test: {lab_request.test_type}",
+            description=processing.bill_description(lab_request),
             reference_id=result.id,
             created_by=request.user,
         )
@@ -87,6 +149,8 @@ class ProcessLabRequestView(viewsets.ModelViewSet):
         result.bill = bill
         result.save(update_fields=["bill"])
 
+        bus.publish(*processing.ready_event(lab_request))
+
         return Response(
             {
                 "message": "Result saved & Bill generated!",
@@ -96,17 +160,114 @@ class ProcessLabRequestView(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
+    @action(detail=False, methods=["post"])
+    @transaction.atomic
+    def batch(self, request):
+        """
+        POST /api/lab/process/batch/
+
+        Body: a JSON list of {"request_id", "result_details"} (or
+        {"results": [...]}), or a CSV upload in the "file" field with
+        request_id,parameter,value rows (see processing.items_from_csv).
+
+        Every item gets an outcome with its own status code; the response
+        is 200 even when some items failed.
+        """
+        upload = request.FILES.get("file")
+        if upload is not None:
+            try:
+                items = processing.items_from_csv(upload.read().decode("utf-8-sig"))
+            except (UnicodeDecodeError, ValueError) as exc:
+                return Response({"detail": str(exc)}, status=400)
+        else:
+            items = request.data
+            if isinstance(items, dict):
+                items = items.get("results")
+            if not isinstance(items, list):
+                return Response({"detail": "Send a list of results or a CSV file."}, status=400)
+
+        if not items:
+            return Response({"detail": "No results submitted."}, status=400)
+        if len(items) > processing.MAX_BATCH:
+            return Response(
+                {"detail": f"At most {processing.MAX_BATCH} results per batch."}, status=400
+            )
+
+        outcomes = processing.complete_batch(request.user, items)
+        completed = sum(1 for o in outcomes if o["status"] == 201)
+        return Response({
+            "completed": completed,
+            "failed": len(outcomes) - completed,
+            "results": outcomes,
+        })
+
 
 class LabBillingListView(viewsets.ReadOnlyModelViewSet):
     serializer_class = BillSerializer
-    permission_classes = [IsAuthenticated, IsLabTechnician]
+    policy_resource = "lab_billing"
 
     def get_queryset(self):
-        return Bill.objects.all().order_by("-created_at")
+        return Bill.objects.select_related("patient").order_by("-created_at")
 
 
 class LabResultDetailView(viewsets.ReadOnlyModelViewSet):
     serializer_class = LabTestRequestSerializer
-    permission_classes = [IsAuthenticated, IsDoctor | IsLabTechnician]
-    queryset = LabTestRequest.objects.filter(status="COMPLETED")
+    policy_resource = "lab_results"
     lookup_field = "id"
+
+    def get_queryset(self):
+        return LabTestRequestSerializer.setup_eager_loading(
+            policy.scope(self.request.user, self.policy_resource, LabTestRequest.objects, status="COMPLETED")
+        )
+
+
+class LabTestTypeListView(ReferenceDataMixin, ListAPIView):
+    """
+    Test catalogue with prices, for the doctor's lab referral dropdown.
+    """
+    queryset = LabTestType.objects.all().order_by("name")
+    serializer_class = LabTestTypeSerializer
+    policy_resource = "lab_catalog"
+    reference_dataset = "lab_test_types"
+
+
+class LabParameterCatalogView(APIView):
+    """
+    GET /api/lab/parameters/ -> {test_type: [{name, unit, low, high, isText}]}
+    """
+    policy_resource = "lab_catalog"
+
+    def get(self, request):
+        return Response(parameters.as_json())
+
+
+class AbnormalLabValuesView(ListAPIView):
+    """
+    GET /api/lab/results/abnormal/?parameter=Hemoglobin&from=YYYY-MM-DD&to=YYYY-MM-DD
+        [&test_type=BLOOD_TEST][&status=LOW|HIGH]
+
+    Abnormal values, newest first. ``parameter`` matches by prefix, so
+    "Hemoglobin" finds "Hemoglobin (Hb)". Without from/to it covers the
+    last 7 days; bad dates are a 400. Doctors only see patients they
+    referred.
+    """
+    serializer_class = LabResultValueSerializer
+    policy_resource = "abnormal_lab_values"
+
+    def get_queryset(self):
+        params = self.request.query_params
+        since, until = day_bounds(*date_range(params))
+        until = until or timezone.now()
+        since = since or until - timedelta(days=7)
+
+        qs = policy.scope(
+            self.request.user, self.policy_resource, LabResultValue.objects,
+            abnormal=True, recorded_at__gte=since, recorded_at__lt=until,
+        )
+        if params.get("parameter"):
+            qs = qs.filter(parameter__startswith=params["parameter"])
+        if params.get("test_type"):
+            qs = qs.filter(test_type=params["test_type"])
+        if params.get("status") in ("LOW", "HIGH"):
+            qs = qs.filter(status=params["status"])
+        return qs.select_related("patient", "result").order_by("-recorded_at", "-id")
@@ -0,0 +1,96 @@
+# labtech/worklist.py
+"""
+Lab worklist: ordering and technician claims.
+
+A technician claims a request before processing it. The claim is a
+single conditional UPDATE (PENDING -> PROCESSING, or taking over an
+expired claim), so when two technicians race for the same sample
+exactly one UPDATE matches the row and the other gets False.
+
+Claims older than settings.LAB_CLAIM_TIMEOUT_MINUTES are treated as
+abandoned and can be claimed again. Work is handed out most urgent
+first, then oldest, which the (status, -priority, requested_at) index
+serves directly.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import LabTestRequest
+
+OPEN = ["PENDING", "PROCESSING"]
+ORDERING = ("-priority", "requested_at", "id")
+
+
+def parse_priority(value):
+    """
+    0/1/2 or a label ("routine", "urgent", "stat"); anything else is routine.
+    """
+    for number, label in LabTestRequest.PRIORITY_CHOICES:
+        if str(value).strip().lower() in (str(number), label.lower()):
+            return number
+    return 0
+
+
+def claim_timeout():
+    return timedelta(minutes=settings.LAB_CLAIM_TIMEOUT_MINUTES)
+
+
+def claimable(technician=None, now=None):
+    """
+    Requests ``technician`` may claim: pending ones, expired claims and
+    (to make claiming idempotent) their own current claims.
+    """
+    now = now or timezone.now()
+    condition = Q(status="PENDING") | Q(status="PROCESSING", claimed_at__lt=now - claim_timeout())
+    if technician is not None:
+        condition |= Q(status="PROCESSING", claimed_by=technician)
+    return condition
+
+
+def open_requests():
+    return LabTestRequest.objects.filter(status__in=OPEN).order_by(*ORDERING)
+
+
+def claim(request_id, technician):
+    """
+    Claim one request. Returns True when ``technician`` now holds it.
+    """
+    now = timezone.now()
+    return bool(
+        LabTestRequest.objects.filter(claimable(technician, now), id=request_id).update(
+            status="PROCESSING", claimed_by=technician, claimed_at=now
+        )
+    )
+
+
+def claim_next(technician, attempts=5):
+    """
+    Claim the most urgent, oldest claimable request, or return None. A
+    lost race just moves on to the next candidate.
+    """
+    for _ in range(attempts):
+        candidates = list(
+            LabTestRequest.objects.filter(claimable(), ~Q(claimed_by=technician))
+            .order_by(*ORDERING)
+            .values_list("id", flat=True)[:attempts]
+        )
+        if not candidates:
+            return None
+        for request_id in candidates:
+            if claim(request_id, technician):
+                return request_id
+    return None
+
+
+def release(request_id, technician):
+    """
+    Hand a claimed request back to the queue. Only the holder can.
+    """
+    return bool(
+        LabTestRequest.objects.filter(
+            id=request_id, status="PROCESSING", claimed_by=technician
+        ).update(status="PENDING", claimed_by=None, claimed_at=None)
+    )
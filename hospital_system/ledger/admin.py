@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import LedgerEntry
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "date", "source", "kind", "reference_id", "amount", "department")
+    list_filter = ("source", "kind")
+    list_select_related = ("department",)
+
+    # append-only: corrections go through the billing tables
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+
+from labtech.models import Bill as LabBill
+from ledger import posting
+from ledger.models import LedgerEntry
+from pharmacist.models import PharmacySale
+from receptionist.models import Bill
+
+# source -> rows to post as
+# (id, amount, created_at, department_id, doctor_id, patient_id)
+SOURCES = {
+    "CONSULTATION": lambda: Bill.objects.values_list(
+        "id", "consultation_fee", "created_at",
+        "appointment__department_id", "appointment__doctor_id", "appointment__patient_id",
+    ),
+    "LAB": lambda: LabBill.objects.values_list(
+        "id", "amount", "created_at",
+        "lab_result__lab_request__appointment__department_id",
+        "lab_result__lab_request__doctor_id", "patient_id",
+    ),
+    "PHARMACY": lambda: PharmacySale.objects.filter(status="DISPENSED").values_list(
+        "id", "total_amount", "created_at",
+        "consultation__appointment__department_id", "doctor_id", "patient_id",
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Post a CHARGE for every bill and dispensed sale that has no ledger "
+        "entries yet. Safe to re-run: posted references are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch = options["batch_size"]
+        for source, rows in SOURCES.items():
+            posted = 0
+            last_id = 0
+            while True:
+                chunk = list(rows().filter(id__gt=last_id).order_by("id")[:batch])
+                if not chunk:
+                    break
+                last_id = chunk[-1][0]
+                done = set(
+                    LedgerEntry.objects.filter(
+                        source=source, reference_id__in=[row[0] for row in chunk]
+                    ).values_list("reference_id", flat=True)
+                )
+                entries = [
+                    posting.charge(source, pk, amount, at, department, doctor, patient)
+                    for pk, amount, at, department, doctor, patient in chunk
+                    if pk not in done
+                ]
+                LedgerEntry.objects.bulk_create(entries)
+                posted += len(entries)
+            self.stdout.write(f"{source}: posted {posted} entries")
+        self.stdout.write(self.style.SUCCESS("Ledger backfill complete"))
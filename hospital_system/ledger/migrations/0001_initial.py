@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('admin_panel', '0006_patient_search_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('CONSULTATION', 'Consultation'), ('LAB', 'Lab'), ('PHARMACY', 'Pharmacy')], max_length=20)),
+                ('kind', models.CharField(choices=[('CHARGE', 'Charge'), ('ADJUSTMENT', 'Adjustment'), ('REVERSAL', 'Reversal')], default='CHARGE', max_length=20)),
+                ('reference_id', models.PositiveIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('department', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='admin_panel.department')),
+                ('doctor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='admin_panel.patient')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'department', 'source'], name='ledger_date_dept_source_idx'), models.Index(fields=['source', 'reference_id'], name='ledger_reference_idx')],
+            },
+        ),
+    ]
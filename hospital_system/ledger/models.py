@@ -0,0 +1,72 @@
+# ledger/models.py
+from django.db import models
+
+from admin_panel.models import Department, User
+from receptionist.models import Patient
+
+
+class LedgerEntry(models.Model):
+    """
+    One revenue movement. Rows are only ever added: a changed bill gets
+    an ADJUSTMENT for the difference and a deleted one a REVERSAL, so the
+    sum of a reference's entries is what it currently bills.
+
+    ``date`` is the local business day the entry counts towards: the
+    bill's own day for the CHARGE, the day of the change for the others.
+    department, doctor and patient are copied from the bill's visit so
+    revenue reports never join back to the billing tables. They are kept
+    without database constraints: deleting a patient or a doctor later
+    must not rewrite (or block) the history.
+    """
+    SOURCE_CHOICES = [
+        ("CONSULTATION", "Consultation"),
+        ("LAB", "Lab"),
+        ("PHARMACY", "Pharmacy"),
+    ]
+    KIND_CHOICES = [
+        ("CHARGE", "Charge"),
+        ("ADJUSTMENT", "Adjustment"),
+        ("REVERSAL", "Reversal"),
+    ]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default="CHARGE")
+    # receptionist Bill, labtech Bill or PharmacySale id, depending on source
+    reference_id = models.PositiveIntegerField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    date = models.DateField()
+
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="ledger_entries"
+    )
+    doctor = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="ledger_entries"
+    )
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="ledger_entries"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "department", "source"], name="ledger_date_dept_source_idx"),
+            models.Index(fields=["source", "reference_id"], name="ledger_reference_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source} #{self.reference_id} {self.kind} {self.amount}"
@@ -0,0 +1,92 @@
+# ledger/posting.py
+"""
+Writing the revenue ledger.
+
+The three billing tables post here from their save/delete signals (see
+ledger/signals.py), inside the transaction that writes the bill:
+
+    CONSULTATION  receptionist Bill.consultation_fee
+    LAB           labtech Bill.amount
+    PHARMACY      PharmacySale.total_amount, once DISPENSED
+
+sync() compares what a bill should count for with what the ledger
+already holds for it and appends the difference. Saving a bill twice
+posts nothing the second time.
+
+bulk_create and queryset.update() send no signals. Paths that use them
+(batch lab results, the synthetic generator) build entries with charge()
+and bulk-insert them. backfill_ledger posts anything still missing.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import LedgerEntry
+
+CENT = Decimal("0.01")
+DIMENSIONS = ("department_id", "doctor_id", "patient_id")
+
+
+def money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def business_day(moment):
+    return timezone.localdate(moment) if moment else timezone.localdate()
+
+
+def charge(source, reference_id, amount, at, department_id=None, doctor_id=None, patient_id=None):
+    """
+    Unsaved CHARGE entry, for bulk inserts.
+    """
+    return LedgerEntry(
+        source=source,
+        kind="CHARGE",
+        reference_id=reference_id,
+        amount=money(amount),
+        date=business_day(at),
+        department_id=department_id,
+        doctor_id=doctor_id,
+        patient_id=patient_id,
+    )
+
+
+def sync(source, reference_id, amount, at, **dimensions):
+    """
+    Append whatever makes the reference's entries add up to ``amount``.
+    Returns the new entry, or None when the ledger already agrees.
+    """
+    amount = money(amount)
+    posted = LedgerEntry.objects.filter(source=source, reference_id=reference_id).aggregate(
+        total=Sum("amount"), entries=Count("id")
+    )
+    delta = amount - (posted["total"] or 0)
+    if not delta:
+        return None
+    if not posted["entries"]:
+        entry = charge(source, reference_id, amount, at, **dimensions)
+    else:
+        entry = LedgerEntry(
+            source=source,
+            kind="REVERSAL" if not amount else "ADJUSTMENT",
+            reference_id=reference_id,
+            amount=delta,
+            date=business_day(None),
+            **dimensions,
+        )
+    entry.save()
+    return entry
+
+
+def reverse(source, reference_id):
+    """
+    Cancel everything posted for a deleted bill, under the dimensions
+    it was last posted with.
+    """
+    last = (
+        LedgerEntry.objects.filter(source=source, reference_id=reference_id)
+        .order_by("-id").values(*DIMENSIONS).first()
+    )
+    if last is not None:
+        sync(source, reference_id, 0, None, **last)
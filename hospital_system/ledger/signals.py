@@ -0,0 +1,68 @@
+# ledger/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from doctor.models import Consultation
+from labtech.models import Bill as LabBill, LabTestRequest
+from pharmacist.models import PharmacySale
+from receptionist.models import Bill
+from . import posting
+
+
+@receiver(post_save, sender=Bill)
+def consultation_bill_saved(sender, instance, **kwargs):
+    appointment = instance.appointment
+    posting.sync(
+        "CONSULTATION", instance.id, instance.consultation_fee, instance.created_at,
+        department_id=appointment.department_id if appointment else None,
+        doctor_id=appointment.doctor_id if appointment else None,
+        patient_id=appointment.patient_id if appointment else None,
+    )
+
+
+@receiver(post_save, sender=LabBill)
+def lab_bill_saved(sender, instance, **kwargs):
+    # reference_id is the LabTestResult the bill was raised for
+    lab_request = (
+        LabTestRequest.objects.filter(result__id=instance.reference_id)
+        .values("appointment__department_id", "doctor_id").first()
+        if instance.reference_id else None
+    ) or {}
+    posting.sync(
+        "LAB", instance.id, instance.amount, instance.created_at,
+        department_id=lab_request.get("appointment__department_id"),
+        doctor_id=lab_request.get("doctor_id"),
+        patient_id=instance.patient_id,
+    )
+
+
+@receiver(post_save, sender=PharmacySale)
+def sale_saved(sender, instance, **kwargs):
+    department_id = (
+        Consultation.objects.filter(id=instance.consultation_id)
+        .values_list("appointment__department_id", flat=True).first()
+        if instance.consultation_id else None
+    )
+    posting.sync(
+        "PHARMACY", instance.id,
+        instance.total_amount if instance.status == "DISPENSED" else 0,
+        instance.created_at,
+        department_id=department_id,
+        doctor_id=instance.doctor_id,
+        patient_id=instance.patient_id,
+    )
+
+
+@receiver(post_delete, sender=Bill)
+def consultation_bill_deleted(sender, instance, **kwargs):
+    posting.reverse("CONSULTATION", instance.id)
+
+
+@receiver(post_delete, sender=LabBill)
+def lab_bill_deleted(sender, instance, **kwargs):
+    posting.reverse("LAB", instance.id)
+
+
+@receiver(post_delete, sender=PharmacySale)
+def sale_deleted(sender, instance, **kwargs):
+    posting.reverse("PHARMACY", instance.id)
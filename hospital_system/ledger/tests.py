@@ -0,0 +1,144 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from admin_panel.models import Department, User
+from labtech.models import Bill as LabBill, LabTestRequest, LabTestType
+from pharmacist.models import Medicine, PharmacySale
+from receptionist.models import Appointment, Bill, Patient
+from .models import LedgerEntry
+
+
+class LedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.general = Department.objects.create(name="General")
+        cls.ent = Department.objects.create(name="ENT")
+        cls.doctor = User.objects.create(username="doc001", role="DOCTOR", department=cls.general)
+        cls.receptionist = User.objects.create(username="rec001", role="RECEPTIONIST")
+        cls.technician = User.objects.create(username="lab001", role="LAB_TECHNICIAN")
+        cls.pharmacist = User.objects.create(username="pharm001", role="PHARMACIST")
+        cls.admin = User.objects.create(username="admin001", role="ADMIN")
+        cls.patient = Patient.objects.create(full_name="A", age=30)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def visit(self, department=None):
+        return Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, department=department or self.general
+        )
+
+    def entries(self, source, reference_id):
+        return list(
+            LedgerEntry.objects.filter(source=source, reference_id=reference_id)
+            .order_by("id").values_list("kind", "amount")
+        )
+
+    def test_consultation_bill_lifecycle(self):
+        client = self.client_for(self.receptionist)
+        res = client.post("/api/receptionist/bills/", {"appointment": self.visit().id, "consultation_fee": "300.10"})
+        bill_id = res.json()["id"]
+        entry = LedgerEntry.objects.get(source="CONSULTATION", reference_id=bill_id)
+        self.assertEqual(
+            (entry.amount, entry.department, entry.doctor, entry.patient, entry.date),
+            (Decimal("300.10"), self.general, self.doctor, self.patient, timezone.localdate()),
+        )
+
+        Bill.objects.get(id=bill_id).save()  # unchanged: nothing posted
+        bill = Bill.objects.get(id=bill_id)
+        bill.consultation_fee = 250
+        bill.save()
+        bill.delete()
+        self.assertEqual(self.entries("CONSULTATION", bill_id), [
+            ("CHARGE", Decimal("300.10")),
+            ("ADJUSTMENT", Decimal("-50.10")),
+            ("REVERSAL", Decimal("-250.00")),
+        ])
+
+    def test_lab_results_post_single_and_batch(self):
+        LabTestType.objects.create(name="CBC", price=350)
+        requests = [
+            LabTestRequest.objects.create(
+                appointment=self.visit(self.ent), doctor=self.doctor, patient=self.patient,
+                test_type="CBC", status="PENDING",
+            )
+            for _ in range(3)
+        ]
+        client = self.client_for(self.technician)
+        rows = [{"parameter": "Hb", "value": "13"}]
+        client.post(f"/api/lab/process/?request_id={requests[0].id}", {"result_details": rows}, format="json")
+        client.post("/api/lab/process/batch/", [
+            {"request_id": r.id, "result_details": rows} for r in requests[1:]
+        ], format="json")
+
+        entries = LedgerEntry.objects.filter(source="LAB")
+        self.assertEqual(
+            sorted(entries.values_list("reference_id", flat=True)),
+            sorted(LabBill.objects.values_list("id", flat=True)),
+        )
+        self.assertEqual(
+            set(entries.values_list("amount", "department_id", "doctor_id")),
+            {(Decimal("350.00"), self.ent.id, self.doctor.id)},
+        )
+
+    def test_only_dispensed_sales_count(self):
+        medicine = Medicine.objects.create(name="Paracetamol", unit_price=Decimal("2.50"), stock_quantity=10)
+        res = self.client_for(self.pharmacist).post("/api/pharmacy/create-sale/", {
+            "patient_id": self.patient.id, "items": [{"medicine": medicine.id, "quantity": 4}],
+        }, format="json")
+        self.assertEqual(self.entries("PHARMACY", res.json()["id"]), [("CHARGE", Decimal("10.00"))])
+
+        pending = PharmacySale.objects.create(patient=self.patient, status="PENDING", total_amount=5)
+        self.assertEqual(self.entries("PHARMACY", pending.id), [])
+        pending.status = "DISPENSED"
+        pending.save()
+        self.assertEqual(self.entries("PHARMACY", pending.id), [("CHARGE", Decimal("5.00"))])
+
+    def test_backfill_posts_only_missing_references(self):
+        first = Bill.objects.create(appointment=self.visit(), consultation_fee=300)
+        second = Bill.objects.create(appointment=self.visit(), consultation_fee=200)
+        LedgerEntry.objects.filter(reference_id=second.id).delete()
+
+        call_command("backfill_ledger", stdout=StringIO())
+        call_command("backfill_ledger", stdout=StringIO())
+        self.assertEqual(self.entries("CONSULTATION", first.id), [("CHARGE", Decimal("300.00"))])
+        self.assertEqual(self.entries("CONSULTATION", second.id), [("CHARGE", Decimal("200.00"))])
+
+    def test_revenue_report(self):
+        Bill.objects.create(appointment=self.visit(), consultation_fee=300)
+        Bill.objects.create(appointment=self.visit(self.ent), consultation_fee=200)
+        PharmacySale.objects.create(patient=self.patient, status="DISPENSED", total_amount=Decimal("12.50"))
+        client = self.client_for(self.admin)
+
+        res = client.get("/api/admin/revenue/?group=source")
+        self.assertEqual(Decimal(str(res.json()["total"])), Decimal("512.50"))
+        self.assertEqual(
+            [(r["source"], Decimal(str(r["amount"]))) for r in res.json()["rows"]],
+            [("CONSULTATION", Decimal("500.00")), ("PHARMACY", Decimal("12.50"))],
+        )
+
+        res = client.get(f"/api/admin/revenue/?group=department&department={self.ent.id}")
+        self.assertEqual(
+            [(r["department_name"], Decimal(str(r["amount"]))) for r in res.json()["rows"]],
+            [("ENT", Decimal("200.00"))],
+        )
+        self.assertEqual(client.get("/api/admin/revenue/?group=nothing").status_code, 400)
+
+    def test_revenue_rejects_bad_filters(self):
+        client = self.client_for(self.admin)
+        for query, param in [
+            ("from=2024-02-30", "from"),
+            ("to=2024-13-01", "to"),
+            ("from=2024-03-02&to=2024-03-01", "from"),
+            ("department=abc", "department"),
+        ]:
+            res = client.get(f"/api/admin/revenue/?{query}")
+            self.assertEqual(res.status_code, 400, query)
+            self.assertIn(param, res.json())
@@ -0,0 +1,65 @@
+# ledger/views.py
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from hillcrest.params import date_range, id_param
+
+from .models import LedgerEntry
+
+GROUPS = {
+    "date": ["date"],
+    "department": ["department_id", "department__name"],
+    "source": ["source"],
+    "doctor": ["doctor_id", "doctor__first_name", "doctor__last_name"],
+}
+
+
+class RevenueView(APIView):
+    """
+    GET /api/admin/revenue/?from=YYYY-MM-DD&to=YYYY-MM-DD
+        [&department=<id>][&source=CONSULTATION|LAB|PHARMACY]
+        [&group=date,department,source,doctor]
+
+    Net revenue from the ledger, one aggregate query over the
+    (date, department, source) index. Dates are inclusive and default to
+    the last 30 days; ``group`` defaults to date. Bad dates or a
+    non-numeric department are a 400.
+    """
+    policy_resource = "reports"
+
+    def get(self, request):
+        params = request.query_params
+        since, until = date_range(params)
+        until = until or timezone.localdate()
+        since = since or until - timedelta(days=29)
+        department = id_param(params, "department")
+        groups = [g for g in (params.get("group") or "date").split(",") if g in GROUPS]
+        if not groups:
+            return Response({"detail": f"group must be one of {', '.join(GROUPS)}"}, status=400)
+
+        entries = LedgerEntry.objects.filter(date__gte=since, date__lte=until)
+        if department is not None:
+            entries = entries.filter(department_id=department)
+        if params.get("source"):
+            entries = entries.filter(source=params["source"].upper())
+
+        columns = [c for g in groups for c in GROUPS[g]]
+        rows = list(entries.values(*columns).annotate(amount=Sum("amount")).order_by(*columns))
+        for row in rows:
+            if "doctor_id" in row:
+                row["doctor_name"] = " ".join(
+                    filter(None, [row.pop("doctor__first_name"), row.pop("doctor__last_name")])
+                )
+            if "department_id" in row:
+                row["department_name"] = row.pop("department__name")
+
+        return Response({
+            "from": since,
+            "to": until,
+            "total": sum((row["amount"] for row in rows), 0),
+            "rows": rows,
+        })
@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Event
+
+
+@admin.register(Event)
+class EventAdmin(admin.ModelAdmin):
+    list_display = ("id", "type", "role", "user", "created_at")
+    list_filter = ("type", "role")
+    list_select_related = ("user",)
@@ -0,0 +1,83 @@
+# notifications/bus.py
+"""
+Event bus for "something changed, refetch" notifications.
+
+publish() stores an Event once the surrounding transaction commits, so
+clients are never told about rows they cannot read yet, and nothing is
+sent for a rolled-back request. It then bumps a counter in the default
+cache. Open streams poll that counter and query the Event table only
+when it moves.
+
+Event types:
+  lab_result.ready        -> the requesting doctor
+  lab_request.created     -> lab technicians
+  prescription.created    -> pharmacists
+  prescription.dispensed  -> pharmacists
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Event
+
+COUNTER_KEY = "events:published"
+
+
+def _bump():
+    try:
+        cache.incr(COUNTER_KEY)
+    except ValueError:
+        cache.add(COUNTER_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def publish(type, payload, role="", user_id=None):
+    def store():
+        Event.objects.create(type=type, payload=payload, role=role, user_id=user_id)
+        _bump()
+
+    transaction.on_commit(store)
+
+
+def publish_many(events):
+    """
+    publish() for a batch: ``events`` is a list of (type, payload, role,
+    user_id). One INSERT and one counter bump for all of them.
+    """
+    events = [
+        Event(type=type, payload=payload, role=role, user_id=user_id)
+        for type, payload, role, user_id in events
+    ]
+    if not events:
+        return
+
+    def store():
+        Event.objects.bulk_create(events)
+        _bump()
+
+    transaction.on_commit(store)
+
+
+async def apublished():
+    """
+    Counter that changes whenever an event is published.
+    """
+    return await cache.aget(COUNTER_KEY)
+
+
+def visible_to(user):
+    return Event.objects.filter(
+        Q(role="") | Q(role=user.role),
+        Q(user__isnull=True) | Q(user_id=user.id),
+    )
+
+
+def events_after(user, last_id, limit=100):
+    return list(
+        visible_to(user).filter(id__gt=last_id).order_by("id")[:limit]
+    )
+
+
+def latest_id():
+    return Event.objects.order_by("-id").values_list("id", flat=True).first() or 0
@@ -0,0 +1,29 @@
+# notifications/models.py
+from django.db import models
+
+from admin_panel.models import User
+
+
+class Event(models.Model):
+    """
+    One published notification. The auto-increment id doubles as the
+    SSE event id, so a reconnecting client replays everything after the
+    last id it saw.
+
+    An event goes to everyone with ``role`` (blank = every role) and, when
+    ``user`` is set, only to that user.
+    """
+    type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    role = models.CharField(max_length=20, blank=True, choices=User.ROLE_CHOICES)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="events",
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.id} {self.type}"
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from admin_panel.models import Department, User
+from labtech.models import LabTestRequest
+from pharmacist.models import Medicine
+from receptionist.models import Appointment, Patient
+from . import bus
+from .models import Event
+
+STREAM_URL = "/api/events/stream/"
+
+
+class EventBusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="General")
+        cls.doctor = User.objects.create(username="doc001", role="DOCTOR", department=cls.department)
+        cls.other_doctor = User.objects.create(username="doc002", role="DOCTOR", department=cls.department)
+        cls.technician = User.objects.create(username="lab001", role="LAB_TECHNICIAN")
+        cls.pharmacist = User.objects.create(username="pharm001", role="PHARMACIST")
+        cls.patient = Patient.objects.create(full_name="A", age=30)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_lab_result_goes_to_the_requesting_doctor_only(self):
+        appointment = Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, department=self.department
+        )
+        lab_request = LabTestRequest.objects.create(
+            appointment=appointment, doctor=self.doctor, patient=self.patient,
+            test_type="CBC", status="PENDING",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client_for(self.technician).post(
+                f"/api/lab/process/?request_id={lab_request.id}",
+                {"result_details": "[]"}, format="json",
+            )
+        self.assertEqual(res.status_code, 201)
+
+        [event] = bus.events_after(self.doctor, 0)
+        self.assertEqual(event.type, "lab_result.ready")
+        self.assertEqual(event.payload["lab_request"], lab_request.id)
+        self.assertEqual(bus.events_after(self.other_doctor, 0), [])
+        self.assertEqual(bus.events_after(self.pharmacist, 0), [])
+
+    def test_failed_sale_publishes_nothing(self):
+        medicine = Medicine.objects.create(name="ORS", unit_price=Decimal("18.00"), stock_quantity=1)
+        client = self.client_for(self.pharmacist)
+        with self.captureOnCommitCallbacks(execute=True):
+            res = client.post("/api/pharmacy/create-sale/", {
+                "patient_id": self.patient.id,
+                "items": [{"medicine": medicine.id, "quantity": 2}],
+            }, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(Event.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = client.post("/api/pharmacy/create-sale/", {
+                "patient_id": self.patient.id,
+                "items": [{"medicine": medicine.id, "quantity": 1}],
+            }, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual([e.type for e in bus.events_after(self.pharmacist, 0)], ["prescription.dispensed"])
+
+    async def test_stream_replays_after_last_event_id(self):
+        first = await Event.objects.acreate(type="prescription.created", payload={"consultation": 1}, role="PHARMACIST")
+        await Event.objects.acreate(type="lab_request.created", payload={"lab_request": 9}, role="LAB_TECHNICIAN")
+        second = await Event.objects.acreate(type="prescription.created", payload={"consultation": 2}, role="PHARMACIST")
+
+        res = await self.async_client.get(
+            STREAM_URL,
+            {"token": str(AccessToken.for_user(self.pharmacist))},
+            headers={"Last-Event-ID": str(first.id)},
+        )
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        chunk = await anext(aiter(res.streaming_content))
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        self.assertEqual(
+            chunk,
+            f'id: {second.id}\nevent: prescription.created\ndata: {{"consultation": 2}}\n\n',
+        )
+
+    async def test_stream_requires_a_token(self):
+        res = await self.async_client.get(STREAM_URL)
+        self.assertEqual(res.status_code, 401)
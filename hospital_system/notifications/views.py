@@ -0,0 +1,65 @@
+# notifications/views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from admin_panel import policy
+from hillcrest import sse
+from . import bus
+
+# streams check the publish counter (a cache read) this often
+POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15.0
+
+
+def _start_id(request):
+    """
+    Where to resume: Last-Event-ID (sent by EventSource on reconnect) or
+    ?last_event_id=. Fresh connections start at the newest event.
+    """
+    raw = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+async def event_stream(request):
+    """
+    GET /api/events/stream/?token=<access>  (text/event-stream)
+    Each event is sent as "event: <type>" with its id and JSON payload.
+    """
+    user = await sse.authenticate(request)
+    if user is None:
+        return sse.denied()
+    if not policy.allowed(user.role, "events", "read"):
+        return sse.denied(403, "You do not have permission to perform this action.")
+
+    last_id = _start_id(request)
+    if last_id is None:
+        last_id = await sync_to_async(bus.latest_id)()
+
+    async def events():
+        nonlocal last_id
+        seen = object()  # forces one catch-up read on connect
+        idle = 0.0
+        while True:
+            counter = await bus.apublished()
+            # the heartbeat also re-reads, in case the cache is not shared
+            # with the worker that published
+            if counter != seen or idle >= HEARTBEAT_SECONDS:
+                if idle >= HEARTBEAT_SECONDS:
+                    yield sse.HEARTBEAT
+                seen = counter
+                idle = 0.0
+                while True:
+                    batch = await sync_to_async(bus.events_after)(user, last_id)
+                    for item in batch:
+                        last_id = item.id
+                        yield sse.event(item.payload, name=item.type, event_id=item.id)
+                    if len(batch) < 100:
+                        break
+            await asyncio.sleep(POLL_SECONDS)
+            idle += POLL_SECONDS
+
+    return sse.stream_response(events())
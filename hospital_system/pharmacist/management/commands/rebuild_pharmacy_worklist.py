@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pharmacist import worklist
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the pharmacy worklist (ActivePrescription) from consultations "
+        "and sales. Needed after loading data that bypasses model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            total = worklist.rebuild(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} open prescriptions in {time.perf_counter() - start:.1f}s"
+        ))
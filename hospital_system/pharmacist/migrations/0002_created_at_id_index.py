@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0005_created_at_id_index'),
+        ('doctor', '0006_delete_labtestrequest'),
+        ('pharmacist', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pharmacysale',
+            index=models.Index(fields=['created_at', 'id'], name='pharmsale_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_worklist(apps, schema_editor):
+    Consultation = apps.get_model("doctor", "Consultation")
+    ActivePrescription = apps.get_model("pharmacist", "ActivePrescription")
+    open_consultations = (
+        Consultation.objects.filter(prescriptions__isnull=False)
+        .exclude(pharmacy_sale__status="DISPENSED")
+        .distinct()
+        .values_list("id", "created_at")
+    )
+    batch = []
+    for consultation_id, created_at in open_consultations.iterator(chunk_size=2000):
+        batch.append(ActivePrescription(consultation_id=consultation_id, created_at=created_at))
+        if len(batch) == 2000:
+            ActivePrescription.objects.bulk_create(batch)
+            batch = []
+    ActivePrescription.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctor', '0007_consultationterm'),
+        ('pharmacist', '0002_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivePrescription',
+            fields=[
+                ('consultation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='active_prescription', serialize=False, to='doctor.consultation')),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.RunPython(fill_worklist, migrations.RunPython.noop),
+    ]
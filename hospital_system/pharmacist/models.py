@@ -71,6 +71,11 @@ class PharmacySale(models.Model):
 
     def __str__(self):
         return f"Pharmacy Sale #{self.id} - {self.patient.patient_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="pharmsale_created_id_idx"),
+        ]
     
 
 class PharmacySaleItem(models.Model):
@@ -93,3 +98,21 @@ class PharmacySaleItem(models.Model):
 
     def __str__(self):
         return f"{self.medicine_name} x {self.quantity} (Sale #{self.sale_id})"
+
+
+class ActivePrescription(models.Model):
+    """
+    Pharmacy worklist: one row per consultation that has prescription
+    items and no dispensed sale yet. Kept in step by pharmacist/worklist.py
+    so the worklist reads only open work, not the whole history.
+    """
+    consultation = models.OneToOneField(
+        Consultation,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="active_prescription",
+    )
+    created_at = models.DateTimeField(db_index=True)  # the consultation's
+
+    def __str__(self):
+        return f"Open prescription for consultation {self.consultation_id}"
@@ -2,6 +2,7 @@
 from decimal import Decimal
 from rest_framework import serializers
 
+from hillcrest.fastread import ValuesReader
 from admin_panel.models import User
 from receptionist.models import Patient
 from doctor.models import Consultation, PrescriptionItem
@@ -69,10 +70,21 @@ class PharmacySaleSerializer(serializers.ModelSerializer):
         ]
 
     def get_doctor_name(self, obj):
-        if obj.doctor:
-            full = f"{obj.doctor.first_name} {obj.doctor.last_name}".strip()
-            return full if full else obj.doctor.username
+        doctor = obj.doctor
+        return doctor_name(doctor.pk, doctor.first_name, doctor.last_name, doctor.username) if doctor else ""
+
+
+def doctor_name(doctor_id, first_name, last_name, username):
+    if doctor_id is None:
         return ""
+    full = f"{first_name} {last_name}".strip()
+    return full if full else username
+
+
+# list responses without model instances (hillcrest/fastread.py)
+sale_list_reader = ValuesReader(PharmacySaleSerializer, methods={
+    "doctor_name": (("doctor", "doctor__first_name", "doctor__last_name", "doctor__username"), doctor_name),
+})
 
 
 class PharmacySaleCreateItemSerializer(serializers.Serializer):
@@ -0,0 +1,20 @@
+# pharmacist/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from doctor.models import PrescriptionItem
+from . import worklist
+from .models import PharmacySale
+
+
+@receiver(post_save, sender=PrescriptionItem)
+@receiver(post_delete, sender=PrescriptionItem)
+def prescription_changed(sender, instance, **kwargs):
+    worklist.refresh(instance.consultation_id)
+
+
+@receiver(post_save, sender=PharmacySale)
+@receiver(post_delete, sender=PharmacySale)
+def sale_changed(sender, instance, **kwargs):
+    if instance.consultation_id:
+        worklist.refresh(instance.consultation_id)
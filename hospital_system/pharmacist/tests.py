@@ -1,3 +1,203 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import skipIf
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from admin_panel.models import Department, User
+from doctor.models import Consultation, PrescriptionItem
+from hillcrest import refcache
+from receptionist.models import Appointment, Patient
+from . import worklist
+from .models import ActivePrescription, Medicine, PharmacySale, PharmacySaleItem
+from .serializers import PharmacySaleSerializer
+
+SALE_URL = "/api/pharmacy/create-sale/"
+
+
+class CreateSaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pharmacist = User.objects.create(username="pharm001", role="PHARMACIST")
+        cls.patient = Patient.objects.create(full_name="A", age=30)
+        cls.paracetamol = Medicine.objects.create(name="Paracetamol", unit_price=Decimal("2.00"), stock_quantity=10)
+        cls.ors = Medicine.objects.create(name="ORS", unit_price=Decimal("18.00"), stock_quantity=1)
+
+    def setUp(self):
+        refcache.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.pharmacist)
+
+    def sell(self, *items):
+        return self.client.post(SALE_URL, {
+            "patient_id": self.patient.id,
+            "items": [{"medicine": m.id, "quantity": q} for m, q in items],
+        }, format="json")
+
+    def test_sale_deducts_stock_and_bills_items(self):
+        res = self.sell((self.paracetamol, 4), (self.ors, 1))
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["total_amount"], "26.00")
+        self.assertEqual(len(res.json()["items"]), 2)
+        self.paracetamol.refresh_from_db()
+        self.assertEqual(self.paracetamol.stock_quantity, 6)
+
+    def test_failure_rolls_back_the_whole_sale(self):
+        res = self.sell((self.paracetamol, 4), (self.ors, 2))
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["detail"], "Not enough stock for ORS. Available: 1")
+        self.paracetamol.refresh_from_db()
+        self.assertEqual(self.paracetamol.stock_quantity, 10)
+        self.assertFalse(PharmacySale.objects.exists())
+
+    def test_sale_refreshes_cached_medicine_list(self):
+        before = self.client.get("/api/pharmacy/medicines/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell((self.paracetamol, 4))
+        after = self.client.get("/api/pharmacy/medicines/", headers={"If-None-Match": before["ETag"]})
+        self.assertEqual(after.status_code, 200)
+        stock = {m["name"]: m["stock_quantity"] for m in after.json()}
+        self.assertEqual(stock["Paracetamol"], 6)
+
+    def test_duplicate_lines_are_checked_together(self):
+        res = self.sell((self.paracetamol, 6), (self.paracetamol, 6))
+        self.assertEqual(res.status_code, 400)
+        self.paracetamol.refresh_from_db()
+        self.assertEqual(self.paracetamol.stock_quantity, 10)
+
+
+class SaleListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pharmacist = User.objects.create(username="pharm001", role="PHARMACIST")
+        doctor = User.objects.create(username="doc001", role="DOCTOR", first_name="Asha", last_name="Rao")
+        patient = Patient.objects.create(full_name="A", age=30)
+        medicine = Medicine.objects.create(name="Paracetamol", unit_price=Decimal("2.00"), stock_quantity=10)
+        with_doctor = PharmacySale.objects.create(patient=patient, doctor=doctor, total_amount=Decimal("6.50"))
+        walk_in = PharmacySale.objects.create(patient=patient, total_amount=Decimal("4"))
+        for sale, item_medicine, quantity in [(with_doctor, medicine, 2), (with_doctor, None, 1), (walk_in, medicine, 2)]:
+            PharmacySaleItem.objects.create(
+                sale=sale, medicine=item_medicine, medicine_name="Paracetamol", quantity=quantity,
+                unit_price=Decimal("2.00"), subtotal=Decimal("2.00") * quantity,
+            )
+        PharmacySale.objects.create(patient=patient, doctor=doctor)
+
+    def test_fast_list_matches_the_serializer_byte_for_byte(self):
+        client = APIClient()
+        client.force_authenticate(self.pharmacist)
+        with self.assertNumQueries(2):
+            res = client.get("/api/pharmacy/sales/")
+        queryset = PharmacySale.objects.prefetch_related("items__medicine").order_by("-created_at")
+        self.assertEqual(res.content, JSONRenderer().render(PharmacySaleSerializer(queryset, many=True).data))
+        self.assertEqual([len(sale["items"]) for sale in res.json()], [0, 1, 2])
+        self.assertEqual([sale["doctor_name"] for sale in res.json()], ["Asha Rao", "", "Asha Rao"])
+
+
+# deduct_stock's conditional F() updates need row-level write locking;
+# SQLite locks the whole database per write transaction, so concurrent
+# dispenses fail with "database is locked" instead of queuing
+@skipIf(connection.vendor == "sqlite", "SQLite serializes all writers with one database lock")
+class ParallelDispenseTests(TransactionTestCase):
+    workers = 8
+    attempts = 40
+
+    def test_stock_never_goes_negative(self):
+        pharmacist = User.objects.create(username="pharm001", role="PHARMACIST")
+        patient = Patient.objects.create(full_name="A", age=30)
+        medicine = Medicine.objects.create(name="Amoxicillin", unit_price=Decimal("8.50"), stock_quantity=50)
+        other = Medicine.objects.create(name="Cetirizine", unit_price=Decimal("1.50"), stock_quantity=1000)
+
+        def dispense(n):
+            client = APIClient()
+            client.force_authenticate(pharmacist)
+            # alternate line order so lock ordering is exercised
+            items = [{"medicine": medicine.id, "quantity": 3}, {"medicine": other.id, "quantity": 1}]
+            try:
+                return client.post(SALE_URL, {
+                    "patient_id": patient.id,
+                    "items": items if n % 2 else items[::-1],
+                }, format="json").status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            statuses = list(pool.map(dispense, range(self.attempts)))
+
+        sold = statuses.count(201)
+        self.assertEqual(sold + statuses.count(400), self.attempts)
+        self.assertEqual(sold, 16)
+
+        medicine.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(medicine.stock_quantity, 50 - 3 * sold)
+        self.assertEqual(other.stock_quantity, 1000 - sold)
+        self.assertEqual(PharmacySale.objects.count(), sold)
+        self.assertEqual(PharmacySaleItem.objects.count(), 2 * sold)
+
+
+class WorklistTests(TestCase):
+    url = "/api/pharmacy/active-prescriptions/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="General")
+        cls.doctor = User.objects.create(username="doc001", role="DOCTOR", department=cls.department)
+        cls.pharmacist = User.objects.create(username="pharm001", role="PHARMACIST")
+        cls.patient = Patient.objects.create(full_name="A", age=30)
+        cls.paracetamol = Medicine.objects.create(name="Paracetamol", unit_price=Decimal("2.00"), stock_quantity=100)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.pharmacist)
+
+    def consult(self, *medicines):
+        appointment = Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, department=self.department
+        )
+        consultation = Consultation.objects.create(
+            appointment=appointment, doctor=self.doctor, patient=self.patient, diagnosis="Fever"
+        )
+        for name in medicines:
+            PrescriptionItem.objects.create(
+                consultation=consultation, medicine_name=name, quantity=2,
+                dosage="1 tablet", frequency="1-0-1", duration="3 days",
+            )
+        return consultation
+
+    def open_ids(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        return [row["id"] for row in res.json()]
+
+    def test_prescribed_consultations_are_listed_newest_first(self):
+        older = self.consult("Paracetamol", "ORS")
+        self.consult()  # nothing prescribed
+        newer = self.consult("Paracetamol")
+        self.assertEqual(self.open_ids(), [newer.id, older.id])
+
+    def test_dispensing_closes_and_deleting_the_sale_reopens(self):
+        consultation = self.consult("Paracetamol")
+        res = self.client.post("/api/pharmacy/create-sale/", {
+            "consultation_id": consultation.id,
+            "items": [{"medicine": self.paracetamol.id, "quantity": 2}],
+        }, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.open_ids(), [])
+
+        PharmacySale.objects.get(consultation=consultation).delete()
+        self.assertEqual(self.open_ids(), [consultation.id])
+
+    def test_removing_every_item_closes(self):
+        consultation = self.consult("Paracetamol")
+        consultation.prescriptions.all().delete()
+        self.assertFalse(ActivePrescription.objects.exists())
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        for medicines in [("Paracetamol",), (), ("ORS", "Zinc")]:
+            self.consult(*medicines)
+        before = list(ActivePrescription.objects.order_by("pk").values_list("pk", "created_at"))
+        self.assertEqual(worklist.rebuild(), 2)
+        self.assertEqual(list(ActivePrescription.objects.order_by("pk").values_list("pk", "created_at")), before)
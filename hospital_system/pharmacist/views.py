@@ -1,11 +1,16 @@
+from collections import defaultdict
 from decimal import Decimal
 from django.db import transaction
+from django.db.models import F
 
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, status
+from rest_framework.exceptions import APIException, NotFound
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from admin_panel.permissions import IsPharmacist
+from hillcrest.fastread import FastListMixin
+from hillcrest.refcache import ReferenceDataMixin, invalidate_on_commit
+from notifications import bus
 from receptionist.models import Patient
 from doctor.models import Consultation
 
@@ -14,6 +19,7 @@ from .serializers import (
     MedicineSerializer,
     PharmacySaleSerializer,
     PharmacySaleCreateSerializer,
+    sale_list_reader,
     ActivePrescriptionSerializer,
 )
 
@@ -21,14 +27,11 @@ from .serializers import (
 # ===========================
 # Medicines / Stock
 # ===========================
-class MedicineViewSet(viewsets.ModelViewSet):
+class MedicineViewSet(ReferenceDataMixin, viewsets.ModelViewSet):
+    reference_dataset = "medicines"
     queryset = Medicine.objects.all().order_by("name")
     serializer_class = MedicineSerializer
-
-    def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
-            return [permissions.IsAuthenticated()]
-        return [permissions.IsAuthenticated(), IsPharmacist()]
+    policy_resource = "medicines"
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -42,16 +45,15 @@ class MedicineViewSet(viewsets.ModelViewSet):
 # Active prescriptions for pharmacy
 # ===========================
 class ActivePrescriptionListView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsPharmacist]
+    policy_resource = "pharmacy"
 
     def get(self, request):
+        # driven by the worklist table, so the cost follows open work only
         consultations = (
-            Consultation.objects.filter(prescriptions__isnull=False)
-            .exclude(pharmacy_sale__status="DISPENSED")
+            Consultation.objects.filter(active_prescription__isnull=False)
             .select_related("patient", "doctor")
             .prefetch_related("prescriptions")
-            .order_by("-created_at")
-            .distinct()
+            .order_by("-active_prescription__created_at")
         )
 
         serializer = ActivePrescriptionSerializer(consultations, many=True)
@@ -59,7 +61,7 @@ class ActivePrescriptionListView(APIView):
 
 
 class ConsultationForPharmacyView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsPharmacist]
+    policy_resource = "pharmacy"
 
     def get(self, request, consultation_id):
         try:
@@ -79,9 +81,10 @@ class ConsultationForPharmacyView(APIView):
 # ===========================
 # Pharmacy Sales (History + Create)
 # ===========================
-class PharmacySaleViewSet(viewsets.ReadOnlyModelViewSet):
+class PharmacySaleViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = PharmacySaleSerializer
-    permission_classes = [permissions.IsAuthenticated, IsPharmacist]
+    list_reader = sale_list_reader
+    policy_resource = "pharmacy"
 
     def get_queryset(self):
         qs = (
@@ -96,8 +99,21 @@ class PharmacySaleViewSet(viewsets.ReadOnlyModelViewSet):
         return qs
 
 
+class DispenseRejected(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Unable to dispense this sale."
+
+
 class CreatePharmacySaleView(APIView):
-    permission_classes = [permissions.IsAuthenticated, IsPharmacist]
+    """
+    Dispense medicines and bill them as one transaction.
+
+    Stock is decremented with conditional UPDATEs (stock_quantity >= qty)
+    taken in medicine-id order, so concurrent sales can neither oversell
+    nor deadlock each other. Any failure raises and rolls the whole sale
+    back; nothing half-built is left behind.
+    """
+    policy_resource = "pharmacy"
 
     @transaction.atomic
     def post(self, request):
@@ -107,82 +123,86 @@ class CreatePharmacySaleView(APIView):
 
         consultation = None
         doctor = None
-        patient = None
 
         consultation_id = data.get("consultation_id")
         if consultation_id:
             try:
-                consultation = Consultation.objects.select_related(
-                    "patient", "doctor"
-                ).get(id=consultation_id)
+                # row lock: two pharmacists cannot dispense the same prescription
+                consultation = (
+                    Consultation.objects
+                    .select_for_update(of=("self",))
+                    .select_related("patient", "doctor")
+                    .get(id=consultation_id)
+                )
             except Consultation.DoesNotExist:
-                return Response({"detail": "Consultation not found"}, status=404)
+                raise NotFound("Consultation not found")
 
-            if hasattr(consultation, "pharmacy_sale") and consultation.pharmacy_sale.status == "DISPENSED":
-                return Response(
-                    {"detail": "Prescription already dispensed"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            existing = PharmacySale.objects.filter(consultation=consultation).first()
+            if existing is not None and existing.status == "DISPENSED":
+                raise DispenseRejected("Prescription already dispensed")
+            if existing is not None:
+                # left behind by an earlier failed attempt
+                existing.delete()
 
             patient = consultation.patient
             doctor = consultation.doctor
 
         else:
-            patient_id = data.get("patient_id")
             try:
-                patient = Patient.objects.get(id=patient_id)
+                patient = Patient.objects.get(id=data.get("patient_id"))
             except Patient.DoesNotExist:
-                return Response({"detail": "Patient not found"}, status=404)
+                raise NotFound("Patient not found")
+
+        lines = [(item["medicine"], int(item["quantity"])) for item in data["items"]]
+        self.deduct_stock(lines)
 
+        total = sum((med.unit_price * qty for med, qty in lines), Decimal("0.00"))
         sale = PharmacySale.objects.create(
             patient=patient,
             doctor=doctor,
             consultation=consultation,
             created_by=request.user,
-            status="PENDING",
-            total_amount=Decimal("0.00"),
+            status="DISPENSED",
+            total_amount=total,
         )
-
-        total = Decimal("0.00")
-
-        for item_data in data["items"]:
-            med = item_data["medicine"]
-            qty = int(item_data["quantity"])
-
-            # VALIDATION
-            if qty <= 0:
-                return Response(
-                    {"detail": f"Invalid quantity selected for {med.name}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            if med.stock_quantity < qty:
-                return Response(
-                    {"detail": f"Not enough stock for {med.name}. Available: {med.stock_quantity}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Deduct stock
-            med.stock_quantity -= qty
-            med.save(update_fields=["stock_quantity"])
-
-            unit_price = med.unit_price
-            subtotal = unit_price * qty
-
-            PharmacySaleItem.objects.create(
+        PharmacySaleItem.objects.bulk_create(
+            PharmacySaleItem(
                 sale=sale,
                 medicine=med,
                 medicine_name=med.name,
                 quantity=qty,
-                unit_price=unit_price,
-                subtotal=subtotal,
+                unit_price=med.unit_price,
+                subtotal=med.unit_price * qty,
             )
+            for med, qty in lines
+        )
 
-            total += subtotal
-
-        sale.total_amount = total
-        sale.status = "DISPENSED"
-        sale.save(update_fields=["total_amount", "status"])
+        bus.publish(
+            "prescription.dispensed",
+            {"sale": sale.id, "consultation": consultation.id if consultation else None},
+            role="PHARMACIST",
+        )
 
         out = PharmacySaleSerializer(sale)
         return Response(out.data, status=201)
+
+    def deduct_stock(self, lines):
+        wanted = defaultdict(int)
+        medicines = {}
+        for med, qty in lines:
+            wanted[med.pk] += qty
+            medicines[med.pk] = med
+
+        # queryset.update() sends no signals; stock is shown in the medicine list
+        invalidate_on_commit("medicines")
+        for pk in sorted(wanted):
+            updated = Medicine.objects.filter(
+                pk=pk, stock_quantity__gte=wanted[pk]
+            ).update(stock_quantity=F("stock_quantity") - wanted[pk])
+            if not updated:
+                available = Medicine.objects.values_list(
+                    "stock_quantity", flat=True
+                ).get(pk=pk)
+                raise DispenseRejected(
+                    f"Not enough stock for {medicines[pk].name}. Available: {available}"
+                )
@@ -0,0 +1,53 @@
+# pharmacist/worklist.py
+"""
+Maintenance of the ActivePrescription worklist.
+
+A consultation is open while it has prescription items and no DISPENSED
+sale. refresh() re-derives that for one consultation and inserts or
+deletes its worklist row. It is called from signals (see
+pharmacist/signals.py) inside the writing transaction, so the worklist
+commits or rolls back together with the change that caused it.
+"""
+from doctor.models import Consultation
+
+from .models import ActivePrescription
+
+
+def open_consultations():
+    return Consultation.objects.filter(
+        prescriptions__isnull=False
+    ).exclude(pharmacy_sale__status="DISPENSED").distinct()
+
+
+def refresh(consultation_id):
+    created_at = (
+        open_consultations()
+        .filter(id=consultation_id)
+        .values_list("created_at", flat=True)
+        .first()
+    )
+    if created_at is None:
+        ActivePrescription.objects.filter(consultation_id=consultation_id).delete()
+    else:
+        ActivePrescription.objects.bulk_create(
+            [ActivePrescription(consultation_id=consultation_id, created_at=created_at)],
+            ignore_conflicts=True,
+        )
+
+
+def rebuild(batch_size=2000):
+    """
+    Recreate the whole worklist from consultations and sales. Returns the
+    number of open consultations.
+    """
+    ActivePrescription.objects.all().delete()
+    rows = []
+    total = 0
+    for consultation_id, created_at in open_consultations().values_list("id", "created_at").iterator(chunk_size=batch_size):
+        rows.append(ActivePrescription(consultation_id=consultation_id, created_at=created_at))
+        if len(rows) == batch_size:
+            ActivePrescription.objects.bulk_create(rows)
+            total += len(rows)
+            rows = []
+    ActivePrescription.objects.bulk_create(rows)
+    return total + len(rows)
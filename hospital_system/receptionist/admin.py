@@ -13,12 +13,14 @@ class PatientAdmin(admin.ModelAdmin):
 class AppointmentAdmin(admin.ModelAdmin):
     readonly_fields = ('token_number', 'created_at')
     list_display = ('token_number', 'patient', 'doctor', 'department', 'status')
+    list_select_related = ('patient', 'doctor', 'department')
     fields = ('patient', 'doctor', 'department', 'status')
 
 
 @admin.register(Bill)
 class BillAdmin(admin.ModelAdmin):
     list_display = ('appointment', 'get_patient', 'consultation_fee', 'created_at')
+    list_select_related = ('appointment__patient',)
 
     def get_patient(self, obj):
         return obj.appointment.patient.full_name
@@ -40,6 +42,7 @@ class VitalsAdmin(admin.ModelAdmin):
     )
 
     list_filter = ('recorded_at', 'patient')
+    list_select_related = ('patient',)
     search_fields = ('patient__full_name', 'blood_pressure')
     readonly_fields = ('recorded_at',)
 
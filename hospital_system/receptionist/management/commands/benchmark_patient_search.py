@@ -0,0 +1,91 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from admin_panel.sequences import reserve
+from hillcrest.synthetic import FIRST_NAMES, LAST_NAMES
+from receptionist.models import Patient, _last_patient_number, fold_name, normalize_phone
+from receptionist.search import search_patients
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the reception patient search (patient_id, phone prefix, name "
+        "prefix). --generate N bulk-inserts N extra patients first; they are "
+        "rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--generate", type=int, default=0)
+        parser.add_argument("--queries", type=int, default=300)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--batch", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                if options["generate"]:
+                    self.generate(options["generate"], options["batch"])
+                self.measure(options["queries"], options["limit"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def generate(self, count, batch):
+        start = time.perf_counter()
+        first = reserve("patient_id", count, initial=_last_patient_number) - count + 1
+        for offset in range(0, count, batch):
+            rows = []
+            for n in range(offset, min(offset + batch, count)):
+                name = f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}"
+                phone = f"8{self.random.randrange(10**9):09d}"
+                rows.append(Patient(
+                    patient_id=f"PT{first + n:04d}",
+                    full_name=name,
+                    age=40,
+                    contact_number=phone,
+                    contact_digits=normalize_phone(phone),
+                    search_name=fold_name(name),
+                ))
+            Patient.objects.bulk_create(rows)
+        self.stdout.write(f"inserted {count} patients in {time.perf_counter() - start:.1f}s")
+
+    def measure(self, queries, limit):
+        sample = list(
+            Patient.objects.order_by("?").values_list("patient_id", "contact_digits", "full_name")[:queries]
+        )
+        if not sample:
+            self.stdout.write("no patients to search")
+            return
+        self.stdout.write(f"table size: {Patient.objects.count()} patients")
+
+        cases = {
+            "patient_id": [pid for pid, _, _ in sample],
+            "phone (full)": [phone for _, phone, _ in sample if phone],
+            "phone (5-digit prefix)": [phone[:5] for _, phone, _ in sample if phone],
+            "name (3-letter prefix)": [name[:3] for _, _, name in sample],
+            "name (first name)": [name.split()[0] for _, _, name in sample],
+        }
+        self.stdout.write(f"{'lookup':<24} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'avg hits':>9}")
+        for label, terms in cases.items():
+            timings, hits = [], []
+            for term in terms:
+                start = time.perf_counter()
+                found = list(search_patients(term, limit))
+                timings.append((time.perf_counter() - start) * 1000)
+                hits.append(len(found))
+            timings.sort()
+            p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+            self.stdout.write(
+                f"{label:<24} {statistics.median(timings):>8.2f} {p95:>8.2f} "
+                f"{timings[-1]:>8.2f} {statistics.mean(hits):>9.1f}"
+            )
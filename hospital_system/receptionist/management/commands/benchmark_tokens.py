@@ -0,0 +1,73 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from admin_panel.models import Department, User
+from receptionist.models import Appointment, Patient
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure appointment booking latency while the appointments table "
+        "grows. Everything runs in one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000],
+            help="Table sizes to measure at (e.g. 1000 100000 1000000).",
+        )
+        parser.add_argument("--bookings", type=int, default=200)
+        parser.add_argument("--batch", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        department = Department.objects.create(name="Benchmark Dept")
+        doctor = User.objects.create(
+            username="benchmark-doctor", role="DOCTOR", department=department
+        )
+        patient = Patient.objects.create(full_name="Benchmark Patient", age=40)
+
+        rows = 0
+        self.stdout.write(f"{'rows':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+        for size in sorted(options["sizes"]):
+            while rows < size:
+                n = min(options["batch"], size - rows)
+                Appointment.objects.bulk_create(
+                    Appointment(
+                        patient=patient,
+                        doctor=doctor,
+                        department=department,
+                        token_number="HIST",
+                    )
+                    for _ in range(n)
+                )
+                rows += n
+
+            timings = []
+            for _ in range(options["bookings"]):
+                start = time.perf_counter()
+                Appointment.objects.create(
+                    patient=patient, doctor=doctor, department=department
+                )
+                timings.append((time.perf_counter() - start) * 1000)
+            rows += options["bookings"]
+
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f"{size:>10} {statistics.median(timings):>8.2f} {p95:>8.2f} {timings[-1]:>8.2f}"
+            )
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0005_created_at_id_index'),
+        ('receptionist', '0003_alter_appointment_patient_alter_vitals_patient_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['created_at', 'id'], name='appointment_created_id_idx'),
+        ),
+    ]
@@ -1,5 +1,51 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from admin_panel.models import User, Department
+from admin_panel.sequences import SequenceBlock
+from .tokens import next_token
+
+
+def _last_patient_number():
+    """
+    Highest PTnnnn number already issued; seeds the patient_id counter
+    the first time it is used on an existing database.
+    """
+    numbers = [
+        int(pid[2:])
+        for pid in Patient.objects.filter(patient_id__startswith="PT")
+        .values_list("patient_id", flat=True)
+        if pid[2:].isdigit()
+    ]
+    return max(numbers, default=0)
+
+
+def normalize_phone(value):
+    """
+    Digits only, without a country code: "+91 98470-12345" -> "9847012345".
+    """
+    digits = "".join(ch for ch in (value or "") if ch.isdigit())
+    return digits[-10:]
+
+
+def fold_name(value):
+    """
+    Case-folded, whitespace-collapsed name used for prefix search.
+    """
+    return " ".join((value or "").split()).casefold()
+
+
+_patient_ids = None
+
+
+def next_patient_id():
+    global _patient_ids
+    if _patient_ids is None:
+        _patient_ids = SequenceBlock(
+            "patient_id",
+            getattr(settings, "PATIENT_ID_BLOCK_SIZE", 1),
+            initial=_last_patient_number,
+        )
+    return f"PT{_patient_ids.next():04d}"
 
 
 class Patient(models.Model):
@@ -27,14 +73,18 @@ class Patient(models.Model):
     address = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # search keys, kept in sync by save(); see receptionist/search.py
+    contact_digits = models.CharField(max_length=10, blank=True, default="", editable=False, db_index=True)
+    search_name = models.CharField(max_length=200, blank=True, default="", editable=False, db_index=True)
+
     def save(self, *args, **kwargs):
         if not self.patient_id:
-            last = Patient.objects.order_by('id').last()
-            if last and last.patient_id.startswith("PT"):
-                number = int(last.patient_id[2:]) + 1
-                self.patient_id = f"PT{number:04d}"
-            else:
-                self.patient_id = "PT0001"
+            self.patient_id = next_patient_id()
+        self.contact_digits = normalize_phone(self.contact_number)
+        self.search_name = fold_name(self.full_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "contact_digits", "search_name"}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -42,6 +92,9 @@ class Patient(models.Model):
 
     class Meta:
         app_label = "admin_panel"  #  FORCE DISPLAY UNDER ADMIN_PANEL
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="patient_created_id_idx"),
+        ]
 
 
 class Appointment(models.Model):
@@ -62,14 +115,22 @@ class Appointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        if not self.token_number:
-            count = Appointment.objects.count() + 1
-            self.token_number = f"T{count:03d}"
-        super().save(*args, **kwargs)
+        if self.token_number:
+            return super().save(*args, **kwargs)
+
+        # token and row commit together, so a failed insert leaves no gap
+        with transaction.atomic():
+            self.token_number = next_token(self.doctor_id, self.department_id)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.token_number} - {self.patient.full_name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="appointment_created_id_idx"),
+        ]
+
    
 
 
@@ -89,6 +150,9 @@ class Bill(models.Model):
 
     class Meta:
         app_label = "admin_panel"  # 
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="bill_created_id_idx"),
+        ]
 
 
 class Vitals(models.Model):
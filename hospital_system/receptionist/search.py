@@ -0,0 +1,59 @@
+# receptionist/search.py
+"""
+Reception patient lookup.
+
+A query is routed to exactly one indexed lookup:
+
+    PT0042              exact patient_id (unique index)
+    98470 / +91 98470…  phone prefix on Patient.contact_digits
+    anything else       name prefix on Patient.search_name
+
+Prefix matches are index ranges that hold under the column's collation
+(see hillcrest/prefix.py).
+"""
+import re
+
+from hillcrest.prefix import prefix_match
+
+from .models import Patient, fold_name, normalize_phone
+
+PATIENT_ID_RE = re.compile(r"^PT\d+$", re.IGNORECASE)
+PHONE_RE = re.compile(r"^[\d\s+()-]+$")
+MIN_PHONE_DIGITS = 3
+
+
+def phone_prefix(query):
+    """
+    The contact_digits prefix for a phone query. Like normalize_phone for
+    a whole number, but a partial one keeps its leading digits, so the
+    "+91" country code or "0" trunk prefix is dropped explicitly:
+    "+91 98470" -> "98470", "0484 23" -> "48423".
+    """
+    digits = "".join(ch for ch in query if ch.isdigit())
+    if query.startswith("+") and digits.startswith("91"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        digits = digits[1:]
+    return normalize_phone(digits)
+
+
+def search_patients(query, limit=10):
+    query = (query or "").strip()
+    if not query:
+        return Patient.objects.none()
+
+    if PATIENT_ID_RE.match(query):
+        return Patient.objects.filter(patient_id=query.upper())
+
+    if PHONE_RE.match(query):
+        digits = phone_prefix(query)
+        if len(digits) < MIN_PHONE_DIGITS:
+            return Patient.objects.none()
+        return Patient.objects.filter(
+            prefix_match("contact_digits", digits)
+        ).order_by("contact_digits", "id")[:limit]
+
+    name = fold_name(query)
+    return Patient.objects.filter(
+        prefix_match("search_name", name)
+    ).order_by("search_name", "id")[:limit]
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from hillcrest.fastread import ValuesReader
 from .models import Patient, Appointment, Bill, Vitals
 from admin_panel.models import User, Department
 
@@ -74,13 +76,14 @@ class AppointmentSerializer(serializers.ModelSerializer):
         validated_data["doctor"] = User.objects.get(id=doctor_id)
         validated_data["department"] = Department.objects.get(id=department_id)
 
-        # Generate token number
-        count = Appointment.objects.count() + 1
-        validated_data["token_number"] = f"T{count:03d}"
-
+        # token_number is assigned by Appointment.save()
         return super().create(validated_data)
 
 
+# list responses without model instances (hillcrest/fastread.py)
+appointment_list_reader = ValuesReader(AppointmentSerializer)
+
+
 # ───────────────────────────────────────
 # Bill Serializer
 # ───────────────────────────────────────
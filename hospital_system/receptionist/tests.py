@@ -1,3 +1,224 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from admin_panel.models import Department, User
+from admin_panel.sequences import SequenceBlock
+from hillcrest.prefix import upper_bound
+from .models import Appointment, Patient
+from .serializers import AppointmentSerializer
+from .views import AppointmentViewSet
+from .tokens import next_token
+
+
+def _register(count):
+    try:
+        return [
+            Patient.objects.create(full_name="Load Test", age=30).patient_id
+            for _ in range(count)
+        ]
+    finally:
+        connection.close()
+
+
+class PatientIdTests(TestCase):
+    def test_format_and_order(self):
+        first = Patient.objects.create(full_name="A", age=20)
+        second = Patient.objects.create(full_name="B", age=21)
+        self.assertEqual(first.patient_id, "PT0001")
+        self.assertEqual(second.patient_id, "PT0002")
+
+    def test_counter_seeded_from_existing_rows(self):
+        Patient.objects.bulk_create([Patient(patient_id="PT0041", full_name="Old", age=50)])
+        patient = Patient.objects.create(full_name="New", age=20)
+        self.assertEqual(patient.patient_id, "PT0042")
+
+
+# needs a database with row-level locking; SQLite locks the whole file
+@skipUnlessDBFeature("has_select_for_update")
+class PatientIdConcurrencyTests(TransactionTestCase):
+    workers = 8
+    per_worker = 250
+
+    def test_parallel_registration_issues_unique_ids(self):
+        with ThreadPoolExecutor(self.workers) as pool:
+            batches = list(pool.map(_register, [self.per_worker] * self.workers))
+
+        issued = [pid for batch in batches for pid in batch]
+        self.assertEqual(len(issued), self.workers * self.per_worker)
+        self.assertEqual(len(set(issued)), len(issued))
+        self.assertEqual(Patient.objects.count(), len(issued))
+
+    def test_parallel_blocks_never_overlap(self):
+        # one allocator per "gunicorn worker"
+        blocks = [SequenceBlock("stress", 25) for _ in range(self.workers)]
+
+        def take(block):
+            try:
+                return [block.next() for _ in range(self.per_worker)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            values = [v for batch in pool.map(take, blocks) for v in batch]
+
+        self.assertEqual(len(set(values)), len(values))
+
+
+class AppointmentTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = Department.objects.create(name="General")
+        cls.doc_a = User.objects.create(username="doc001", role="DOCTOR", department=cls.department)
+        cls.doc_b = User.objects.create(username="doc002", role="DOCTOR", department=cls.department)
+        cls.patient = Patient.objects.create(full_name="A", age=20)
+
+    def book(self, doctor):
+        return Appointment.objects.create(
+            patient=self.patient, doctor=doctor, department=self.department
+        ).token_number
+
+    def test_tokens_are_per_doctor(self):
+        self.assertEqual([self.book(self.doc_a), self.book(self.doc_a)], ["T001", "T002"])
+        self.assertEqual(self.book(self.doc_b), "T001")
+
+    def test_tokens_reset_daily(self):
+        ids = (self.doc_a.id, self.department.id)
+        self.assertEqual(next_token(*ids, day=date(2025, 1, 1)), "T001")
+        self.assertEqual(next_token(*ids, day=date(2025, 1, 1)), "T002")
+        self.assertEqual(next_token(*ids, day=date(2025, 1, 2)), "T001")
+
+    @override_settings(APPOINTMENT_TOKENS={"SCOPE": "department", "FORMAT": "D{department_id}-{number:02d}"})
+    def test_department_scope_and_format(self):
+        self.book(self.doc_a)
+        self.assertEqual(self.book(self.doc_b), f"D{self.department.id}-02")
+
+    def test_booking_does_not_scan_appointments(self):
+        self.book(self.doc_a)
+        with CaptureQueriesContext(connection) as ctx:
+            self.book(self.doc_a)
+        reads = [q["sql"].lower() for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith("SELECT")]
+        self.assertFalse([sql for sql in reads if "receptionist_appointment" in sql])
+
+
+class PatientListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="recp001", role="RECEPTIONIST")
+        for i in range(5):
+            Patient.objects.create(full_name=f"Patient {i}", age=30)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unpaginated_by_default(self):
+        res = self.client.get("/api/receptionist/patients/")
+        self.assertEqual(len(res.json()), 5)
+
+    def test_page_number_mode(self):
+        res = self.client.get("/api/receptionist/patients/?page=2&page_size=2").json()
+        self.assertEqual(res["count"], 5)
+        self.assertEqual(len(res["results"]), 2)
+
+    def test_cursor_mode_walks_every_row_once(self):
+        url = "/api/receptionist/patients/?paginate=cursor&page_size=2"
+        seen = []
+        while url:
+            page = self.client.get(url).json()
+            seen += [p["patient_id"] for p in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, [f"PT{n:04d}" for n in range(5, 0, -1)])
+
+
+class AppointmentListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="recp001", role="RECEPTIONIST")
+        general = Department.objects.create(name="General")
+        doctor = User.objects.create(username="doc001", role="DOCTOR", first_name="Asha", department=general)
+        visiting = User.objects.create(username="doc002", role="DOCTOR")
+        patient = Patient.objects.create(full_name="A", age=30, gender="Female")
+        Appointment.objects.create(patient=patient, doctor=doctor, department=general)
+        Appointment.objects.create(patient=patient, doctor=visiting, department=None)
+        Appointment.objects.create(patient=Patient.objects.create(full_name="B", age=40), doctor=doctor, department=general)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def serialized(self, queryset):
+        return JSONRenderer().render(AppointmentSerializer(queryset, many=True).data)
+
+    def test_fast_list_matches_the_serializer_byte_for_byte(self):
+        with self.assertNumQueries(1):
+            res = self.client.get("/api/receptionist/appointments/")
+        self.assertEqual(res.content, self.serialized(AppointmentViewSet.queryset))
+
+        page = self.client.get("/api/receptionist/appointments/?paginate=cursor&page_size=2").json()
+        self.assertEqual(
+            JSONRenderer().render(page["results"]),
+            self.serialized(AppointmentViewSet.queryset.order_by("-created_at", "-id")[:2]),
+        )
+
+
+class PatientSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="recp001", role="RECEPTIONIST")
+        cls.anita = Patient.objects.create(full_name="Anita  Nair", age=30, contact_number="+91 98470-12345")
+        cls.anil = Patient.objects.create(full_name="anil kumar", age=40, contact_number="9847099999")
+        cls.bala = Patient.objects.create(full_name="Bala", age=50, contact_number="7012345678")
+
+    def search(self, q, **params):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get("/api/receptionist/patients/search/", {"q": q, **params})
+        self.assertEqual(res.status_code, 200)
+        return [p["patient_id"] for p in res.json()]
+
+    def test_search_keys_are_normalized(self):
+        self.assertEqual(self.anita.contact_digits, "9847012345")
+        self.assertEqual(self.anita.search_name, "anita nair")
+
+    def test_patient_id(self):
+        self.assertEqual(self.search(self.bala.patient_id.lower()), [self.bala.patient_id])
+
+    def test_phone_exact_and_prefix(self):
+        self.assertEqual(self.search("98470 12345"), [self.anita.patient_id])
+        self.assertEqual(self.search("98470"), [self.anita.patient_id, self.anil.patient_id])
+        # ends in 9: the range must not stop at "…:", which sorts before the digits on MySQL
+        self.assertEqual(self.search("9847099999"), [self.anil.patient_id])
+        self.assertEqual(self.search("984709"), [self.anil.patient_id])
+        self.assertEqual(
+            [upper_bound(p) for p in ("984709", "anz", "zz", "o'")], ["98470a", "ao", None, None]
+        )
+
+    def test_phone_prefix_with_country_or_trunk_code(self):
+        self.assertEqual(self.search("+91 98470"), [self.anita.patient_id, self.anil.patient_id])
+        self.assertEqual(self.search("+91 98470-12345"), [self.anita.patient_id])
+        self.assertEqual(self.search("098470 1"), [self.anita.patient_id])
+        self.assertEqual(self.search("+91"), [])
+
+    def test_name_prefix_is_case_insensitive_and_limited(self):
+        self.assertEqual(self.search("AN"), [self.anil.patient_id, self.anita.patient_id])
+        self.assertEqual(self.search("an", limit=1), [self.anil.patient_id])
+        self.assertEqual(self.search("zz"), [])
+        Patient.objects.create(full_name="Liz", age=20)
+        Patient.objects.create(full_name="Liza", age=20)
+        self.assertEqual(len(self.search("liz")), 2)
+
+    def test_phone_filter_uses_normalized_number(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get("/api/receptionist/patients/", {"phone": "9847012345"})
+        self.assertEqual([p["id"] for p in res.json()], [self.anita.id])
+
+        Patient.objects.create(full_name="No Phone", age=20)
+        res = client.get("/api/receptionist/patients/", {"phone": "abc"})
+        self.assertEqual(res.json(), [])
@@ -0,0 +1,56 @@
+# receptionist/tokens.py
+"""
+Appointment token numbers.
+
+Tokens come from admin_panel.Sequence counters keyed by day and by
+doctor (or department), so booking never scans the appointments table
+and numbering starts again at T001 every morning.
+
+Configured through settings.APPOINTMENT_TOKENS:
+
+    FORMAT  str.format template; receives number, doctor_id,
+            department_id and date (default "T{number:03d}")
+    SCOPE   "doctor", "department" or "clinic" (default "doctor")
+    RESET   "daily" or "never" (default "daily")
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from admin_panel.sequences import reserve
+
+DEFAULTS = {
+    "FORMAT": "T{number:03d}",
+    "SCOPE": "doctor",
+    "RESET": "daily",
+}
+
+
+def token_settings():
+    return {**DEFAULTS, **getattr(settings, "APPOINTMENT_TOKENS", {})}
+
+
+def sequence_name(doctor_id, department_id, day, conf=None):
+    conf = conf or token_settings()
+    parts = ["token"]
+    if conf["RESET"] == "daily":
+        parts.append(day.isoformat())
+    if conf["SCOPE"] == "doctor":
+        parts.append(f"doctor:{doctor_id}")
+    elif conf["SCOPE"] == "department":
+        parts.append(f"department:{department_id}")
+    return ":".join(parts)
+
+
+def next_token(doctor_id, department_id, day=None):
+    """
+    Reserve and format the next token for this doctor/department.
+    """
+    conf = token_settings()
+    day = day or timezone.localdate()
+    number = reserve(sequence_name(doctor_id, department_id, day, conf))
+    return conf["FORMAT"].format(
+        number=number,
+        doctor_id=doctor_id,
+        department_id=department_id,
+        date=day,
+    )
@@ -1,62 +1,80 @@
 # receptionist/views.py
-from rest_framework import viewsets, permissions
+from django.db import transaction
+from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView
 
-from .models import Patient, Appointment, Bill, Vitals
+from .models import Patient, Appointment, Bill, Vitals, normalize_phone
+from .search import search_patients
 from .serializers import (
     PatientSerializer,
     AppointmentSerializer,
     BillSerializer,
+    appointment_list_reader,
     DoctorSerializer,
     VitalsSerializer,
     DepartmentSerializer,
 )
 
 from admin_panel.models import User, Department
-from admin_panel.permissions import IsAdmin
-from .permissions import IsReceptionist
-
-
-# --------- Custom permission (Admin + Receptionist) ----------
-class IsReceptionistOrAdmin(permissions.BasePermission):
-    def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated
-            and request.user.role in ["RECEPTIONIST", "ADMIN"]
-        )
+from hillcrest.fastread import FastListMixin
+from hillcrest.refcache import ReferenceDataMixin
 
 
 # ===================== PATIENTS =====================
 class PatientViewSet(viewsets.ModelViewSet):
     serializer_class = PatientSerializer
-    permission_classes = [IsReceptionistOrAdmin]
+    policy_resource = "patients"
 
     def get_queryset(self):
         """
-        Optionally filter by ?phone=<10-digit>
+        Optionally filter by ?phone=<10-digit>. A value without digits
+        matches nobody, rather than every patient without a phone.
         """
         qs = Patient.objects.all().order_by("-created_at")
         phone = self.request.query_params.get("phone")
         if phone:
-            qs = qs.filter(contact_number__iexact=phone)
+            digits = normalize_phone(phone)
+            qs = qs.filter(contact_digits=digits) if digits else qs.none()
         return qs
 
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        GET /receptionist/patients/search/?q=<patient id | phone | name>&limit=10
+        """
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        patients = search_patients(request.query_params.get("q"), limit)
+        return Response(self.get_serializer(patients, many=True).data)
+
 
 # ===================== APPOINTMENTS =====================
-class AppointmentViewSet(viewsets.ModelViewSet):
-    queryset = Appointment.objects.select_related("patient", "doctor", "department").order_by("-created_at")
+class AppointmentViewSet(FastListMixin, viewsets.ModelViewSet):
+    queryset = Appointment.objects.select_related(
+        "patient", "doctor__department", "department"
+    ).order_by("-created_at")
     serializer_class = AppointmentSerializer
-    permission_classes = [IsReceptionist]
+    list_reader = appointment_list_reader
+    policy_resource = "appointments"
 
 
 # ===================== BILLS =====================
 class BillViewSet(viewsets.ModelViewSet):
-    queryset = Bill.objects.all()
+    queryset = Bill.objects.select_related(
+        "appointment__patient",
+        "appointment__doctor",
+        "appointment__department",
+    )
     serializer_class = BillSerializer
-    permission_classes = [IsReceptionistOrAdmin]
+    policy_resource = "bills"
 
+    # the ledger entry is posted from the save signal; keep both in one transaction
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         data = request.data.copy()
         appointment_id = data.get("appointment")
@@ -90,12 +108,20 @@ class BillViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.data, status=201)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
 
 # ===================== VITALS =====================
 class VitalsViewSet(viewsets.ModelViewSet):
     queryset = Vitals.objects.all()
     serializer_class = VitalsSerializer
-    permission_classes = [IsReceptionist]
+    policy_resource = "vitals"
 
     def perform_create(self, serializer):
         appointment_id = self.request.query_params.get("appointment_id")
@@ -109,20 +135,22 @@ class VitalsViewSet(viewsets.ModelViewSet):
 # ===================== DROPDOWNS =====================
 
 # List all departments for receptionist
-class DepartmentListView(ListAPIView):
+class DepartmentListView(ReferenceDataMixin, ListAPIView):
+    reference_dataset = "departments"
     queryset = Department.objects.all().order_by("name")
     serializer_class = DepartmentSerializer
-    permission_classes = [IsReceptionistOrAdmin]
+    policy_resource = "departments"
 
 
 # List doctors filtered by department for receptionist
-class DoctorListByDepartmentView(ListAPIView):
+class DoctorListByDepartmentView(ReferenceDataMixin, ListAPIView):
+    reference_dataset = "doctors"
     serializer_class = DoctorSerializer
-    permission_classes = [IsReceptionistOrAdmin]
+    policy_resource = "department_doctors"
 
     def get_queryset(self):
         department_id = self.kwargs.get("department_id")
-        qs = User.objects.filter(role="DOCTOR")
+        qs = User.objects.filter(role="DOCTOR").select_related("department")
         if department_id:
             qs = qs.filter(department_id=department_id)
         return qs